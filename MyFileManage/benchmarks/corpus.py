@@ -0,0 +1,129 @@
+import json
+import os
+import random
+import shutil
+from dataclasses import dataclass, asdict
+from typing import Dict, List
+
+from models.rich_text import Paragraph, TextRun
+from utils.app_paths import cache_root
+from utils.docx_io import write_docx
+from utils.rtf_io import write_rtf
+
+# 预设的语料规模(文件数)
+SIZES = {
+    'small': 10_000,
+    'medium': 100_000,
+    'large': 1_000_000,
+}
+SHAPES = ('wide', 'deep', 'mixed')
+# 各类型文件所占比例，另有少量不受支持的文件
+TYPE_WEIGHTS = {
+    'md': 30, 'txt': 25, 'py': 15, 'html': 10, 'docx': 8, 'rtf': 7, 'png': 5,
+}
+# wide：每个目录的文件数；deep：目录链的深度和每层文件数
+WIDE_FILES_PER_DIR = 5000
+DEEP_CHAIN_DEPTH = 64
+DEEP_FILES_PER_DIR = 16
+MIXED_MAX_DEPTH = 8
+MIXED_FILES_PER_DIR = 48
+# 生成完成后写入的标记文件，参数相同时直接复用已有语料
+MARKER_NAME = '.corpus.json'
+
+
+@dataclass
+class CorpusSpec:
+    file_count: int
+    shape: str
+    seed: int = 0
+
+    @property
+    def name(self) -> str:
+        return f"{self.shape}-{self.file_count}-{self.seed}"
+
+
+def corpus_dir() -> str:
+    return os.path.join(cache_root(), 'benchmarks')
+
+
+def _sample_contents() -> Dict[str, bytes]:
+    words = "lorem ipsum dolor sit amet 文档 管理 性能 测试".split()
+    text = "\n".join(" ".join(words[(i + j) % len(words)] for j in range(12)) for i in range(20))
+    paragraphs = [Paragraph([TextRun(line), TextRun(" bold", bold=True)]) for line in text.splitlines()]
+    return {
+        'md': ("# 标题\n\n" + text + "\n\n- item\n- item\n").encode('utf-8'),
+        'txt': text.encode('utf-8'),
+        'py': "def f(x):\n    return x * 2  # comment\n".encode('utf-8') * 10,
+        'html': f"<html><body><h1>标题</h1><p>{text}</p></body></html>".encode('utf-8'),
+        'docx': write_docx(paragraphs),
+        'rtf': write_rtf(paragraphs).encode('latin-1'),
+        'png': b'\x89PNG\r\n\x1a\n' + b'\0' * 64,
+    }
+
+
+def _directories(spec: CorpusSpec, rng: random.Random) -> List[str]:
+    """按形状生成相对目录路径列表"""
+    if spec.shape == 'wide':
+        count = max(1, -(-spec.file_count // WIDE_FILES_PER_DIR))
+        return [f"dir{i:05d}" for i in range(count)]
+
+    if spec.shape == 'deep':
+        per_chain = DEEP_CHAIN_DEPTH * DEEP_FILES_PER_DIR
+        chains = max(1, -(-spec.file_count // per_chain))
+        directories = []
+        for chain in range(chains):
+            path = f"chain{chain:04d}"
+            for depth in range(DEEP_CHAIN_DEPTH):
+                path = os.path.join(path, f"level{depth:02d}")
+                directories.append(path)
+        return directories
+
+    # mixed：随机分支的树，目录数与文件数成比例
+    wanted = max(1, spec.file_count // MIXED_FILES_PER_DIR)
+    directories = []
+    frontier = ['']
+    while len(directories) < wanted:
+        parent = frontier[rng.randrange(len(frontier))]
+        path = os.path.join(parent, f"d{len(directories):06d}") if parent else f"d{len(directories):06d}"
+        directories.append(path)
+        if path.count(os.sep) < MIXED_MAX_DEPTH - 1:
+            frontier.append(path)
+    return directories
+
+
+def generate_corpus(spec: CorpusSpec, base_dir: str = None, progress=None) -> str:
+    """生成(或复用)合成的文档树，返回根目录"""
+    root = os.path.join(base_dir or corpus_dir(), spec.name)
+    marker = os.path.join(root, MARKER_NAME)
+    if os.path.exists(marker):
+        return root
+    if os.path.exists(root):
+        # 上次生成被中断
+        shutil.rmtree(root)
+
+    rng = random.Random(spec.seed)
+    contents = _sample_contents()
+    extensions = list(TYPE_WEIGHTS)
+    weights = list(TYPE_WEIGHTS.values())
+    directories = _directories(spec, rng)
+    for directory in directories:
+        os.makedirs(os.path.join(root, directory), exist_ok=True)
+
+    for index in range(spec.file_count):
+        directory = directories[index % len(directories)]
+        ext = rng.choices(extensions, weights)[0]
+        with open(os.path.join(root, directory, f"file{index:07d}.{ext}"), 'wb') as f:
+            f.write(contents[ext])
+        if progress is not None and index % 10_000 == 0:
+            progress(index, spec.file_count)
+
+    with open(marker, 'w', encoding='utf-8') as f:
+        json.dump(asdict(spec), f)
+    return root
+
+
+def list_files(root: str) -> List[str]:
+    paths = []
+    for dirpath, _, filenames in os.walk(root):
+        paths.extend(os.path.join(dirpath, name) for name in filenames if name != MARKER_NAME)
+    return paths
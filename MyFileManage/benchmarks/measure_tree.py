@@ -0,0 +1,199 @@
+"""测量目录树的启动耗时、常驻内存和目录监视数量
+
+在 MyFileManage 目录下运行：
+    python -m benchmarks.measure_tree                    # 在合成的 1M 文件语料上测量
+    python -m benchmarks.measure_tree --root ~ --expand 500
+
+每种方式在独立的子进程中测量，互不影响内存：
+    tree    当前的 DocumentTreeView，只加载和监视展开的目录
+    legacy  旧实现：QFileSystemModel 从文件系统根目录开始填充和监视
+监视数量从 /proc/self/fdinfo 中的 inotify 记录统计，只在 Linux 上可用。
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+
+# 必须在导入 Qt 之前设置，没有显示环境也能创建界面
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from benchmarks.corpus import CorpusSpec, generate_corpus
+
+# 等待异步加载完成的最长时间(秒)
+SETTLE_TIMEOUT = 60
+# 展开目录后让文件系统模型和监视线程处理完事件的时间(秒)
+SETTLE_DELAY = 2.0
+DEFAULT_EXPAND = 200
+MODES = ('tree', 'legacy')
+
+
+def rss_mb() -> float:
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmRSS:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    import resource
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def inotify_watches() -> int:
+    count = 0
+    try:
+        names = os.listdir('/proc/self/fdinfo')
+    except OSError:
+        return -1
+    for name in names:
+        try:
+            with open(f'/proc/self/fdinfo/{name}') as f:
+                count += sum(1 for line in f if line.startswith('inotify wd:'))
+        except OSError:
+            continue
+    return count
+
+
+def _settle(app, seconds, done=None):
+    deadline = time.monotonic() + seconds
+    while time.monotonic() < deadline:
+        app.processEvents()
+        if done is not None and done():
+            return
+        time.sleep(0.01)
+
+
+def _directories_breadth_first(app, model, root_index, limit, is_loaded):
+    """按广度优先顺序展开最多 limit 个目录，返回它们的索引
+
+    QFileSystemModel 在后台线程中读取目录，fetchMore 之后要等到 is_loaded 为真才有子项。
+    """
+    queue = [root_index]
+    expanded = []
+    while queue and len(expanded) < limit:
+        index = queue.pop(0)
+        if model.canFetchMore(index):
+            model.fetchMore(index)
+        _settle(app, SETTLE_TIMEOUT, lambda: is_loaded(index))
+        for row in range(model.rowCount(index)):
+            child = model.index(row, 0, index)
+            if model.isDir(child):
+                queue.append(child)
+        if index != root_index:
+            expanded.append(index)
+    return expanded
+
+
+def measure(mode, root, expand):
+    """在当前进程中测量一种方式，返回各阶段的数据"""
+    from PyQt5.QtWidgets import QApplication, QFileSystemModel, QTreeView
+    from PyQt5.QtCore import QDir
+
+    result = {'mode': mode, 'baseline_rss_mb': round(rss_mb(), 1)}
+    app = QApplication(sys.argv[:1])
+    start = time.perf_counter()
+
+    if mode == 'tree':
+        from views.tree_view import DocumentTreeView
+        from views.watch_service import WatchService
+
+        watch_service = WatchService()
+        view = DocumentTreeView()
+        view.model.directory_loaded.connect(watch_service.watch)
+        view.model.directory_unloaded.connect(watch_service.unwatch)
+        view.set_root_path(root)
+        model = view.model
+        root_index = view.rootIndex()
+        # 目录在 fetchMore 中同步加载
+        is_loaded = lambda index: True
+    else:
+        view = QTreeView()
+        model = QFileSystemModel()
+        loaded = set()
+        model.directoryLoaded.connect(loaded.add)
+        is_loaded = lambda index: model.filePath(index) in loaded
+        model.setRootPath(QDir.rootPath())
+        view.setModel(model)
+        root_index = model.index(root)
+        view.setRootIndex(root_index)
+
+    view.show()
+    _settle(app, SETTLE_TIMEOUT, lambda: model.rowCount(root_index) > 0)
+    result['startup_ms'] = round((time.perf_counter() - start) * 1000, 1)
+    _settle(app, SETTLE_DELAY)
+    result['startup_rss_mb'] = round(rss_mb(), 1)
+    result['startup_watches'] = inotify_watches()
+
+    expanded = _directories_breadth_first(app, model, root_index, expand, is_loaded)
+    for index in expanded:
+        view.expand(index)
+    _settle(app, SETTLE_DELAY)
+    result['expanded'] = len(expanded)
+    result['expanded_rss_mb'] = round(rss_mb(), 1)
+    result['expanded_watches'] = inotify_watches()
+
+    for index in reversed(expanded):
+        view.collapse(index)
+    if mode == 'tree':
+        view.unload_collapsed(force=True)
+    _settle(app, SETTLE_DELAY)
+    result['collapsed_rss_mb'] = round(rss_mb(), 1)
+    result['collapsed_watches'] = inotify_watches()
+
+    if mode == 'tree':
+        watch_service.stop()
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description="测量目录树的启动耗时、内存和监视数量")
+    parser.add_argument('--root', help="要打开的目录，默认生成合成语料")
+    parser.add_argument('--files', type=int, default=1_000_000, help="合成语料的文件数")
+    parser.add_argument('--shape', default='mixed', help="合成语料的目录树形状")
+    parser.add_argument('--expand', type=int, default=DEFAULT_EXPAND, help="依次展开的目录数")
+    parser.add_argument('--mode', choices=MODES, help="只在当前进程中测量一种方式，输出 JSON")
+    args = parser.parse_args()
+
+    root = args.root
+    if root is None:
+        spec = CorpusSpec(args.files, args.shape)
+        print(f"准备语料 {spec.name} ...", file=sys.stderr)
+        root = generate_corpus(spec, progress=lambda done, total: print(
+            f"  {done}/{total}", end='\r', file=sys.stderr))
+    root = os.path.abspath(os.path.expanduser(root))
+
+    if args.mode:
+        print(json.dumps(measure(args.mode, root, args.expand)))
+        return 0
+
+    results = []
+    for mode in MODES:
+        output = subprocess.run(
+            [sys.executable, '-m', 'benchmarks.measure_tree', '--root', root,
+             '--expand', str(args.expand), '--mode', mode],
+            capture_output=True, text=True)
+        if output.returncode != 0:
+            print(f"{mode} 测量失败:\n{output.stderr}", file=sys.stderr)
+            return 1
+        results.append(json.loads(output.stdout.strip().splitlines()[-1]))
+
+    print(f"目录: {root}，展开 {args.expand} 个目录")
+    rows = [
+        ('启动耗时 (ms)', 'startup_ms'),
+        ('启动后内存 (MB)', 'startup_rss_mb'),
+        ('启动后监视数', 'startup_watches'),
+        ('展开后内存 (MB)', 'expanded_rss_mb'),
+        ('展开后监视数', 'expanded_watches'),
+        ('折叠后内存 (MB)', 'collapsed_rss_mb'),
+        ('折叠后监视数', 'collapsed_watches'),
+    ]
+    print(f"{'':<18}" + ''.join(f"{result['mode']:>12}" for result in results))
+    for label, key in rows:
+        print(f"{label:<18}" + ''.join(f"{result[key]:>12}" for result in results))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,446 @@
+"""无界面运行的性能基准
+
+在 MyFileManage 目录下运行：
+    python -m benchmarks.run_benchmarks --size small --shape mixed
+    python -m benchmarks.run_benchmarks --save-baseline      # 记录当前结果为基线
+
+结果与 benchmarks/baselines/<语料名>.json 中的基线比较，中位数超出阈值时以退出码 1 结束。
+基线与机器相关，应在同一台机器(或同一规格的 CI 机器)上生成和比较。
+"""
+import argparse
+import datetime
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+# 必须在导入 Qt 之前设置，没有显示环境也能创建编辑器
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+from benchmarks.corpus import SIZES, SHAPES, CorpusSpec, generate_corpus, list_files
+from models.directory import Directory, scan_cache
+from models.rich_text import Paragraph, TextRun
+from models.dir_stats import DirectoryStatsTree
+from search.path_index import PathIndex
+from utils.docx_io import iter_docx_paragraphs, write_docx
+from utils.file_utils import get_document_type, import_file
+from utils.rtf_io import iter_rtf_paragraphs, write_rtf
+
+BASELINE_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines')
+# 中位数比基线慢超过该比例视为退化
+DEFAULT_THRESHOLD = 0.25
+DEFAULT_REPEAT = 5
+# dir_stats_update 每轮修改的文件数
+STATS_UPDATE_SAMPLE = 100
+# import_file 每轮导入的文件数
+IMPORT_SAMPLE = 1000
+# 生成的单个大文档的规模
+RICH_TEXT_PARAGRAPHS = 5000
+MARKDOWN_SECTIONS = 1000
+TEXT_FILE_BYTES = 1024 * 1024
+STREAMING_FILE_BYTES = 8 * 1024 * 1024
+PYTHON_FILE_LINES = 20_000
+
+
+class Skip(Exception):
+    """缺少依赖等原因无法运行的基准"""
+
+
+@dataclass
+class Case:
+    """一个基准：prepare 在每轮计时之前调用，不计入耗时"""
+    run: Callable[[], None]
+    prepare: Optional[Callable[[], None]] = None
+
+
+@dataclass
+class Context:
+    root: str
+    files: List[str]
+    work_dir: str
+
+
+BENCHMARKS = []  # (名称, 构造 Case 的函数, 阈值)
+
+
+def benchmark(name, threshold=DEFAULT_THRESHOLD):
+    def decorator(func):
+        BENCHMARKS.append((name, func, threshold))
+        return func
+    return decorator
+
+
+# ---- 模型与文件 ----
+
+def _walk(directory):
+    count = len(directory.documents)
+    for sub in directory.subdirectories:
+        count += _walk(sub)
+    return count
+
+
+@benchmark('directory_scan_cold')
+def bench_scan_cold(ctx):
+    return Case(run=lambda: _walk(Directory(path=ctx.root, name=os.path.basename(ctx.root))),
+                prepare=scan_cache.invalidate)
+
+
+@benchmark('directory_scan_warm')
+def bench_scan_warm(ctx):
+    return Case(run=lambda: _walk(Directory(path=ctx.root, name=os.path.basename(ctx.root))))
+
+
+@benchmark('get_document_type')
+def bench_document_type(ctx):
+    names = [os.path.basename(path) for path in ctx.files]
+
+    def run():
+        for name in names:
+            get_document_type(name)
+    return Case(run=run)
+
+
+@benchmark('path_index_build')
+def bench_path_index_build(ctx):
+    return Case(run=lambda: PathIndex.build(ctx.root))
+
+
+@benchmark('path_index_keystrokes')
+def bench_path_index_keystrokes(ctx):
+    index = PathIndex.build(ctx.root)
+    rng = random.Random(0)
+    # 模拟逐字输入若干个已有文件名，每个前缀查询一次
+    words = [os.path.basename(path) for path in rng.sample(ctx.files, min(20, len(ctx.files)))]
+    queries = [word[:end] for word in words for end in range(1, len(word) + 1)]
+
+    def run():
+        for query in queries:
+            index.query(query)
+    return Case(run=run)
+
+
+@benchmark('dir_stats_build')
+def bench_dir_stats_build(ctx):
+    return Case(run=lambda: DirectoryStatsTree.build(ctx.root))
+
+
+@benchmark('dir_stats_update')
+def bench_dir_stats_update(ctx):
+    stats = DirectoryStatsTree.build(ctx.root)
+    paths = random.Random(0).sample(ctx.files, min(STATS_UPDATE_SAMPLE, len(ctx.files)))
+
+    def run():
+        # 逐个文件更新，模拟分散到达的变化
+        for path in paths:
+            os.utime(path)
+            stats.update_paths([path])
+    return Case(run=run)
+
+
+@benchmark('import_file')
+def bench_import_file(ctx):
+    sources = random.Random(0).sample(ctx.files, min(IMPORT_SAMPLE, len(ctx.files)))
+    dest = os.path.join(ctx.work_dir, 'import')
+
+    def prepare():
+        shutil.rmtree(dest, ignore_errors=True)
+        os.makedirs(dest)
+
+    def run():
+        for src in sources:
+            import_file(src, dest)
+    return Case(run=run, prepare=prepare)
+
+
+def _rich_paragraphs():
+    return [Paragraph([TextRun(f"第 {i} 段 " + "lorem ipsum dolor sit amet " * 8),
+                       TextRun("bold", bold=True)], heading_level=1 if i % 50 == 0 else 0)
+            for i in range(RICH_TEXT_PARAGRAPHS)]
+
+
+@benchmark('docx_parse')
+def bench_docx_parse(ctx):
+    path = os.path.join(ctx.work_dir, 'large.docx')
+    with open(path, 'wb') as f:
+        f.write(write_docx(_rich_paragraphs()))
+    return Case(run=lambda: sum(1 for _ in iter_docx_paragraphs(path)))
+
+
+@benchmark('rtf_parse')
+def bench_rtf_parse(ctx):
+    text = write_rtf(_rich_paragraphs())
+    return Case(run=lambda: sum(1 for _ in iter_rtf_paragraphs(text)))
+
+
+def _markdown_text():
+    sections = []
+    for i in range(MARKDOWN_SECTIONS):
+        sections.append(f"## 第 {i} 节\n\n段落 **加粗** 和 `代码` [链接][ref]\n\n- 列表项\n- 列表项\n\n"
+                        f"```python\nprint({i})\n```\n")
+    sections.append("[ref]: https://example.com\n")
+    return "\n".join(sections)
+
+
+@benchmark('markdown_render_cold')
+def bench_markdown_cold(ctx):
+    try:
+        from utils.markdown_blocks import BlockRenderCache
+    except ImportError as e:
+        raise Skip(str(e))
+    text = _markdown_text()
+    return Case(run=lambda: BlockRenderCache().render_document(text))
+
+
+@benchmark('markdown_render_edit')
+def bench_markdown_edit(ctx):
+    try:
+        from utils.markdown_blocks import BlockRenderCache
+    except ImportError as e:
+        raise Skip(str(e))
+    text = _markdown_text()
+    cache = BlockRenderCache()
+    cache.render_document(text)
+    edits = iter(range(1_000_000))
+
+    def run():
+        # 修改中间的一个块，只有该块需要重新渲染
+        middle = len(text) // 2
+        cache.render_document(text[:middle] + f" 编辑{next(edits)} " + text[middle:])
+    return Case(run=run)
+
+
+# ---- 编辑器 ----
+
+_app = None
+
+
+def qt_app():
+    global _app
+    try:
+        from PyQt5.QtWidgets import QApplication
+    except ImportError as e:
+        raise Skip(str(e))
+    if _app is None:
+        _app = QApplication.instance() or QApplication([sys.argv[0]])
+    return _app
+
+
+def _write_text_file(path, size, line):
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(line * (size // len(line.encode('utf-8')) + 1))
+
+
+def _process_until(app, done, timeout=120):
+    deadline = time.perf_counter() + timeout
+    while not done():
+        app.processEvents()
+        if time.perf_counter() > deadline:
+            raise RuntimeError("timed out waiting for the editor")
+
+
+@benchmark('editor_load_text')
+def bench_editor_load(ctx):
+    qt_app()
+    from views.editor.text_editor import TextEditor
+    path = os.path.join(ctx.work_dir, 'medium.txt')
+    _write_text_file(path, TEXT_FILE_BYTES, "性能测试 benchmark line\n")
+    editor = TextEditor()
+    return Case(run=lambda: editor.load_file(path))
+
+
+@benchmark('editor_load_streaming')
+def bench_editor_streaming(ctx):
+    app = qt_app()
+    from views.editor.text_editor import TextEditor
+    path = os.path.join(ctx.work_dir, 'large.txt')
+    _write_text_file(path, STREAMING_FILE_BYTES, "性能测试 benchmark line\n")
+    editor = TextEditor()
+
+    def run():
+        editor.load_file(path)
+        _process_until(app, lambda: editor.stream is None)
+    return Case(run=run)
+
+
+@benchmark('editor_save_text')
+def bench_editor_save(ctx):
+    qt_app()
+    from utils.atomic_writer import background_writer
+    from views.editor.text_editor import TextEditor
+    path = os.path.join(ctx.work_dir, 'save.txt')
+    _write_text_file(path, TEXT_FILE_BYTES, "性能测试 benchmark line\n")
+    editor = TextEditor()
+    editor.load_file(path)
+
+    def run():
+        # 包含后台原子写入完成的时间
+        editor.save_file(path)
+        background_writer().flush()
+    return Case(run=run)
+
+
+@benchmark('editor_load_docx')
+def bench_editor_docx(ctx):
+    app = qt_app()
+    from views.editor.doc_editor import DocEditor
+    path = os.path.join(ctx.work_dir, 'editor.docx')
+    with open(path, 'wb') as f:
+        f.write(write_docx(_rich_paragraphs()))
+    editor = DocEditor()
+
+    def run():
+        editor.load_file(path)
+        _process_until(app, lambda: editor.stream is None)
+    return Case(run=run)
+
+
+@benchmark('python_highlight_full')
+def bench_python_highlight(ctx):
+    app = qt_app()
+    from views.editor.text_editor import TextEditor
+    path = os.path.join(ctx.work_dir, 'module.py')
+    with open(path, 'w', encoding='utf-8') as f:
+        for i in range(PYTHON_FILE_LINES // 4):
+            f.write(f'def func_{i}(self, x=[1, 2]):\n    """doc"""\n    return x  # c\n\n')
+    editor = TextEditor()
+    editor.resize(800, 600)
+    editor.show()
+
+    def run():
+        # 从打开到空闲时高亮完所有块
+        editor.load_file(path)
+        _process_until(app, lambda: not editor.highlighter.idle_timer.isActive())
+    return Case(run=run)
+
+
+# ---- 运行与比较 ----
+
+def measure(case, repeat):
+    # 先运行一次预热(导入、缓存、语料首次读入页缓存)
+    if case.prepare:
+        case.prepare()
+    case.run()
+    samples = []
+    for _ in range(repeat):
+        if case.prepare:
+            case.prepare()
+        start = time.perf_counter()
+        case.run()
+        samples.append(time.perf_counter() - start)
+    return samples
+
+
+def baseline_path(spec):
+    return os.path.join(BASELINE_DIR, f"{spec.name}.json")
+
+
+def load_baseline(path):
+    try:
+        with open(path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return None
+
+
+def save_baseline(path, spec, results):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    data = {
+        'created': datetime.datetime.now().isoformat(timespec='seconds'),
+        'machine': {
+            'platform': platform.platform(),
+            'python': platform.python_version(),
+            'cpu_count': os.cpu_count(),
+        },
+        'corpus': {'file_count': spec.file_count, 'shape': spec.shape, 'seed': spec.seed},
+        'results': results,
+    }
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, indent=2, ensure_ascii=False)
+
+
+def compare(name, result, baseline):
+    """返回(状态, 与基线的比值)"""
+    if baseline is None or name not in baseline.get('results', {}):
+        return 'new', None
+    base = baseline['results'][name]
+    ratio = result['median_s'] / base['median_s'] if base['median_s'] > 0 else 1.0
+    threshold = base.get('threshold', DEFAULT_THRESHOLD)
+    if ratio > 1 + threshold:
+        return 'REGRESSION', ratio
+    if ratio < 1 - threshold:
+        return 'faster', ratio
+    return 'ok', ratio
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="运行性能基准并与基线比较")
+    parser.add_argument('--size', choices=SIZES, default='small', help="语料规模")
+    parser.add_argument('--files', type=int, help="自定义文件数，覆盖 --size")
+    parser.add_argument('--shape', choices=SHAPES, default='mixed', help="目录树形状")
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--filter', default='', help="只运行名称包含该字符串的基准")
+    parser.add_argument('--baseline', help="基线文件，默认按语料名存放在 benchmarks/baselines")
+    parser.add_argument('--save-baseline', action='store_true', help="把本次结果保存为基线")
+    parser.add_argument('--corpus-dir', help="语料目录，默认在应用缓存目录下")
+    args = parser.parse_args(argv)
+
+    spec = CorpusSpec(file_count=args.files or SIZES[args.size], shape=args.shape)
+    print(f"准备语料 {spec.name} ...")
+    root = generate_corpus(spec, args.corpus_dir,
+                           progress=lambda done, total: print(f"  {done}/{total}", end='\r'))
+    work_dir = tempfile.mkdtemp(prefix='bench-')
+    ctx = Context(root=root, files=list_files(root), work_dir=work_dir)
+    print(f"语料位于 {root}，共 {len(ctx.files)} 个文件")
+
+    path = args.baseline or baseline_path(spec)
+    baseline = load_baseline(path)
+    results = {}
+    regressions = 0
+    try:
+        for name, factory, threshold in BENCHMARKS:
+            if args.filter and args.filter not in name:
+                continue
+            try:
+                case = factory(ctx)
+            except Skip as e:
+                print(f"{name:<26} 跳过: {e}")
+                continue
+            samples = measure(case, args.repeat)
+            result = {
+                'median_s': statistics.median(samples),
+                'min_s': min(samples),
+                'repeat': len(samples),
+                'threshold': threshold,
+            }
+            results[name] = result
+            status, ratio = compare(name, result, baseline)
+            regressions += status == 'REGRESSION'
+            ratio_text = f"{ratio:6.2f}x" if ratio is not None else "      "
+            print(f"{name:<26} 中位数 {result['median_s'] * 1000:10.1f} ms  最小 "
+                  f"{result['min_s'] * 1000:10.1f} ms  {ratio_text}  {status}")
+    finally:
+        shutil.rmtree(work_dir, ignore_errors=True)
+
+    if args.save_baseline:
+        if baseline is not None:
+            # 只覆盖本次运行的基准，保留其他基准的基线
+            merged = dict(baseline.get('results', {}))
+            merged.update(results)
+            results = merged
+        save_baseline(path, spec, results)
+        print(f"基线已保存到 {path}")
+        return 0
+    if baseline is None:
+        print(f"没有基线 {path}，使用 --save-baseline 记录")
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
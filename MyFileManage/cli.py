@@ -0,0 +1,201 @@
+"""不依赖 Qt 的命令行入口，在没有显示器的服务器上对整个文档根目录执行维护任务
+
+    python cli.py stats ROOT
+    python cli.py check ROOT
+    python cli.py export ROOT OUT_DIR [--full]
+    python cli.py import DEST_DIR SOURCE... [--dedup-root ROOT]
+"""
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from models.document import DocumentType
+from utils import batch_ops
+from utils.dedup import DedupStore, hash_db_path
+from utils.file_utils import DEDUP_LINK, DEDUP_SKIP, BulkImporter
+from utils.site_export import SiteBuilder
+
+# 每个子进程任务处理的文件数
+BATCH_SIZE = 128
+# 进度输出的最小间隔(秒)
+PROGRESS_INTERVAL = 0.2
+
+
+class Progress:
+    """向 stderr 输出进度；终端中原地刷新，重定向到文件时逐行输出"""
+
+    def __init__(self, label, total):
+        self.label = label
+        self.total = total
+        self.done = 0
+        self.start = time.monotonic()
+        self._last = 0.0
+        self._tty = sys.stderr.isatty()
+
+    def advance(self, count):
+        self.done += count
+        now = time.monotonic()
+        if now - self._last >= PROGRESS_INTERVAL or self.done >= self.total:
+            self._last = now
+            self.show(f"{self.done}/{self.total}")
+
+    def show(self, text):
+        line = f"{self.label}: {text} ({time.monotonic() - self.start:.1f}s)"
+        sys.stderr.write(f"\r{line}\033[K" if self._tty else line + "\n")
+        sys.stderr.flush()
+
+    def finish(self):
+        if self._tty:
+            sys.stderr.write("\n")
+            sys.stderr.flush()
+
+
+def _batches(items, size=BATCH_SIZE):
+    for start in range(0, len(items), size):
+        yield items[start:start + size]
+
+
+def run_parallel(label, func, items, workers):
+    """把 items 分批交给进程池执行，按完成顺序产出每批的结果"""
+    progress = Progress(label, len(items))
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(func, batch): len(batch) for batch in _batches(items)}
+        try:
+            for future in as_completed(futures):
+                progress.advance(futures[future])
+                yield future.result()
+        except KeyboardInterrupt:
+            for future in futures:
+                future.cancel()
+            raise
+        finally:
+            progress.finish()
+
+
+def _collect_documents(root):
+    if not os.path.isdir(root):
+        raise SystemExit(f"目录不存在: {root}")
+    return list(batch_ops.iter_documents(os.path.abspath(root)))
+
+
+def command_stats(args):
+    documents = _collect_documents(args.root)
+    totals = {}
+    for stats in run_parallel("统计", batch_ops.type_stats, documents, args.workers):
+        for ext, (count, size) in stats.items():
+            old_count, old_size = totals.get(ext, (0, 0))
+            totals[ext] = (old_count + count, old_size + size)
+
+    print(f"{'类型':<8}{'文件数':>10}{'大小(MB)':>12}")
+    for doc_type in DocumentType:
+        count, size = totals.get(doc_type.value, (0, 0))
+        print(f"{doc_type.value:<8}{count:>10}{size / 1024 / 1024:>12.1f}")
+    count = sum(count for count, _ in totals.values())
+    size = sum(size for _, size in totals.values())
+    print(f"{'合计':<8}{count:>10}{size / 1024 / 1024:>12.1f}")
+    return 0
+
+
+def command_check(args):
+    documents = _collect_documents(args.root)
+    problems = []
+    for batch in run_parallel("检查", batch_ops.check_documents, documents, args.workers):
+        problems.extend(batch)
+
+    for path, problem in sorted(problems):
+        print(f"{path}: {problem}")
+    print(f"检查了 {len(documents)} 个文档，发现 {len(problems)} 个问题")
+    return 1 if problems else 0
+
+
+def command_export(args):
+    if not os.path.isdir(args.root):
+        raise SystemExit(f"目录不存在: {args.root}")
+    stages = {}
+
+    def on_progress(stage, done, total):
+        if stage not in stages:
+            for previous in stages.values():
+                previous.finish()
+            stages[stage] = Progress(stage, total)
+        stages[stage].advance(done - stages[stage].done)
+
+    builder = SiteBuilder(args.root, args.out_dir, max_workers=args.workers)
+    result = builder.build(full=args.full, progress=on_progress)
+    for progress in stages.values():
+        progress.finish()
+
+    for rel, error in sorted(result.failed):
+        print(f"{rel}: {error}")
+    print(f"渲染 {len(result.rendered)} 个页面，沿用 {result.reused} 个，删除 {len(result.removed)} 个，"
+          f"失败 {len(result.failed)} 个，用时 {result.elapsed:.1f}s，输出在 {builder.out_dir}")
+    return 1 if result.failed else 0
+
+
+def command_import(args):
+    if not os.path.isdir(args.dest_dir):
+        raise SystemExit(f"目录不存在: {args.dest_dir}")
+    dedup = DedupStore(args.dedup_root, hash_db_path(args.dedup_root)) if args.dedup_root else None
+    progress = Progress("导入", 0)
+
+    def on_progress(state):
+        progress.total = state.files_total
+        progress.advance(state.files_done - progress.done)
+
+    try:
+        result = BulkImporter(args.dest_dir, max_workers=args.workers, dedup=dedup,
+                              dedup_mode=args.dedup_mode).run(args.sources, progress=on_progress)
+    except KeyboardInterrupt:
+        progress.finish()
+        return 130
+    finally:
+        if dedup is not None:
+            dedup.close()
+    progress.finish()
+
+    for src, error in result.failed:
+        print(f"{src}: {error}")
+    print(f"导入 {len(result.imported)} 个文件 ({result.bytes_copied / 1024 / 1024:.1f} MB)，"
+          f"跳过重复 {len(result.skipped)} 个，硬链接 {result.linked} 个，失败 {len(result.failed)} 个，"
+          f"用时 {result.elapsed:.1f}s")
+    return 1 if result.failed else 0
+
+
+def build_parser():
+    parser = argparse.ArgumentParser(description="个人文档管理系统命令行工具")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="并行的进程(导入时为线程)数，默认等于 CPU 核数")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    stats = commands.add_parser('stats', help="按类型统计文档数量和大小")
+    stats.add_argument('root')
+    stats.set_defaults(func=command_stats)
+
+    check = commands.add_parser('check', help="检查文档能否完整读取")
+    check.add_argument('root')
+    check.set_defaults(func=command_check)
+
+    export = commands.add_parser('export', help="把 Markdown 和 HTML 文档导出为静态站点，只重新渲染有变化的页面")
+    export.add_argument('root')
+    export.add_argument('out_dir')
+    export.add_argument('--full', action='store_true', help="忽略构建清单，全部重新渲染")
+    export.set_defaults(func=command_export)
+
+    imports = commands.add_parser('import', help="批量导入文件或目录")
+    imports.add_argument('dest_dir')
+    imports.add_argument('sources', nargs='+')
+    imports.add_argument('--dedup-root', help="跳过该根目录中已有的相同内容")
+    imports.add_argument('--dedup-mode', choices=(DEDUP_SKIP, DEDUP_LINK), default=DEDUP_SKIP)
+    imports.set_defaults(func=command_import)
+    return parser
+
+
+def main(argv=None):
+    args = build_parser().parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
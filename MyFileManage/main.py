@@ -1,20 +1,64 @@
+import time
+
+# 尽量早地记录启动时间，包含导入 Qt 和界面模块的耗时
+_START = time.perf_counter()
+
 import sys
 from PyQt5.QtWidgets import QApplication
+from PyQt5.QtCore import Qt, QObject, QEvent
 from views.main_window import MainWindow
 
+# 加上此参数时输出启动各阶段耗时并在首次绘制后退出，便于重复测量
+MEASURE_STARTUP_FLAG = "--measure-startup"
+
+
+class FirstPaintTimer(QObject):
+    """记录主窗口第一次绘制的时间"""
+
+    def __init__(self, timings, parent=None):
+        super().__init__(parent)
+        self.timings = timings
+
+    def eventFilter(self, obj, event):
+        if event.type() == QEvent.Paint:
+            obj.removeEventFilter(self)
+            self.timings.append(("首次绘制", time.perf_counter()))
+            report_startup(self.timings)
+            QApplication.instance().quit()
+        return False
+
+
+def report_startup(timings):
+    previous = _START
+    parts = []
+    for name, moment in timings:
+        parts.append(f"{name} {(moment - previous) * 1000:.0f} ms")
+        previous = moment
+    print(f"启动耗时: {', '.join(parts)}, 合计 {(previous - _START) * 1000:.0f} ms")
+
 
 def main():
+    measure = MEASURE_STARTUP_FLAG in sys.argv
+    timings = [("导入模块", time.perf_counter())]
+
+    # 编辑器按需创建，QtWebEngine 会在 QApplication 之后才导入，需要先设置此属性
+    QApplication.setAttribute(Qt.AA_ShareOpenGLContexts)
     app = QApplication(sys.argv)
 
     # 设置应用程序样式
     app.setStyle('Fusion')
+    timings.append(("创建应用", time.perf_counter()))
 
     # 创建并显示主窗口
     window = MainWindow()
+    timings.append(("创建主窗口", time.perf_counter()))
+    if measure:
+        paint_timer = FirstPaintTimer(timings, window)
+        window.installEventFilter(paint_timer)
     window.show()
 
     sys.exit(app.exec_())
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -0,0 +1,314 @@
+import json
+import os
+import re
+import sqlite3
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+
+from search.extract import MAX_INDEX_BYTES, extract_text
+from .document import Document, DocumentType
+
+_EXTENSION_TYPES = {doc_type.value: doc_type for doc_type in DocumentType}
+
+# 同步时的提交间隔(秒)，让界面线程尽早看到结果，也不会长时间占用写锁
+SYNC_COMMIT_INTERVAL = 0.2
+# 每个文档最多记录的标题数
+MAX_HEADINGS = 64
+
+# 可排序的字段
+SORT_FIELDS = {
+    'name': 'name COLLATE NOCASE',
+    'mtime': 'mtime_ns',
+    'size': 'size',
+    'words': 'words',
+    'opened': 'last_opened',
+}
+
+_WORD_RE = re.compile(r"[0-9A-Za-z_]+|[぀-ヿ㐀-䶿一-鿿가-힯]")
+_MD_HEADING_RE = re.compile(r"^#{1,6}[ \t]+(.+?)[ \t#]*$", re.MULTILINE)
+_HTML_HEADING_RE = re.compile(r"<h[1-6][^>]*>(.*?)</h[1-6]>", re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r"<[^>]+>")
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS directories (
+    path TEXT PRIMARY KEY,
+    parent TEXT,
+    name TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL
+);
+CREATE INDEX IF NOT EXISTS directories_parent ON directories(parent);
+CREATE TABLE IF NOT EXISTS documents (
+    path TEXT PRIMARY KEY,
+    parent TEXT NOT NULL,
+    name TEXT NOT NULL,
+    title TEXT NOT NULL,
+    type TEXT NOT NULL,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    words INTEGER NOT NULL DEFAULT 0,
+    headings TEXT NOT NULL DEFAULT '[]',
+    last_opened REAL
+);
+CREATE INDEX IF NOT EXISTS documents_parent ON documents(parent);
+CREATE INDEX IF NOT EXISTS documents_opened ON documents(last_opened);
+"""
+
+_DOCUMENT_COLUMNS = "path, parent, name, title, type, size, mtime_ns, words, headings, last_opened"
+
+
+@dataclass
+class DocumentRecord:
+    """目录数据库中的一条文档记录"""
+    path: str
+    parent: str
+    name: str
+    title: str
+    doc_type: DocumentType
+    size: int
+    mtime_ns: int
+    words: int = 0
+    headings: List[str] = field(default_factory=list)
+    last_opened: Optional[float] = None
+
+    def to_document(self) -> Document:
+        return Document(path=self.parent, title=self.title, doc_type=self.doc_type)
+
+    @classmethod
+    def from_row(cls, row) -> 'DocumentRecord':
+        path, parent, name, title, doc_type, size, mtime_ns, words, headings, last_opened = row
+        return cls(path=path, parent=parent, name=name, title=title, doc_type=DocumentType(doc_type),
+                   size=size, mtime_ns=mtime_ns, words=words, headings=json.loads(headings),
+                   last_opened=last_opened)
+
+
+def classify(name: str) -> Optional[Tuple[str, DocumentType]]:
+    """返回 (标题, 类型)，不是受支持的文档时返回 None"""
+    title, dot, ext = name.rpartition('.')
+    doc_type = _EXTENSION_TYPES.get(ext.lower())
+    if dot and doc_type is not None and title.strip('.'):
+        return title, doc_type
+    return None
+
+
+def read_metadata(path: str, doc_type: DocumentType) -> Tuple[int, List[str]]:
+    """读取文档的字数和标题列表"""
+    headings = []
+    if doc_type in (DocumentType.MARKDOWN, DocumentType.HTML):
+        with open(path, 'rb') as f:
+            raw = f.read(MAX_INDEX_BYTES).decode('utf-8', errors='ignore')
+        if doc_type == DocumentType.MARKDOWN:
+            headings = _MD_HEADING_RE.findall(raw)
+            text = raw
+        else:
+            headings = [' '.join(_TAG_RE.sub(' ', h).split()) for h in _HTML_HEADING_RE.findall(raw)]
+            text = _TAG_RE.sub(' ', raw)
+    else:
+        text = extract_text(path, doc_type)
+    # 英文按单词计数，中日韩文字按字计数
+    words = sum(1 for _ in _WORD_RE.finditer(text))
+    return words, headings[:MAX_HEADINGS]
+
+
+class Catalog:
+    """文档元数据目录，保存在每个根目录专属的 SQLite 数据库中
+
+    目录树、排序、筛选和最近文档都从这里查询，不再逐个访问磁盘。
+    sync 按文件的大小和 mtime 增量更新，只有变化的文档才会重新读取内容。
+    每个线程使用自己的 Catalog 实例；WAL 模式下读写可以并发。
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    # ---- 查询 ----
+
+    def is_synced(self, dir_path: str) -> bool:
+        row = self.conn.execute(
+            "SELECT mtime_ns FROM directories WHERE path = ?", (dir_path,)).fetchone()
+        return row is not None and row[0] != 0
+
+    def list_directory(self, dir_path: str) -> Optional[List[Tuple[str, bool]]]:
+        """返回 [(名称, 是否目录)]，目录在前；目录尚未同步时返回 None"""
+        if not self.is_synced(dir_path):
+            return None
+        items = [(name, True) for (name,) in self.conn.execute(
+            "SELECT name FROM directories WHERE parent = ?", (dir_path,))]
+        items.extend((name, False) for (name,) in self.conn.execute(
+            "SELECT name FROM documents WHERE parent = ?", (dir_path,)))
+        items.sort(key=lambda item: (not item[1], item[0].lower(), item[0]))
+        return items
+
+    def document(self, path: str) -> Optional[DocumentRecord]:
+        row = self.conn.execute(
+            f"SELECT {_DOCUMENT_COLUMNS} FROM documents WHERE path = ?", (path,)).fetchone()
+        return DocumentRecord.from_row(row) if row else None
+
+    def documents(self, parent: Optional[str] = None, doc_type: Optional[DocumentType] = None,
+                  name_filter: str = '', sort_by: str = 'name', descending: bool = False,
+                  limit: Optional[int] = None) -> List[DocumentRecord]:
+        """按条件筛选并排序文档；parent 为 None 时查询整个根目录"""
+        conditions, params = [], []
+        if parent is not None:
+            conditions.append("parent = ?")
+            params.append(parent)
+        if doc_type is not None:
+            conditions.append("type = ?")
+            params.append(doc_type.value)
+        if name_filter:
+            conditions.append("name LIKE ? ESCAPE '\\'")
+            escaped = name_filter.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            params.append(f"%{escaped}%")
+        sql = f"SELECT {_DOCUMENT_COLUMNS} FROM documents"
+        if conditions:
+            sql += " WHERE " + " AND ".join(conditions)
+        sql += f" ORDER BY {SORT_FIELDS[sort_by]} {'DESC' if descending else 'ASC'}"
+        if limit is not None:
+            sql += " LIMIT ?"
+            params.append(limit)
+        return [DocumentRecord.from_row(row) for row in self.conn.execute(sql, params)]
+
+    def recent_documents(self, limit: int = 20) -> List[DocumentRecord]:
+        return [DocumentRecord.from_row(row) for row in self.conn.execute(
+            f"SELECT {_DOCUMENT_COLUMNS} FROM documents WHERE last_opened IS NOT NULL "
+            "ORDER BY last_opened DESC LIMIT ?", (limit,))]
+
+    def mark_opened(self, path: str):
+        self.conn.execute("UPDATE documents SET last_opened = ? WHERE path = ?", (time.time(), path))
+        self.conn.commit()
+
+    # ---- 同步 ----
+
+    def _upsert_document(self, path: str, parent: str, name: str, st: os.stat_result,
+                         kind: Tuple[str, DocumentType]):
+        title, doc_type = kind
+        try:
+            words, headings = read_metadata(path, doc_type)
+        except Exception as e:
+            # 个别文档解析失败(损坏的 docx、RTF 等)时只记录文件信息，不中断同步
+            print(f"Error reading document metadata: {e}")
+            words, headings = 0, []
+        # 保留打开记录
+        self.conn.execute(
+            f"INSERT INTO documents({_DOCUMENT_COLUMNS}) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, NULL) "
+            "ON CONFLICT(path) DO UPDATE SET size = excluded.size, mtime_ns = excluded.mtime_ns, "
+            "type = excluded.type, title = excluded.title, words = excluded.words, "
+            "headings = excluded.headings",
+            (path, parent, name, title, doc_type.value, st.st_size, st.st_mtime_ns,
+             words, json.dumps(headings, ensure_ascii=False)))
+
+    def _remove_directory_tree(self, dir_path: str):
+        # 用范围比较而不是 LIKE：LIKE 不区分 ASCII 大小写，会误删大小写不同的同名目录
+        prefix = dir_path.rstrip(os.sep) + os.sep
+        upper = prefix[:-1] + chr(ord(os.sep) + 1)
+        for table in ('directories', 'documents'):
+            self.conn.execute(
+                f"DELETE FROM {table} WHERE path = ? OR (path >= ? AND path < ?)", (dir_path, prefix, upper))
+
+    def sync_directory(self, dir_path: str) -> Tuple[List[str], int]:
+        """同步一个目录的直接子项，返回 (子目录路径, 变化数)；不进入指向目录的符号链接，避免循环"""
+        try:
+            dir_mtime = os.stat(dir_path).st_mtime_ns
+            entries = list(os.scandir(dir_path))
+        except OSError:
+            self._remove_directory_tree(dir_path)
+            return [], 1
+
+        self.conn.execute(
+            "INSERT OR REPLACE INTO directories(path, parent, name, mtime_ns) VALUES (?, ?, ?, ?)",
+            (dir_path, os.path.dirname(dir_path), os.path.basename(dir_path), dir_mtime))
+
+        known_docs: Dict[str, Tuple[int, int]] = {
+            name: (size, mtime_ns) for name, size, mtime_ns in self.conn.execute(
+                "SELECT name, size, mtime_ns FROM documents WHERE parent = ?", (dir_path,))}
+        known_dirs = {name for (name,) in self.conn.execute(
+            "SELECT name FROM directories WHERE parent = ?", (dir_path,))}
+
+        subdirectories, seen_docs, seen_dirs = [], set(), set()
+        changes = 0
+        for entry in entries:
+            if entry.name.startswith('.'):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    seen_dirs.add(entry.name)
+                    subdirectories.append(entry.path)
+                    continue
+                kind = classify(entry.name)
+                if kind is None:
+                    continue
+                st = entry.stat()
+            except OSError:
+                continue
+            seen_docs.add(entry.name)
+            if known_docs.get(entry.name) != (st.st_size, st.st_mtime_ns):
+                self._upsert_document(entry.path, dir_path, entry.name, st, kind)
+                changes += 1
+
+        for name in known_docs.keys() - seen_docs:
+            self.conn.execute("DELETE FROM documents WHERE path = ?", (os.path.join(dir_path, name),))
+            changes += 1
+        for name in known_dirs - seen_dirs:
+            self._remove_directory_tree(os.path.join(dir_path, name))
+            changes += 1
+        # 新出现的子目录先占位(mtime 为 0 表示尚未同步)，列表中立即可见
+        self.conn.executemany(
+            "INSERT OR IGNORE INTO directories(path, parent, name, mtime_ns) VALUES (?, ?, ?, 0)",
+            [(os.path.join(dir_path, name), dir_path, name) for name in seen_dirs - known_dirs])
+        changes += len(seen_dirs - known_dirs)
+        return subdirectories, changes
+
+    def sync(self, root_path: str,
+             progress: Optional[Callable[[int], None]] = None,
+             is_cancelled: Optional[Callable[[], bool]] = None) -> int:
+        """增量同步整个根目录，返回变化的条目数"""
+        root_path = os.path.abspath(root_path)
+        total_changes = 0
+        pending = 0
+        scanned = 0
+        last_commit = time.monotonic()
+        stack = [root_path]
+        while stack:
+            if is_cancelled and is_cancelled():
+                break
+            dir_path = stack.pop()
+            subdirectories, changes = self.sync_directory(dir_path)
+            stack.extend(subdirectories)
+            total_changes += changes
+            pending += changes
+            scanned += 1
+            if pending and time.monotonic() - last_commit >= SYNC_COMMIT_INTERVAL:
+                self.conn.commit()
+                pending = 0
+                last_commit = time.monotonic()
+            if progress:
+                progress(scanned)
+        self.conn.commit()
+        return total_changes
+
+    def sync_paths(self, paths: Iterable[str]) -> int:
+        """同步发生变化的路径：只重新扫描它们所在的目录以及新出现的子目录，返回变化的条目数"""
+        directories = set()
+        for path in paths:
+            directories.add(os.path.dirname(path))
+            if os.path.isdir(path):
+                directories.add(path)
+        # 只处理已在目录数据库中的部分，其余的由 sync 负责
+        stack = [path for path in directories
+                 if self.is_synced(path) or self.is_synced(os.path.dirname(path))]
+        total_changes = 0
+        while stack:
+            subdirectories, changes = self.sync_directory(stack.pop())
+            total_changes += changes
+            # 新出现的目录需要递归同步
+            stack.extend(path for path in subdirectories if not self.is_synced(path))
+        self.conn.commit()
+        return total_changes
+
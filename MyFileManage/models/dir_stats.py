@@ -0,0 +1,197 @@
+import os
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
+
+from .document import DocumentType
+
+_EXTENSION_TYPES = {doc_type.value: doc_type for doc_type in DocumentType}
+
+
+@dataclass
+class DirStats:
+    size: int = 0  # 所有文件的字节数
+    files: int = 0  # 所有文件数，包括不是文档的文件
+    counts: Dict[DocumentType, int] = field(default_factory=dict)  # 各类型的文档数
+    newest_ns: int = 0  # 最近的文件修改时间
+
+    @property
+    def documents(self) -> int:
+        return sum(self.counts.values())
+
+    def add(self, other: 'DirStats', sign: int = 1):
+        """累加(sign 为 -1 时扣除)大小和数量；最近修改时间不能扣除，由调用方重新计算"""
+        self.size += sign * other.size
+        self.files += sign * other.files
+        for doc_type, count in other.counts.items():
+            count = self.counts.get(doc_type, 0) + sign * count
+            if count:
+                self.counts[doc_type] = count
+            else:
+                self.counts.pop(doc_type, None)
+
+    def copy(self) -> 'DirStats':
+        return DirStats(self.size, self.files, dict(self.counts), self.newest_ns)
+
+
+def scan_own(path: str) -> Tuple[DirStats, List[str]]:
+    """统计目录中直接包含的文件，返回(统计, 子目录名)；跳过隐藏条目，不跟随符号链接"""
+    own = DirStats()
+    subdirectories = []
+    with os.scandir(path) as entries:
+        for entry in entries:
+            if entry.name.startswith('.'):
+                continue
+            try:
+                if entry.is_dir(follow_symlinks=False):
+                    subdirectories.append(entry.name)
+                    continue
+                if not entry.is_file(follow_symlinks=False):
+                    continue
+                st = entry.stat(follow_symlinks=False)
+            except OSError:
+                continue
+            own.size += st.st_size
+            own.files += 1
+            own.newest_ns = max(own.newest_ns, st.st_mtime_ns)
+            doc_type = _EXTENSION_TYPES.get(os.path.splitext(entry.name)[1][1:].lower())
+            if doc_type is not None:
+                own.counts[doc_type] = own.counts.get(doc_type, 0) + 1
+    return own, subdirectories
+
+
+class _StatsNode:
+    __slots__ = ('own', 'total', 'children', 'parent')
+
+    def __init__(self, parent=None):
+        self.own = DirStats()
+        self.total = DirStats()
+        self.children: Dict[str, '_StatsNode'] = {}
+        self.parent = parent
+
+    def recompute_newest(self):
+        self.total.newest_ns = max([self.own.newest_ns]
+                                   + [child.total.newest_ns for child in self.children.values()])
+
+
+class DirectoryStatsTree:
+    """根目录下每个目录的汇总统计：字节数、文件数、各类型文档数和最近修改时间
+
+    每个目录保存自身直接包含的文件的统计和包括子目录在内的汇总。建立时完整遍历一次；
+    之后某个文件变化时只重新统计它所在的目录(一次 scandir)，把差值加到这个目录和它的祖先上，
+    不会重新遍历整棵树。在后台线程中建立，之后只在界面线程中更新。
+    """
+
+    def __init__(self, root_path: str):
+        self.root_path = os.path.abspath(root_path)
+        self.root = _StatsNode()
+
+    @classmethod
+    def build(cls, root_path: str, is_cancelled: Optional[Callable[[], bool]] = None
+              ) -> Optional['DirectoryStatsTree']:
+        tree = cls(root_path)
+        if not tree._fill(tree.root, tree.root_path, is_cancelled):
+            return None
+        return tree
+
+    @staticmethod
+    def _fill(node: _StatsNode, path: str, is_cancelled: Optional[Callable[[], bool]] = None) -> bool:
+        """统计 node 对应的整个子树，取消时返回 False"""
+        # 先序遍历建立节点，再按逆序从叶子往上汇总
+        order = []
+        pending = [(node, path)]
+        while pending:
+            current, current_path = pending.pop()
+            if is_cancelled and is_cancelled():
+                return False
+            try:
+                current.own, subdirectories = scan_own(current_path)
+            except OSError:
+                subdirectories = []
+            for name in subdirectories:
+                child = _StatsNode(current)
+                current.children[name] = child
+                pending.append((child, os.path.join(current_path, name)))
+            order.append(current)
+        for current in reversed(order):
+            current.total = current.own.copy()
+            for child in current.children.values():
+                current.total.add(child.total)
+            current.recompute_newest()
+        return True
+
+    def _relative_parts(self, path: str) -> Optional[List[str]]:
+        relative = os.path.relpath(os.path.abspath(path), self.root_path)
+        if relative == '.':
+            return []
+        if relative.startswith('..'):
+            return None
+        return relative.split(os.sep)
+
+    def _node(self, parts: List[str]) -> Optional[_StatsNode]:
+        node = self.root
+        for part in parts:
+            node = node.children.get(part)
+            if node is None:
+                return None
+        return node
+
+    def stats(self, path: str) -> Optional[DirStats]:
+        """目录的汇总统计，目录不在树中时返回 None"""
+        parts = self._relative_parts(path)
+        node = self._node(parts) if parts is not None else None
+        return node.total if node is not None else None
+
+    # ---- 增量更新 ----
+
+    def _refresh(self, node: _StatsNode, path: str, changed: Set[str]):
+        """重新统计一个目录直接包含的文件和子目录列表，把差值沿祖先向上累加"""
+        delta = DirStats()
+        try:
+            own, subdirectories = scan_own(path)
+        except OSError:
+            # 目录已不存在，整个子树从父目录中扣除
+            if node.parent is None:
+                return
+            for name, child in list(node.parent.children.items()):
+                if child is node:
+                    del node.parent.children[name]
+            delta.add(node.total, -1)
+            node = node.parent
+            path = os.path.dirname(path)
+        else:
+            delta.add(own)
+            delta.add(node.own, -1)
+            node.own = own
+            wanted = set(subdirectories)
+            for name in [name for name in node.children if name not in wanted]:
+                delta.add(node.children.pop(name).total, -1)
+            for name in subdirectories:
+                if name not in node.children:
+                    child = _StatsNode(node)
+                    self._fill(child, os.path.join(path, name))
+                    node.children[name] = child
+                    delta.add(child.total)
+
+        while node is not None:
+            node.total.add(delta)
+            node.recompute_newest()
+            changed.add(path)
+            node = node.parent
+            path = os.path.dirname(path)
+
+    def update_paths(self, paths: Iterable[str]) -> Set[str]:
+        """按文件系统的当前状态同步一批变化的文件或目录，返回汇总发生变化的目录"""
+        changed = set()
+        directories = {os.path.dirname(os.path.abspath(path)) for path in paths}
+        # 先处理深的目录，祖先目录的重新统计能看到子目录的结果
+        for directory in sorted(directories, key=lambda path: path.count(os.sep), reverse=True):
+            parts = self._relative_parts(directory)
+            if parts is None or any(part.startswith('.') for part in parts):
+                continue
+            # 目录本身还不在树中(例如新建的目录)时统计最近的已知祖先，新目录作为子目录被加入
+            node = self._node(parts)
+            while node is None:
+                parts = parts[:-1]
+                node = self._node(parts)
+            self._refresh(node, os.path.join(self.root_path, *parts), changed)
+        return changed
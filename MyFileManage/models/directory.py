@@ -1,72 +1,172 @@
 import os
-from dataclasses import dataclass
-from typing import List, Optional
+import threading
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import List, Optional, Tuple
+
+from utils import tracing
+from utils.trash import Trash, TrashEntry
 from .document import Document, DocumentType
 
+# 最多缓存的目录扫描结果数
+SCAN_CACHE_SIZE = 256
+
+_EXTENSION_TYPES = {doc_type.value: doc_type for doc_type in DocumentType}
+
+
+@dataclass
+class DirectoryListing:
+    subdirectories: List[str]
+    documents: List[Tuple[str, str, DocumentType]]  # (文件名, 标题, 类型)
+
+
+class ScanCache:
+    """目录扫描结果的 LRU 缓存，目录 mtime 变化后自动失效"""
+
+    def __init__(self, max_entries: int = SCAN_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # 路径 -> (mtime_ns, DirectoryListing)
+        self._lock = threading.Lock()
+
+    def get(self, path: str, mtime_ns: int) -> Optional[DirectoryListing]:
+        with self._lock:
+            entry = self._entries.get(path)
+            if entry is None or entry[0] != mtime_ns:
+                return None
+            self._entries.move_to_end(path)
+            return entry[1]
+
+    def put(self, path: str, mtime_ns: int, listing: DirectoryListing):
+        with self._lock:
+            self._entries[path] = (mtime_ns, listing)
+            self._entries.move_to_end(path)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, path: Optional[str] = None):
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(path, None)
+
+
+scan_cache = ScanCache()
+
+
+def scan_entries(path: str) -> DirectoryListing:
+    """列出目录下的子目录和受支持的文档
+
+    使用 os.scandir 自带的类型信息，不再对每一项单独 stat。
+    """
+    # 先取 mtime 再列目录，期间发生的修改会让下次查询重新扫描
+    mtime_ns = os.stat(path).st_mtime_ns
+    listing = scan_cache.get(path, mtime_ns)
+    if listing is not None:
+        return listing
+
+    listing = DirectoryListing(subdirectories=[], documents=[])
+    with tracing.span('scan_directory', 'scan', path=path), os.scandir(path) as it:
+        for entry in it:
+            if entry.is_dir():
+                listing.subdirectories.append(entry.name)
+                continue
+            title, dot, ext = entry.name.rpartition('.')
+            doc_type = _EXTENSION_TYPES.get(ext.lower())
+            if dot and doc_type is not None and title.strip('.'):
+                listing.documents.append((entry.name, title, doc_type))
+    scan_cache.put(path, mtime_ns, listing)
+    return listing
+
 
 @dataclass
 class Directory:
     path: str
     name: str
-    parent: Optional['Directory'] = None
-    subdirectories: List['Directory'] = None
-    documents: List[Document] = None
+    parent: Optional['Directory'] = field(default=None, repr=False, compare=False)
+    # 子项在首次访问时才扫描
+    _subdirectories: Optional[List['Directory']] = field(default=None, init=False, repr=False, compare=False)
+    _documents: Optional[List[Document]] = field(default=None, init=False, repr=False, compare=False)
+    _full_path: Optional[str] = field(default=None, init=False, repr=False, compare=False)
+
+    @property
+    def subdirectories(self) -> List['Directory']:
+        if self._subdirectories is None:
+            self.scan()
+        return self._subdirectories
 
-    def __post_init__(self):
-        if self.subdirectories is None:
-            self.subdirectories = []
-        if self.documents is None:
-            self.documents = []
+    @property
+    def documents(self) -> List[Document]:
+        if self._documents is None:
+            self.scan()
+        return self._documents
+
+    @property
+    def is_loaded(self) -> bool:
+        return self._subdirectories is not None
 
     @property
     def full_path(self) -> str:
-        if self.parent:
-            return os.path.join(self.parent.full_path, self.name)
-        return self.path
+        if self._full_path is None:
+            if self.parent:
+                self._full_path = os.path.join(self.parent.full_path, self.name)
+            else:
+                self._full_path = self.path
+        return self._full_path
+
+    def _invalidate_paths(self):
+        """名称变化后更新缓存的路径，已加载的子项一并更新"""
+        self._full_path = None
+        full_path = self.full_path
+        for sub in self._subdirectories or []:
+            sub.path = full_path
+            sub._invalidate_paths()
+        for doc in self._documents or []:
+            doc.path = full_path
 
     def create_subdirectory(self, name: str) -> 'Directory':
+        subdirectories = self.subdirectories
         new_dir = Directory(path=self.full_path, name=name, parent=self)
         os.makedirs(os.path.join(self.full_path, name), exist_ok=True)
-        self.subdirectories.append(new_dir)
+        subdirectories.append(new_dir)
         return new_dir
 
     def create_document(self, name: str, doc_type: DocumentType) -> Document:
+        documents = self.documents
         doc = Document.create_new(self.full_path, name, doc_type)
-        self.documents.append(doc)
+        documents.append(doc)
         return doc
 
-    def delete(self):
-        if os.path.exists(self.full_path):
-            for root, dirs, files in os.walk(self.full_path, topdown=False):
-                for name in files:
-                    os.remove(os.path.join(root, name))
-                for name in dirs:
-                    os.rmdir(os.path.join(root, name))
-            os.rmdir(self.full_path)
+    def delete(self) -> TrashEntry:
+        """改名到根目录的回收区，可以还原；其中的文件由回收区在后台逐个删除"""
+        root = self
+        while root.parent is not None:
+            root = root.parent
+        if root is self:
+            raise ValueError("不能删除根目录")
+        entry = Trash(root.full_path).move_to_trash(self.full_path)
 
-        if self.parent:
+        if self.parent and self.parent.is_loaded:
             self.parent.subdirectories.remove(self)
+        return entry
 
     def rename(self, new_name: str):
         old_path = self.full_path
+        old_name = self.name
         self.name = new_name
-        new_path = self.full_path
-        os.rename(old_path, new_path)
+        self._invalidate_paths()
+        try:
+            os.rename(old_path, self.full_path)
+        except OSError:
+            self.name = old_name
+            self._invalidate_paths()
+            raise
 
     def scan(self):
         """扫描目录下的文件和子目录"""
-        self.subdirectories = []
-        self.documents = []
-
-        for item in os.listdir(self.full_path):
-            item_path = os.path.join(self.full_path, item)
-            if os.path.isdir(item_path):
-                self.subdirectories.append(Directory(path=self.full_path, name=item, parent=self))
-            else:
-                name, ext = os.path.splitext(item)
-                ext = ext[1:] if ext else ''
-                try:
-                    doc_type = DocumentType(ext.lower())
-                    self.documents.append(Document(path=self.full_path, title=name, doc_type=doc_type))
-                except ValueError:
-                    continue
\ No newline at end of file
+        full_path = self.full_path
+        listing = scan_entries(full_path)
+        self._subdirectories = [Directory(path=full_path, name=name, parent=self)
+                                for name in listing.subdirectories]
+        self._documents = [Document(path=full_path, title=title, doc_type=doc_type)
+                           for _, title, doc_type in listing.documents]
@@ -3,6 +3,8 @@ from dataclasses import dataclass
 from enum import Enum
 from typing import Optional
 
+from utils.atomic_writer import atomic_write
+
 
 class DocumentType(Enum):
     TEXT = "txt"
@@ -35,8 +37,7 @@ class Document:
 
     def save_content(self, content: str):
         self.content = content
-        with open(self.full_path, 'w', encoding='utf-8') as f:
-            f.write(content)
+        atomic_write(self.full_path, content)
 
     def delete(self):
         if os.path.exists(self.full_path):
@@ -45,5 +46,13 @@ class Document:
     @classmethod
     def create_new(cls, path: str, title: str, doc_type: DocumentType):
         doc = cls(path=path, title=title, doc_type=doc_type)
-        doc.save_content("")
+        if doc_type == DocumentType.DOC:
+            # docx 是 zip 包，空文件无法打开
+            from utils.docx_io import write_docx
+            atomic_write(doc.full_path, write_docx([]))
+        elif doc_type == DocumentType.RICH_TEXT:
+            from utils.rtf_io import write_rtf
+            doc.save_content(write_rtf([]))
+        else:
+            doc.save_content("")
         return doc
\ No newline at end of file
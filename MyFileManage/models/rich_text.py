@@ -0,0 +1,60 @@
+from dataclasses import dataclass, field
+from typing import List, Optional
+
+# 段落对齐方式
+ALIGN_LEFT = 'left'
+ALIGN_CENTER = 'center'
+ALIGN_RIGHT = 'right'
+ALIGN_JUSTIFY = 'justify'
+
+# 列表样式
+LIST_BULLET = 'bullet'
+LIST_NUMBER = 'number'
+
+# 标题的显示字号(磅)
+HEADING_POINT_SIZES = {1: 20, 2: 16, 3: 14, 4: 13, 5: 12, 6: 12}
+
+# 段内换行(不是新段落)
+LINE_BREAK = '\u2028'
+
+
+@dataclass
+class TextRun:
+    """一段格式相同的文字"""
+    text: str
+    bold: bool = False
+    italic: bool = False
+    underline: bool = False
+    strike: bool = False
+    font_family: Optional[str] = None
+    font_size: Optional[float] = None  # 磅
+    color: Optional[str] = None  # '#rrggbb'
+
+    def same_format(self, other: 'TextRun') -> bool:
+        return (self.bold, self.italic, self.underline, self.strike,
+                self.font_family, self.font_size, self.color) == \
+               (other.bold, other.italic, other.underline, other.strike,
+                other.font_family, other.font_size, other.color)
+
+
+@dataclass
+class Paragraph:
+    """一个段落，docx 和 rtf 的读写都使用这一结构，再映射到 QTextDocument"""
+    runs: List[TextRun] = field(default_factory=list)
+    alignment: str = ALIGN_LEFT
+    heading_level: int = 0  # 0 表示正文
+    list_style: Optional[str] = None
+    list_level: int = 0
+
+    @property
+    def text(self) -> str:
+        return ''.join(run.text for run in self.runs)
+
+    def append(self, run: TextRun):
+        """追加文字，与上一段格式相同时合并"""
+        if not run.text:
+            return
+        if self.runs and self.runs[-1].same_format(run):
+            self.runs[-1].text += run.text
+        else:
+            self.runs.append(run)
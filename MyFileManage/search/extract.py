@@ -0,0 +1,36 @@
+import re
+import zipfile
+
+from models.document import DocumentType
+from utils.rtf_io import iter_rtf_paragraphs
+
+# 单个文件最多读取的字节数，超大文件只索引开头部分
+MAX_INDEX_BYTES = 4 * 1024 * 1024
+
+_TAG_RE = re.compile(r"<[^>]+>")
+
+
+def _read_text(file_path: str) -> str:
+    with open(file_path, 'rb') as f:
+        data = f.read(MAX_INDEX_BYTES)
+    return data.decode('utf-8', errors='ignore')
+
+
+def extract_text(file_path: str, doc_type: DocumentType) -> str:
+    """提取文档中可被检索的纯文本"""
+    if doc_type == DocumentType.DOC:
+        with zipfile.ZipFile(file_path) as zf:
+            with zf.open('word/document.xml') as f:
+                xml = f.read(MAX_INDEX_BYTES).decode('utf-8', errors='ignore')
+        return _TAG_RE.sub(' ', xml)
+
+    if doc_type == DocumentType.RICH_TEXT:
+        # 字体表等目标组不算正文，\'hh 和 \uN 按代码页解码
+        with open(file_path, 'rb') as f:
+            data = f.read(MAX_INDEX_BYTES).decode('latin-1')
+        return '\n'.join(paragraph.text for paragraph, _ in iter_rtf_paragraphs(data))
+
+    text = _read_text(file_path)
+    if doc_type == DocumentType.HTML:
+        return _TAG_RE.sub(' ', text)
+    return text
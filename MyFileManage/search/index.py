@@ -0,0 +1,257 @@
+import heapq
+import math
+import os
+import sqlite3
+import zipfile
+from collections import Counter
+from dataclasses import dataclass
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+
+from utils.file_utils import get_document_type
+from .extract import extract_text
+from .tokenizer import tokenize
+
+# BM25 参数
+K1 = 1.2
+B = 0.75
+# 标题命中的额外权重
+TITLE_BOOST = 3.0
+# 每处理多少个文件提交一次事务
+COMMIT_EVERY = 500
+# 末尾词按前缀匹配时最多展开的词项数
+PREFIX_EXPANSION = 64
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS docs (
+    id INTEGER PRIMARY KEY,
+    path TEXT UNIQUE NOT NULL,
+    title TEXT NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    size INTEGER NOT NULL,
+    length INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS terms (
+    id INTEGER PRIMARY KEY,
+    term TEXT UNIQUE NOT NULL
+);
+CREATE TABLE IF NOT EXISTS postings (
+    term_id INTEGER NOT NULL,
+    doc_id INTEGER NOT NULL,
+    tf INTEGER NOT NULL,
+    title_tf INTEGER NOT NULL,
+    PRIMARY KEY (term_id, doc_id)
+) WITHOUT ROWID;
+CREATE INDEX IF NOT EXISTS postings_doc ON postings(doc_id);
+"""
+
+
+@dataclass
+class SearchHit:
+    path: str
+    title: str
+    score: float
+
+
+def iter_documents(root_path: str) -> Iterator[Tuple[str, os.stat_result]]:
+    """遍历根目录下所有受支持的文档，跳过隐藏目录"""
+    stack = [root_path]
+    while stack:
+        current = stack.pop()
+        try:
+            entries = os.scandir(current)
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif get_document_type(entry.name) is not None:
+                        yield entry.path, entry.stat()
+                except OSError:
+                    continue
+
+
+class SearchIndex:
+    """基于 SQLite 的持久化倒排索引
+
+    每个线程应使用各自的实例；索引线程写入，界面线程查询。
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+        self._term_ids: Dict[str, int] = {}
+
+    def close(self):
+        self.conn.close()
+
+    # ---- 索引维护 ----
+
+    def update(self, root_path: str,
+               progress: Optional[Callable[[int, int], None]] = None,
+               is_cancelled: Optional[Callable[[], bool]] = None) -> Tuple[int, int]:
+        """增量同步整个根目录，返回(重新索引数, 删除数)"""
+        known = {path: (mtime_ns, size) for path, mtime_ns, size in
+                 self.conn.execute("SELECT path, mtime_ns, size FROM docs")}
+        seen = set()
+        indexed = scanned = 0
+
+        for path, st in iter_documents(root_path):
+            if is_cancelled and is_cancelled():
+                break
+            seen.add(path)
+            scanned += 1
+            if known.get(path) != (st.st_mtime_ns, st.st_size):
+                self._index_file(path, st)
+                indexed += 1
+                if indexed % COMMIT_EVERY == 0:
+                    self.conn.commit()
+            if progress and scanned % COMMIT_EVERY == 0:
+                progress(scanned, indexed)
+        else:
+            # 只有完整遍历后才能确定哪些文件已被删除
+            removed = [path for path in known if path not in seen]
+            for path in removed:
+                self._remove(path)
+            self.conn.commit()
+            return indexed, len(removed)
+
+        self.conn.commit()
+        return indexed, 0
+
+    def update_paths(self, paths: Iterable[str]) -> int:
+        """只同步给定路径(文件或目录)，用于文件变更通知"""
+        changed = 0
+        for path in paths:
+            if os.path.isdir(path):
+                for file_path, st in iter_documents(path):
+                    changed += self._sync_file(file_path, st)
+            elif os.path.isfile(path):
+                if get_document_type(path) is not None:
+                    changed += self._sync_file(path, os.stat(path))
+            else:
+                changed += self._remove_tree(path)
+        self.conn.commit()
+        return changed
+
+    def _sync_file(self, path: str, st: os.stat_result) -> int:
+        row = self.conn.execute(
+            "SELECT mtime_ns, size FROM docs WHERE path = ?", (path,)).fetchone()
+        if row == (st.st_mtime_ns, st.st_size):
+            return 0
+        self._index_file(path, st)
+        return 1
+
+    def _term_id(self, term: str) -> int:
+        term_id = self._term_ids.get(term)
+        if term_id is None:
+            row = self.conn.execute("SELECT id FROM terms WHERE term = ?", (term,)).fetchone()
+            if row is None:
+                term_id = self.conn.execute("INSERT INTO terms(term) VALUES (?)", (term,)).lastrowid
+            else:
+                term_id = row[0]
+            self._term_ids[term] = term_id
+        return term_id
+
+    def _index_file(self, path: str, st: os.stat_result):
+        title = os.path.splitext(os.path.basename(path))[0]
+        try:
+            body = tokenize(extract_text(path, get_document_type(path)))
+        except (OSError, KeyError, zipfile.BadZipFile):
+            body = []
+        except Exception as e:
+            # 个别文档解析失败时只索引标题，不中断整个索引过程
+            print(f"Error extracting text: {e}")
+            body = []
+        body_tf = Counter(body)
+        title_tf = Counter(tokenize(title))
+
+        row = self.conn.execute("SELECT id FROM docs WHERE path = ?", (path,)).fetchone()
+        if row is None:
+            doc_id = self.conn.execute(
+                "INSERT INTO docs(path, title, mtime_ns, size, length) VALUES (?, ?, ?, ?, ?)",
+                (path, title, st.st_mtime_ns, st.st_size, len(body))).lastrowid
+        else:
+            doc_id = row[0]
+            self.conn.execute(
+                "UPDATE docs SET title = ?, mtime_ns = ?, size = ?, length = ? WHERE id = ?",
+                (title, st.st_mtime_ns, st.st_size, len(body), doc_id))
+            self.conn.execute("DELETE FROM postings WHERE doc_id = ?", (doc_id,))
+
+        self.conn.executemany(
+            "INSERT INTO postings(term_id, doc_id, tf, title_tf) VALUES (?, ?, ?, ?)",
+            [(self._term_id(term), doc_id, body_tf.get(term, 0), title_tf.get(term, 0))
+             for term in body_tf.keys() | title_tf.keys()])
+
+    def _remove(self, path: str) -> int:
+        row = self.conn.execute("SELECT id FROM docs WHERE path = ?", (path,)).fetchone()
+        if row is None:
+            return 0
+        self.conn.execute("DELETE FROM postings WHERE doc_id = ?", row)
+        self.conn.execute("DELETE FROM docs WHERE id = ?", row)
+        return 1
+
+    def _remove_tree(self, path: str) -> int:
+        removed = self._remove(path)
+        prefix = path.rstrip(os.sep) + os.sep
+        rows = self.conn.execute(
+            "SELECT path FROM docs WHERE path >= ? AND path < ?",
+            (prefix, prefix[:-1] + chr(ord(os.sep) + 1))).fetchall()
+        for (child,) in rows:
+            removed += self._remove(child)
+        return removed
+
+    # ---- 查询 ----
+
+    def _lookup_terms(self, term: str, prefix: bool) -> List[int]:
+        if prefix:
+            rows = self.conn.execute(
+                "SELECT id FROM terms WHERE term >= ? AND term < ? LIMIT ?",
+                (term, term + '\U0010ffff', PREFIX_EXPANSION)).fetchall()
+        else:
+            rows = self.conn.execute("SELECT id FROM terms WHERE term = ?", (term,)).fetchall()
+        return [row[0] for row in rows]
+
+    def search(self, query: str, limit: int = 50) -> List[SearchHit]:
+        """按 BM25 排序返回结果，命中全部关键词的文档优先"""
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return []
+
+        doc_count, avg_length = self.conn.execute(
+            "SELECT COUNT(*), AVG(length) FROM docs").fetchone()
+        if not doc_count:
+            return []
+        avg_length = avg_length or 1.0
+
+        scores: Dict[int, float] = {}
+        matched: Counter = Counter()
+        for i, term in enumerate(terms):
+            # 最后一个英文词按前缀匹配，便于边输入边搜索
+            prefix = i == len(terms) - 1 and term.isascii() and len(term) >= 2
+            term_docs = set()
+            for term_id in self._lookup_terms(term, prefix):
+                rows = self.conn.execute(
+                    "SELECT p.doc_id, p.tf, p.title_tf, d.length FROM postings p "
+                    "JOIN docs d ON d.id = p.doc_id WHERE p.term_id = ?", (term_id,)).fetchall()
+                idf = math.log(1 + (doc_count - len(rows) + 0.5) / (len(rows) + 0.5))
+                for doc_id, tf, title_tf, length in rows:
+                    norm = tf * (K1 + 1) / (tf + K1 * (1 - B + B * length / avg_length)) if tf else 0.0
+                    scores[doc_id] = scores.get(doc_id, 0.0) + idf * (norm + TITLE_BOOST * min(title_tf, 1))
+                    term_docs.add(doc_id)
+            for doc_id in term_docs:
+                matched[doc_id] += 1
+
+        top = heapq.nlargest(limit, scores, key=lambda doc_id: (matched[doc_id], scores[doc_id]))
+        hits = []
+        for doc_id in top:
+            path, title = self.conn.execute(
+                "SELECT path, title FROM docs WHERE id = ?", (doc_id,)).fetchone()
+            hits.append(SearchHit(path=path, title=title, score=scores[doc_id]))
+        return hits
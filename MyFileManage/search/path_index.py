@@ -0,0 +1,434 @@
+import heapq
+import os
+import re
+import time
+from array import array
+from bisect import bisect_left
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Set, Tuple
+
+from utils.file_utils import get_document_type
+from .index import iter_documents
+
+# 每次查询最多返回的结果数
+MAX_RESULTS = 50
+# 由倒排表找出、先于其他文档检查的候选数上限
+MAX_CANDIDATES = 1000
+# 每次查询逐个检查文件名的时间上限(秒)，没有检查完的留给下一次查询
+SCAN_TIME_BUDGET = 0.004
+SCAN_BATCH_SIZE = 500
+# 最多保留的查询进度数，每个进度占用与文档数相同的字节数
+MAX_SCANS = 16
+# 求倒排表交集时只用最短的几个倒排表，最短的一个最多取前面这么多编号；候选都会再做子序列检查，不必精确
+INTERSECT_POSTINGS = 2
+INTERSECT_LIMIT = 2 * MAX_CANDIDATES
+# 已删除的条目超过该比例时重建倒排表
+COMPACT_RATIO = 0.25
+# 最近打开的文档的加分，按打开时间以半衰期递减(秒)
+RECENCY_BONUS = 40.0
+RECENCY_HALF_LIFE = 7 * 24 * 3600
+MAX_RECENT = 500
+
+# 打分参数
+SUBSTRING_SCORE = 60.0
+PREFIX_BONUS = 40.0
+WORD_START_BONUS = 15.0
+CONSECUTIVE_BONUS = 5.0
+LENGTH_PENALTY = 0.2
+
+_WORD_RE = re.compile(r"[A-Z]+(?![a-z])|[A-Z]?[a-z]+|[0-9]+|[^\x00-\x7f]")
+
+
+@dataclass
+class PathMatch:
+    path: str
+    score: float
+
+
+@dataclass
+class _Scan:
+    """一个查询逐个检查文件名的进度，再次执行同一查询时接着检查"""
+    name_query: str
+    directory_query: str
+    limit: int
+    seen: bytearray  # 编号 -> 检查过它的查询的代数，0 为没有检查过
+    generation: int  # 查询的代数，每继续输入一次加 1
+    sources: List[Tuple[Sequence[int], int]]  # 依次检查的(编号, 代数)，跳过 seen 中不小于该代数的编号
+    position: int = 0  # 在 sources[0] 中的位置
+    matched: array = field(default_factory=lambda: array('I'))  # 文件名命中的编号
+    top: list = field(default_factory=list)  # 得分最高的 limit 个结果，小顶堆
+
+    def __post_init__(self):
+        # 子序列匹配：每一段只匹配到下一个字符第一次出现处，不会回溯出指数级的尝试
+        self.match = re.compile(''.join(f"[^{re.escape(char)}]*{re.escape(char)}"
+                                        for char in self.name_query), re.DOTALL).match
+
+    @property
+    def complete(self) -> bool:
+        return not self.sources
+
+
+def _grams(text: str) -> Set[str]:
+    return {text[i:i + 3] for i in range(len(text) - 2)}
+
+
+def initials(name: str) -> str:
+    """文件名(不含扩展名)中各单词的首字母，包括驼峰和下划线分隔的单词"""
+    stem = os.path.splitext(name)[0]
+    return ''.join(word[0] for word in _WORD_RE.findall(stem)).lower()
+
+
+def fuzzy_score(query: str, text: str) -> Optional[float]:
+    """query 是 text(已转为小写)的子序列时返回得分，否则返回 None
+
+    连续命中最好，开头命中和单词开头命中加分，较短的 text 略微优先。
+    """
+    position = text.find(query)
+    if position >= 0:
+        score = SUBSTRING_SCORE + len(query) * 2
+        if position == 0:
+            score += PREFIX_BONUS
+        elif not text[position - 1].isalnum():
+            score += WORD_START_BONUS
+        return score - len(text) * LENGTH_PENALTY
+
+    score = 0.0
+    previous = -2
+    index = 0
+    for char in query:
+        index = text.find(char, index)
+        if index < 0:
+            return None
+        if index == previous + 1:
+            score += CONSECUTIVE_BONUS
+        elif index == 0 or not text[index - 1].isalnum():
+            score += WORD_START_BONUS / 3
+        else:
+            score += 1.0
+        previous = index
+        index += 1
+    return score - len(text) * LENGTH_PENALTY
+
+
+class PathIndex:
+    """根目录下所有文档路径的内存索引，用于快速打开
+
+    查询词是文件名的子序列即为命中；含 / 时前面的部分再与目录路径做子序列匹配。
+    按文件名的三元组、单词首字母的三元组以及文件名和首字母的前两个字符建立倒排表找出候选，倒排表按编号有序，
+    求交集时只遍历最短的一个。编号只增不减，删除只做标记，积累过多时整体重建。
+    另外按目录记录直接包含的文档和子目录，删除目录时只访问它下面的条目。
+    倒排表只能找出连续命中和首字母命中；之后再逐个检查所有文件名，只由子序列匹配的文件也能被找到。
+    每次查询检查文件名的时间有上限，没有检查完时 has_more 为 True，再次执行同一查询接着检查；
+    继续输入时只需筛选上一个查询已找到的命中，再接着检查它还没有检查的文档。
+    各查询的进度按输入的前缀保存，删除字符时回到之前的进度。
+    索引在后台线程中构建完成后交给界面线程，之后只在界面线程中增量更新。
+    """
+
+    def __init__(self, root_path: str):
+        self.root_path = os.path.abspath(root_path)
+        self.recent: Dict[str, float] = {}  # 相对路径 -> 最后打开时间
+        self._reset()
+
+    def _reset(self):
+        self.paths: List[Optional[str]] = []  # 编号 -> 相对路径，None 表示已删除
+        self.names: List[Optional[str]] = []  # 编号 -> 小写的文件名
+        self.ids: Dict[str, int] = {}
+        self.grams: Dict[str, array] = {}
+        self.initial_grams: Dict[str, array] = {}
+        self.prefixes: Dict[str, array] = {}
+        self.children: Dict[str, Set[str]] = {}  # 目录相对路径('' 为根) -> 直接包含的文档和子目录
+        self.deleted = 0
+        self._scans: List[_Scan] = []  # 各查询的进度，后一个查询以前一个为前缀
+        self._current: Optional[_Scan] = None
+
+    @classmethod
+    def build(cls, root_path: str, is_cancelled: Optional[Callable[[], bool]] = None) -> Optional['PathIndex']:
+        index = cls(root_path)
+        for count, (path, _) in enumerate(iter_documents(index.root_path)):
+            if is_cancelled and count % 1000 == 0 and is_cancelled():
+                return None
+            index._add(os.path.relpath(path, index.root_path))
+        return index
+
+    def __len__(self) -> int:
+        return len(self.ids)
+
+    def _relative(self, path: str) -> Optional[str]:
+        relative = os.path.relpath(os.path.abspath(path), self.root_path)
+        return None if relative.startswith('..') or relative == '.' else relative
+
+    # ---- 增量更新 ----
+
+    def _add(self, relative: str):
+        if relative in self.ids:
+            return
+        doc_id = len(self.paths)
+        name = os.path.basename(relative)
+        lower = name.lower()
+        self.paths.append(relative)
+        self.names.append(lower)
+        self.ids[relative] = doc_id
+        name_initials = initials(name)
+        for gram in _grams(lower):
+            self.grams.setdefault(gram, array('I')).append(doc_id)
+        for gram in _grams(name_initials):
+            self.initial_grams.setdefault(gram, array('I')).append(doc_id)
+        for prefix in {lower[:1], lower[:2], name_initials[:2]}:
+            self.prefixes.setdefault(prefix, array('I')).append(doc_id)
+        # 登记到所在目录，新出现的目录逐级登记到上级目录
+        child, parent = relative, os.path.dirname(relative)
+        while True:
+            entries = self.children.get(parent)
+            if entries is not None:
+                entries.add(child)
+                break
+            self.children[parent] = {child}
+            if not parent:
+                break
+            child, parent = parent, os.path.dirname(parent)
+        self._scans.clear()
+
+    def _remove(self, relative: str):
+        doc_id = self.ids.pop(relative, None)
+        if doc_id is None:
+            return
+        self.paths[doc_id] = None
+        self.names[doc_id] = None
+        self.deleted += 1
+        self._scans.clear()
+        # 目录中已没有文档时从上级目录中去掉
+        child, parent = relative, os.path.dirname(relative)
+        while parent in self.children:
+            entries = self.children[parent]
+            entries.discard(child)
+            if entries or not parent:
+                break
+            del self.children[parent]
+            child, parent = parent, os.path.dirname(parent)
+
+    def add(self, path: str):
+        relative = self._relative(path)
+        if relative is not None:
+            self._add(relative)
+
+    def remove(self, path: str):
+        """删除一个文档，或某个目录下的所有文档"""
+        relative = self._relative(path)
+        if relative is None:
+            return
+        if relative in self.ids:
+            self._remove(relative)
+        elif relative in self.children:
+            documents = []
+            pending = [relative]
+            while pending:
+                for child in self.children.get(pending.pop(), ()):
+                    if child in self.children:
+                        pending.append(child)
+                    else:
+                        documents.append(child)
+            for document in documents:
+                self._remove(document)
+        else:
+            # 从未索引过的文件，例如不是文档的文件
+            return
+        self._maybe_compact()
+
+    def update_paths(self, paths: Iterable[str]):
+        """按文件系统的当前状态同步一批变化的路径"""
+        for path in paths:
+            relative = self._relative(path)
+            if relative is None or any(part.startswith('.') for part in relative.split(os.sep)):
+                continue
+            if os.path.isdir(path):
+                for doc_path, _ in iter_documents(path):
+                    self._add(os.path.relpath(doc_path, self.root_path))
+            elif os.path.isfile(path) and get_document_type(path) is not None:
+                self._add(relative)
+            else:
+                self.remove(path)
+        self._maybe_compact()
+
+    def _maybe_compact(self):
+        if self.deleted > 1000 and self.deleted > len(self.paths) * COMPACT_RATIO:
+            paths = sorted(self.ids)
+            self._reset()
+            for relative in paths:
+                self._add(relative)
+
+    # ---- 最近打开 ----
+
+    def set_recent(self, opened: Dict[str, float]):
+        """{路径: 最后打开时间}"""
+        self.recent = {}
+        for path, timestamp in opened.items():
+            relative = self._relative(path)
+            if relative is not None and timestamp:
+                self.recent[relative] = timestamp
+        self._scans.clear()
+
+    def touch(self, path: str):
+        relative = self._relative(path)
+        if relative is None:
+            return
+        self.recent[relative] = time.time()
+        if len(self.recent) > MAX_RECENT:
+            oldest = min(self.recent, key=self.recent.get)
+            del self.recent[oldest]
+        self._scans.clear()
+
+    def _recency(self, relative: str, now: float) -> float:
+        opened = self.recent.get(relative)
+        if opened is None:
+            return 0.0
+        return RECENCY_BONUS * 0.5 ** (max(now - opened, 0) / RECENCY_HALF_LIFE)
+
+    # ---- 查询 ----
+
+    @staticmethod
+    def _intersect(postings: List[array]) -> List[int]:
+        postings = sorted(postings, key=len)[:INTERSECT_POSTINGS]
+        smallest, rest = postings[0], postings[1:]
+        result = []
+        for doc_id in smallest[:INTERSECT_LIMIT]:
+            for other in rest:
+                position = bisect_left(other, doc_id)
+                if position == len(other) or other[position] != doc_id:
+                    break
+            else:
+                result.append(doc_id)
+                if len(result) >= MAX_CANDIDATES:
+                    break
+        return result
+
+    def _lookup(self, table: Dict[str, array], grams: Set[str]) -> List[int]:
+        postings = []
+        for gram in grams:
+            posting = table.get(gram)
+            if posting is None:
+                return []
+            postings.append(posting)
+        return self._intersect(postings) if postings else []
+
+    def _candidates(self, name_query: str) -> Set[int]:
+        """最近打开的文档，以及按连续命中、首字母命中找出的文档，直到上限"""
+        candidates = {self.ids[relative] for relative in self.recent if relative in self.ids}
+        if len(name_query) >= 3:
+            grams = _grams(name_query)
+            sources = [self._lookup(self.grams, grams), self._lookup(self.initial_grams, grams)]
+        else:
+            sources = [self.prefixes.get(name_query, ())[:MAX_CANDIDATES]]
+        limit = len(candidates) + MAX_CANDIDATES
+        for source in sources:
+            candidates.update(source)
+            if len(candidates) >= limit:
+                break
+        return candidates
+
+    def _start_scan(self, name_query: str, directory_query: str, limit: int) -> _Scan:
+        """新查询先检查候选，再检查其余所有文档"""
+        candidates = sorted(self._candidates(name_query))
+        return _Scan(name_query, directory_query, limit, bytearray(len(self.paths)), 1,
+                     [(candidates, 1), (range(len(self.paths)), 1)])
+
+    def _narrow_scan(self, previous: _Scan, name_query: str, directory_query: str) -> _Scan:
+        """以 previous 的查询为前缀的查询：命中必然在 previous 已找到的命中或它还没有检查的文档中
+
+        先检查新查询的候选，最好的结果尽早出现。previous 检查过的文档不是它的命中就不是新查询的命中，
+        是它的命中就在它的命中列表中，因此沿用的来源跳过之前各代检查过的文档，命中列表只跳过新查询检查过的。
+        """
+        generation = previous.generation + 1
+        if generation > 255:
+            return self._start_scan(name_query, directory_query, previous.limit)
+        sources = [(sorted(self._candidates(name_query)), generation), (previous.matched[:], generation)]
+        for index, (source, source_generation) in enumerate(previous.sources):
+            sources.append((source[previous.position:] if index == 0 else source, source_generation))
+        return _Scan(name_query, directory_query, previous.limit, bytearray(previous.seen), generation,
+                     sources)
+
+    def _scan_for(self, name_query: str, directory_query: str, limit: int) -> _Scan:
+        """找到同一查询的进度接着检查，或从作为前缀的查询的进度开始筛选"""
+        scans = self._scans
+        while scans and not name_query.startswith(scans[-1].name_query):
+            scans.pop()
+        if scans and scans[-1].limit < limit:
+            scans.clear()
+        if not scans:
+            scans.append(self._start_scan(name_query, directory_query, limit))
+        elif scans[-1].name_query != name_query or scans[-1].directory_query != directory_query:
+            scan = self._narrow_scan(scans[-1], name_query, directory_query)
+            if scans[-1].name_query == name_query:
+                # 只改了目录部分，不再需要原来的进度
+                scans.pop()
+            scans.append(scan)
+            if len(scans) > MAX_SCANS:
+                del scans[0]
+        return scans[-1]
+
+    def _check(self, scan: _Scan, doc_ids: Iterable[int], now: float):
+        names = self.names
+        match = scan.match
+        seen = scan.seen
+        for doc_id in doc_ids:
+            seen[doc_id] = scan.generation
+            name = names[doc_id]
+            if name is None or match(name) is None:
+                continue
+            scan.matched.append(doc_id)
+            score = fuzzy_score(scan.name_query, name)
+            relative = self.paths[doc_id]
+            if scan.directory_query:
+                directory_score = fuzzy_score(scan.directory_query,
+                                              relative[:relative.rfind(os.sep) + 1].lower())
+                if directory_score is None:
+                    continue
+                score += directory_score / 4
+            if relative in self.recent:
+                score += self._recency(relative, now)
+            item = (score, -doc_id, relative)
+            if len(scan.top) < scan.limit:
+                heapq.heappush(scan.top, item)
+            else:
+                heapq.heappushpop(scan.top, item)
+
+    def _advance(self, scan: _Scan, now: float, deadline: float):
+        """按批检查文件名，直到检查完或超过 deadline"""
+        while scan.sources:
+            source, generation = scan.sources[0]
+            end = min(scan.position + SCAN_BATCH_SIZE, len(source))
+            seen = scan.seen
+            batch = [doc_id for doc_id in source[scan.position:end] if seen[doc_id] < generation]
+            self._check(scan, batch, now)
+            if end == len(source):
+                scan.sources.pop(0)
+                scan.position = 0
+            else:
+                scan.position = end
+            if time.perf_counter() >= deadline:
+                break
+
+    @property
+    def has_more(self) -> bool:
+        """上一次查询是否还有文档没有检查，再次执行同一查询会接着检查"""
+        return self._current is not None and not self._current.complete
+
+    def query(self, text: str, limit: int = MAX_RESULTS) -> List[PathMatch]:
+        """按模糊匹配得分和最近打开时间排序，返回绝对路径"""
+        deadline = time.perf_counter() + SCAN_TIME_BUDGET
+        now = time.time()
+        self._current = None
+        text = text.strip().lower().replace('/', os.sep)
+        if not text:
+            recent = sorted((relative for relative in self.recent if relative in self.ids),
+                            key=self.recent.get, reverse=True)[:limit]
+            return [PathMatch(os.path.join(self.root_path, relative), self._recency(relative, now))
+                    for relative in recent]
+
+        directory_query, _, name_query = text.rpartition(os.sep)
+        if not name_query:
+            return []
+        scan = self._scan_for(name_query, directory_query, limit)
+        self._advance(scan, now, deadline)
+        self._current = scan
+        return [PathMatch(os.path.join(self.root_path, relative), score)
+                for score, _, relative in heapq.nlargest(limit, scan.top)]
@@ -0,0 +1,22 @@
+import re
+from typing import List
+
+# 英文/数字按单词切分，中日韩文字按二元组切分
+_TOKEN_RE = re.compile(r"[0-9a-z_]+|[\u3040-\u30ff\u3400-\u4dbf\u4e00-\u9fff\uac00-\ud7af]+")
+_CJK_START = "\u3040"
+MAX_TOKEN_LENGTH = 64
+
+
+def tokenize(text: str) -> List[str]:
+    """把文本切分为索引词项"""
+    tokens = []
+    for match in _TOKEN_RE.finditer(text.lower()):
+        word = match.group()
+        if word[0] < _CJK_START:
+            if len(word) <= MAX_TOKEN_LENGTH:
+                tokens.append(word)
+        elif len(word) == 1:
+            tokens.append(word)
+        else:
+            tokens.extend(word[i:i + 2] for i in range(len(word) - 1))
+    return tokens
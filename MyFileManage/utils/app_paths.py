@@ -0,0 +1,19 @@
+import hashlib
+import os
+
+APP_NAME = "PersonalDocManager"
+
+
+def cache_root() -> str:
+    """应用缓存根目录"""
+    base = os.environ.get("XDG_CACHE_HOME") or os.path.join(os.path.expanduser("~"), ".cache")
+    return os.path.join(base, APP_NAME)
+
+
+def data_dir_for_root(root_path: str) -> str:
+    """返回某个文档根目录专属的缓存目录(索引、数据库等)"""
+    root_path = os.path.abspath(root_path)
+    digest = hashlib.sha1(root_path.encode('utf-8', 'surrogateescape')).hexdigest()[:16]
+    path = os.path.join(cache_root(), digest)
+    os.makedirs(path, exist_ok=True)
+    return path
@@ -0,0 +1,175 @@
+import os
+import tempfile
+import threading
+from collections import OrderedDict
+from typing import Callable, Optional, Union
+
+from utils import tracing
+
+# 写入完成后的回调：(路径, 错误信息或 None)，在写入线程中调用
+WriteCallback = Callable[[str, Optional[str]], None]
+
+
+def _current_umask() -> int:
+    # umask 只能在设置的同时读出，导入时读取一次，之后写入线程不再改动进程的 umask
+    mask = os.umask(0o022)
+    os.umask(mask)
+    return mask
+
+
+# 新建文件的权限，与 open() 创建文件时相同
+_NEW_FILE_MODE = 0o666 & ~_current_umask()
+
+
+def atomic_write(path: str, data: Union[str, bytes]):
+    """先写入同目录下的临时文件并 fsync，再原子地替换目标文件
+
+    写入过程中崩溃时，目标文件保持原来的完整内容。
+    """
+    if isinstance(data, str):
+        data = data.encode('utf-8')
+    with tracing.span('atomic_write', 'io', path=path, size=len(data)):
+        _replace_file(path, data)
+
+
+def _replace_file(path: str, data: bytes):
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix=f".{os.path.basename(path)}.", suffix=".tmp", dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(data)
+            f.flush()
+            os.fsync(f.fileno())
+        try:
+            # 保留原文件的权限，mkstemp 创建的文件只有所有者可读写
+            mode = os.stat(path).st_mode & 0o7777
+        except FileNotFoundError:
+            mode = _NEW_FILE_MODE
+        os.chmod(tmp_path, mode)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+    _fsync_directory(directory)
+
+
+def _fsync_directory(directory: str):
+    """让 rename 本身也落盘；部分平台不支持对目录 fsync"""
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class BackgroundWriter:
+    """在后台线程中原子地写文件
+
+    同一路径还没开始写的请求会合并，只写最后一次提交的内容；data 为 None 表示删除文件。
+    不同路径按提交顺序处理。
+    """
+
+    def __init__(self):
+        self._pending = OrderedDict()  # 路径 -> (内容, [回调])
+        self._condition = threading.Condition()
+        self._busy = False
+        self._stopped = False
+        self._thread = None
+        self.writes = 0
+        self.coalesced = 0
+
+    def start(self):
+        with self._condition:
+            if self._thread is None:
+                self._stopped = False
+                self._thread = threading.Thread(target=self._run, name="BackgroundWriter", daemon=True)
+                self._thread.start()
+
+    def submit(self, path: str, data: Optional[Union[str, bytes]], callback: Optional[WriteCallback] = None):
+        """提交一次写入；内容应是调用线程中取得的快照"""
+        self.start()
+        with self._condition:
+            callbacks = []
+            if path in self._pending:
+                callbacks = self._pending.pop(path)[1]
+                self.coalesced += 1
+            if callback is not None:
+                callbacks.append(callback)
+            self._pending[path] = (data, callbacks)
+            self._condition.notify_all()
+
+    def remove(self, path: str, callback: Optional[WriteCallback] = None):
+        self.submit(path, None, callback)
+
+    def is_pending(self, path: str) -> bool:
+        with self._condition:
+            return path in self._pending
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """等待所有已提交的写入完成，超时返回 False"""
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._pending and not self._busy, timeout)
+
+    def stop(self, timeout: Optional[float] = None):
+        """写完已提交的内容后结束线程"""
+        self.flush(timeout)
+        with self._condition:
+            self._stopped = True
+            self._condition.notify_all()
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join(timeout)
+
+    def _run(self):
+        while True:
+            with self._condition:
+                self._condition.wait_for(lambda: self._pending or self._stopped)
+                if not self._pending:
+                    return
+                path, (data, callbacks) = self._pending.popitem(last=False)
+                self._busy = True
+
+            error = None
+            try:
+                if data is None:
+                    try:
+                        os.remove(path)
+                    except FileNotFoundError:
+                        pass
+                else:
+                    atomic_write(path, data)
+                    self.writes += 1
+            except Exception as e:
+                error = str(e)
+                print(f"Error writing file: {e}")
+
+            for callback in callbacks:
+                try:
+                    callback(path, error)
+                except Exception as e:
+                    print(f"Error in write callback: {e}")
+
+            with self._condition:
+                self._busy = False
+                self._condition.notify_all()
+
+
+_writer = None
+_writer_lock = threading.Lock()
+
+
+def background_writer() -> BackgroundWriter:
+    """进程内共享的写入线程"""
+    global _writer
+    with _writer_lock:
+        if _writer is None:
+            _writer = BackgroundWriter()
+        return _writer
@@ -0,0 +1,58 @@
+import hashlib
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import List
+
+from utils.app_paths import cache_root
+from utils.atomic_writer import BackgroundWriter
+
+# 默认自动保存间隔(秒)，0 表示关闭
+DEFAULT_AUTOSAVE_SECONDS = 30
+
+
+@dataclass
+class JournalEntry:
+    path: str  # 原文档路径
+    content: str  # 未保存的内容
+    saved_at: float
+
+
+class JournalStore:
+    """未保存内容的恢复日志
+
+    每个文档一个日志文件，通过 BackgroundWriter 原子写入；文档保存或放弃修改后删除。
+    程序异常退出后，下次启动时仍然存在的日志就是可以恢复的内容。
+    """
+
+    def __init__(self, writer: BackgroundWriter, journal_dir: str = None):
+        self.writer = writer
+        self.journal_dir = journal_dir or os.path.join(cache_root(), "journals")
+        os.makedirs(self.journal_dir, exist_ok=True)
+
+    def journal_path(self, path: str) -> str:
+        digest = hashlib.sha1(os.path.abspath(path).encode('utf-8', 'surrogateescape')).hexdigest()
+        return os.path.join(self.journal_dir, digest + ".json")
+
+    def write(self, path: str, content: str):
+        record = {'path': os.path.abspath(path), 'content': content, 'saved_at': time.time()}
+        self.writer.submit(self.journal_path(path), json.dumps(record, ensure_ascii=False))
+
+    def discard(self, path: str):
+        self.writer.remove(self.journal_path(path))
+
+    def load_all(self) -> List[JournalEntry]:
+        """读取所有遗留的日志，按时间排序"""
+        entries = []
+        for name in os.listdir(self.journal_dir):
+            if not name.endswith(".json"):
+                continue
+            try:
+                with open(os.path.join(self.journal_dir, name), 'r', encoding='utf-8') as f:
+                    record = json.load(f)
+                entries.append(JournalEntry(record['path'], record['content'], record['saved_at']))
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Error reading journal {name}: {e}")
+        entries.sort(key=lambda entry: entry.saved_at)
+        return entries
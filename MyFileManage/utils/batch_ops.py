@@ -0,0 +1,94 @@
+import codecs
+import os
+import re
+import zipfile
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from models.directory import scan_entries
+from models.document import DocumentType
+from utils.docx_io import iter_docx_paragraphs
+from utils.rtf_io import iter_rtf_paragraphs, read_rtf
+
+# 文本类文档按块校验编码，避免一次读入超大文件
+CHECK_CHUNK_SIZE = 1024 * 1024
+_TEXT_TYPES = (DocumentType.TEXT, DocumentType.MARKDOWN, DocumentType.PYTHON, DocumentType.HTML)
+_RTF_ESCAPED_RE = re.compile(r"\\[\\{}]")
+
+
+def iter_documents(root: str) -> Iterator[Tuple[str, DocumentType]]:
+    """递归列出根目录下受支持的文档，跳过隐藏目录"""
+    pending = [root]
+    while pending:
+        path = pending.pop()
+        try:
+            listing = scan_entries(path)
+        except OSError as e:
+            print(f"Error scanning directory: {e}")
+            continue
+        for name, _, doc_type in listing.documents:
+            yield os.path.join(path, name), doc_type
+        pending.extend(os.path.join(path, name) for name in reversed(listing.subdirectories)
+                       if not name.startswith('.'))
+
+
+# ---- 以下函数在子进程中执行，参数和返回值都必须可以 pickle ----
+
+def type_stats(documents: List[Tuple[str, DocumentType]]) -> Dict[str, Tuple[int, int]]:
+    """按类型统计文档数和字节数，返回 {扩展名: (文件数, 字节数)}"""
+    stats = {}
+    for path, doc_type in documents:
+        try:
+            size = os.path.getsize(path)
+        except OSError:
+            continue
+        count, total = stats.get(doc_type.value, (0, 0))
+        stats[doc_type.value] = (count + 1, total + size)
+    return stats
+
+
+def check_document(path: str, doc_type: DocumentType) -> Optional[str]:
+    """检查文档能否被编辑器完整读取，返回问题描述，没有问题时返回 None"""
+    try:
+        if doc_type in _TEXT_TYPES:
+            decoder = codecs.getincrementaldecoder('utf-8')()
+            with open(path, 'rb') as f:
+                while True:
+                    data = f.read(CHECK_CHUNK_SIZE)
+                    decoder.decode(data, final=not data)
+                    if not data:
+                        break
+        elif doc_type == DocumentType.DOC:
+            if os.path.getsize(path) == 0:
+                return None
+            for _ in iter_docx_paragraphs(path):
+                pass
+        elif doc_type == DocumentType.RICH_TEXT:
+            text = read_rtf(path)
+            if not text:
+                return None
+            if not text.lstrip().startswith('{\\rtf'):
+                return "缺少 RTF 文件头"
+            unescaped = _RTF_ESCAPED_RE.sub('', text)
+            if unescaped.count('{') != unescaped.count('}'):
+                return "花括号不匹配"
+            for _ in iter_rtf_paragraphs(text):
+                pass
+    except UnicodeDecodeError as e:
+        return f"不是有效的 UTF-8 (偏移 {e.start})"
+    except zipfile.BadZipFile:
+        return "不是有效的 docx 压缩包"
+    except KeyError:
+        return "缺少 word/document.xml"
+    except Exception as e:
+        return str(e) or type(e).__name__
+    return None
+
+
+def check_documents(documents: List[Tuple[str, DocumentType]]) -> List[Tuple[str, str]]:
+    """返回 [(路径, 问题描述)]"""
+    problems = []
+    for path, doc_type in documents:
+        problem = check_document(path, doc_type)
+        if problem is not None:
+            problems.append((path, problem))
+    return problems
@@ -0,0 +1,232 @@
+import hashlib
+import os
+import sqlite3
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from utils.app_paths import data_dir_for_root
+
+# 部分哈希读取文件首尾各多少字节
+PARTIAL_BYTES = 64 * 1024
+# 完整哈希的读取块大小
+HASH_CHUNK_SIZE = 1024 * 1024
+# 并行计算哈希的线程数
+HASH_WORKERS = 8
+# 每个线程任务处理的文件数
+HASH_BATCH_SIZE = 256
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS files (
+    path TEXT PRIMARY KEY,
+    size INTEGER NOT NULL,
+    mtime_ns INTEGER NOT NULL,
+    partial TEXT,
+    full TEXT
+);
+CREATE INDEX IF NOT EXISTS files_size ON files(size);
+"""
+
+
+def hash_db_path(root_path: str) -> str:
+    return os.path.join(data_dir_for_root(root_path), "hashes.db")
+
+
+def partial_hash(path: str, size: int) -> str:
+    """文件大小加首尾各 64KB 的哈希，小文件等同于完整哈希"""
+    digest = hashlib.blake2b(str(size).encode(), digest_size=20)
+    with open(path, 'rb') as f:
+        digest.update(f.read(PARTIAL_BYTES))
+        if size > 2 * PARTIAL_BYTES:
+            f.seek(size - PARTIAL_BYTES)
+            digest.update(f.read(PARTIAL_BYTES))
+        elif size > PARTIAL_BYTES:
+            digest.update(f.read())
+    return digest.hexdigest()
+
+
+def full_hash(path: str) -> str:
+    """分块计算完整内容的哈希"""
+    digest = hashlib.blake2b(digest_size=20)
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def iter_files(root_path: str) -> Iterator[Tuple[str, os.stat_result]]:
+    """遍历根目录下的普通文件，跳过隐藏目录和符号链接"""
+    stack = [root_path]
+    while stack:
+        current = stack.pop()
+        try:
+            entries = os.scandir(current)
+        except OSError:
+            continue
+        with entries:
+            for entry in entries:
+                if entry.name.startswith('.'):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append(entry.path)
+                    elif entry.is_file(follow_symlinks=False):
+                        yield entry.path, entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+
+
+class DedupStore:
+    """基于内容哈希的去重索引
+
+    先按大小、再按首尾部分哈希筛选，只有仍然相同的文件才读取全部内容。
+    哈希结果按 (size, mtime) 持久化，文件未变化时不再重复计算。
+    只应在创建它的线程中使用。
+    """
+
+    def __init__(self, root_path: str, db_path: str):
+        self.root_path = root_path
+        self.conn = sqlite3.connect(db_path)
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(_SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    def refresh(self):
+        """同步根目录下文件的大小和 mtime，变化的文件清空已缓存的哈希"""
+        known = {path: (size, mtime_ns) for path, size, mtime_ns in
+                 self.conn.execute("SELECT path, size, mtime_ns FROM files")}
+        seen = set()
+        changed = []
+        for path, st in iter_files(self.root_path):
+            seen.add(path)
+            if known.get(path) != (st.st_size, st.st_mtime_ns):
+                changed.append((path, st.st_size, st.st_mtime_ns))
+        self.conn.executemany(
+            "INSERT OR REPLACE INTO files(path, size, mtime_ns, partial, full) "
+            "VALUES (?, ?, ?, NULL, NULL)", changed)
+        self.conn.executemany("DELETE FROM files WHERE path = ?",
+                              [(path,) for path in known if path not in seen])
+        self.conn.commit()
+
+    def register(self, path: str, partial: Optional[str] = None, full: Optional[str] = None):
+        """记录新加入根目录的文件，已知的哈希可以一并保存"""
+        st = os.stat(path)
+        self.conn.execute(
+            "INSERT OR REPLACE INTO files(path, size, mtime_ns, partial, full) VALUES (?, ?, ?, ?, ?)",
+            (path, st.st_size, st.st_mtime_ns, partial, full))
+        self.conn.commit()
+
+    def _hashes(self, path: str, size: int, level: str) -> Optional[str]:
+        """返回缓存的哈希，缺失时计算并保存；文件已变化时返回 None"""
+        row = self.conn.execute(
+            f"SELECT mtime_ns, {level} FROM files WHERE path = ?", (path,)).fetchone()
+        try:
+            st = os.stat(path)
+        except OSError:
+            return None
+        if row is None or row[0] != st.st_mtime_ns or st.st_size != size:
+            return None
+        if row[1] is not None:
+            return row[1]
+        value = partial_hash(path, size) if level == 'partial' else full_hash(path)
+        self.conn.execute(f"UPDATE files SET {level} = ? WHERE path = ?", (value, path))
+        if level == 'partial' and size <= 2 * PARTIAL_BYTES:
+            # 小文件的部分哈希已覆盖全部内容
+            self.conn.execute("UPDATE files SET full = ? WHERE path = ?", (value, path))
+        return value
+
+    def find_existing(self, src_path: str) -> Tuple[Optional[str], Optional[str], Optional[str]]:
+        """查找根目录中内容与 src_path 相同的文件
+
+        返回(已存在的路径, 部分哈希, 完整哈希)，哈希在未计算时为 None。
+        """
+        size = os.path.getsize(src_path)
+        candidates = [path for (path,) in self.conn.execute(
+            "SELECT path FROM files WHERE size = ?", (size,)) if path != src_path]
+        if not candidates:
+            return None, None, None
+
+        src_partial = partial_hash(src_path, size)
+        small = size <= 2 * PARTIAL_BYTES
+        src_full = src_partial if small else None
+        for path in candidates:
+            if self._hashes(path, size, 'partial') != src_partial:
+                continue
+            if src_full is None:
+                src_full = full_hash(src_path)
+            if small or self._hashes(path, size, 'full') == src_full:
+                self.conn.commit()
+                return path, src_partial, src_full
+        self.conn.commit()
+        return None, src_partial, src_full
+
+    def find_duplicates(self, max_workers: int = HASH_WORKERS) -> List[List[str]]:
+        """返回根目录中内容完全相同的文件分组"""
+        self.refresh()
+        by_size: Dict[int, List[str]] = defaultdict(list)
+        known = {}
+        for path, size, partial, full in self.conn.execute(
+                "SELECT path, size, partial, full FROM files WHERE size > 0"):
+            by_size[size].append(path)
+            known[path] = {'partial': partial, 'full': full}
+        groups = [(size, paths) for size, paths in by_size.items() if len(paths) > 1]
+
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            for level in ('partial', 'full'):
+                groups = self._split_groups(executor, groups, level, known)
+        self.conn.commit()
+        return sorted((sorted(paths) for _, paths in groups), key=lambda paths: paths[0])
+
+    def _split_groups(self, executor, groups, level, known):
+        """按某一级哈希拆分候选分组，只保留仍有多个文件的组"""
+        cached = {}
+        missing = []
+        for size, paths in groups:
+            for path in paths:
+                value = known[path][level]
+                if value is None:
+                    missing.append((path, size))
+                else:
+                    cached[path] = value
+
+        # 哈希在线程池中计算，数据库只在当前线程中写入
+        compute = partial_hash if level == 'partial' else (lambda path, size: full_hash(path))
+
+        def compute_batch(batch):
+            values = []
+            for path, size in batch:
+                try:
+                    values.append(compute(path, size))
+                except OSError:
+                    values.append(None)
+            return values
+
+        # 小文件很多时按批提交，避免每个文件一个 Future 的开销
+        batches = [missing[i:i + HASH_BATCH_SIZE] for i in range(0, len(missing), HASH_BATCH_SIZE)]
+        updates = []
+        for batch, values in zip(batches, executor.map(compute_batch, batches)):
+            for (path, size), value in zip(batch, values):
+                if value is None:
+                    continue
+                cached[path] = value
+                updates.append((value, value if size <= 2 * PARTIAL_BYTES else None, path))
+                if level == 'partial' and size <= 2 * PARTIAL_BYTES:
+                    known[path]['full'] = value
+        if level == 'partial':
+            self.conn.executemany(
+                "UPDATE files SET partial = ?, full = coalesce(?, full) WHERE path = ?", updates)
+        else:
+            self.conn.executemany("UPDATE files SET full = ? WHERE path = ?",
+                                  [(value, path) for value, _, path in updates])
+
+        result = []
+        for size, paths in groups:
+            by_hash: Dict[str, List[str]] = defaultdict(list)
+            for path in paths:
+                if path in cached:
+                    by_hash[cached[path]].append(path)
+            result.extend((size, same) for same in by_hash.values() if len(same) > 1)
+        return result
@@ -0,0 +1,339 @@
+import io
+import re
+import zipfile
+from typing import Dict, Iterable, Iterator, List, Tuple
+from xml.etree.ElementTree import XMLPullParser, fromstring
+from xml.sax.saxutils import escape, quoteattr
+
+from models.rich_text import (
+    Paragraph, TextRun, ALIGN_LEFT, ALIGN_CENTER, ALIGN_RIGHT, ALIGN_JUSTIFY,
+    LIST_BULLET, LIST_NUMBER, LINE_BREAK, HEADING_POINT_SIZES
+)
+
+W_NS = 'http://schemas.openxmlformats.org/wordprocessingml/2006/main'
+_W = '{%s}' % W_NS
+
+DOCUMENT_PART = 'word/document.xml'
+STYLES_PART = 'word/styles.xml'
+NUMBERING_PART = 'word/numbering.xml'
+# 每次送入 XML 解析器的字节数
+READ_CHUNK_SIZE = 64 * 1024
+# 写出的标题样式数
+MAX_HEADING_LEVEL = 6
+
+_P = _W + 'p'
+_TBL = _W + 'tbl'
+_R = _W + 'r'
+_VAL = _W + 'val'
+_FALSE_VALUES = ('0', 'false', 'off', 'none')
+
+_ALIGNMENTS = {
+    'left': ALIGN_LEFT, 'start': ALIGN_LEFT,
+    'center': ALIGN_CENTER,
+    'right': ALIGN_RIGHT, 'end': ALIGN_RIGHT,
+    'both': ALIGN_JUSTIFY, 'distribute': ALIGN_JUSTIFY,
+}
+_JC_VALUES = {ALIGN_CENTER: 'center', ALIGN_RIGHT: 'right', ALIGN_JUSTIFY: 'both'}
+_HEADING_NAME_RE = re.compile(r'^heading\s*(\d)$', re.IGNORECASE)
+# XML 1.0 不允许的控制字符
+_INVALID_XML_RE = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]')
+_RUN_SPLIT_RE = re.compile('(\t|%s)' % LINE_BREAK)
+
+
+# ---- 读取 ----
+
+def docx_content_size(path: str) -> int:
+    """word/document.xml 解压后的大小，用于显示加载进度"""
+    with zipfile.ZipFile(path) as zf:
+        return zf.getinfo(DOCUMENT_PART).file_size
+
+
+def _read_small_part(zf: zipfile.ZipFile, name: str):
+    try:
+        return fromstring(zf.read(name))
+    except KeyError:
+        return None
+
+
+def _heading_styles(zf: zipfile.ZipFile) -> Dict[str, int]:
+    """样式 ID -> 标题级别；本地化的 Word 中标题样式 ID 不一定是 Heading1"""
+    levels = {}
+    root = _read_small_part(zf, STYLES_PART)
+    if root is None:
+        return levels
+    for style in root.iter(_W + 'style'):
+        style_id = style.get(_W + 'styleId')
+        name = style.find(_W + 'name')
+        name = name.get(_VAL, '') if name is not None else ''
+        match = _HEADING_NAME_RE.match(name) or _HEADING_NAME_RE.match(style_id or '')
+        if match:
+            levels[style_id] = max(1, min(int(match.group(1)), MAX_HEADING_LEVEL))
+        elif name.lower() == 'title':
+            levels[style_id] = 1
+    return levels
+
+
+def _list_styles(zf: zipfile.ZipFile) -> Dict[Tuple[str, str], str]:
+    """(numId, ilvl) -> 列表样式"""
+    root = _read_small_part(zf, NUMBERING_PART)
+    if root is None:
+        return {}
+    abstract_formats = {}
+    for abstract in root.iter(_W + 'abstractNum'):
+        formats = {}
+        for level in abstract.iter(_W + 'lvl'):
+            num_fmt = level.find(_W + 'numFmt')
+            formats[level.get(_W + 'ilvl')] = num_fmt.get(_VAL) if num_fmt is not None else 'bullet'
+        abstract_formats[abstract.get(_W + 'abstractNumId')] = formats
+    styles = {}
+    for num in root.iter(_W + 'num'):
+        abstract_id = num.find(_W + 'abstractNumId')
+        if abstract_id is None:
+            continue
+        for ilvl, num_fmt in abstract_formats.get(abstract_id.get(_VAL), {}).items():
+            styles[(num.get(_W + 'numId'), ilvl)] = LIST_BULLET if num_fmt in ('bullet', 'none') else LIST_NUMBER
+    return styles
+
+
+def _is_on(element) -> bool:
+    return element is not None and element.get(_VAL, 'true').lower() not in _FALSE_VALUES
+
+
+def _parse_run(run, paragraph: Paragraph):
+    template = TextRun('')
+    properties = run.find(_W + 'rPr')
+    if properties is not None:
+        template.bold = _is_on(properties.find(_W + 'b'))
+        template.italic = _is_on(properties.find(_W + 'i'))
+        template.underline = _is_on(properties.find(_W + 'u'))
+        template.strike = _is_on(properties.find(_W + 'strike'))
+        fonts = properties.find(_W + 'rFonts')
+        if fonts is not None:
+            template.font_family = (fonts.get(_W + 'ascii') or fonts.get(_W + 'eastAsia')
+                                    or fonts.get(_W + 'hAnsi'))
+        size = properties.find(_W + 'sz')
+        if size is not None and size.get(_VAL, '').isdigit():
+            template.font_size = int(size.get(_VAL)) / 2
+        color = properties.find(_W + 'color')
+        if color is not None and re.fullmatch(r'[0-9A-Fa-f]{6}', color.get(_VAL, '')):
+            template.color = '#' + color.get(_VAL).lower()
+
+    parts = []
+    for child in run:
+        tag = child.tag
+        if tag == _W + 't':
+            parts.append(child.text or '')
+        elif tag == _W + 'tab':
+            parts.append('\t')
+        elif tag in (_W + 'br', _W + 'cr'):
+            parts.append(LINE_BREAK)
+        elif tag == _W + 'noBreakHyphen':
+            parts.append('-')
+    if parts:
+        template.text = ''.join(parts)
+        paragraph.append(template)
+
+
+def _parse_paragraph(element, headings: Dict[str, int], lists: Dict[Tuple[str, str], str]) -> Paragraph:
+    paragraph = Paragraph()
+    properties = element.find(_W + 'pPr')
+    if properties is not None:
+        style = properties.find(_W + 'pStyle')
+        if style is not None:
+            paragraph.heading_level = headings.get(style.get(_VAL), 0)
+        alignment = properties.find(_W + 'jc')
+        if alignment is not None:
+            paragraph.alignment = _ALIGNMENTS.get(alignment.get(_VAL), ALIGN_LEFT)
+        numbering = properties.find(_W + 'numPr')
+        if numbering is not None:
+            num_id = numbering.find(_W + 'numId')
+            ilvl = numbering.find(_W + 'ilvl')
+            num_id = num_id.get(_VAL) if num_id is not None else '0'
+            ilvl = ilvl.get(_VAL, '0') if ilvl is not None else '0'
+            if num_id != '0':
+                paragraph.list_style = lists.get((num_id, ilvl), LIST_BULLET)
+                paragraph.list_level = int(ilvl) if ilvl.isdigit() else 0
+    # 超链接、修订标记中的文字也在 w:r 里；文本框中的段落已在各自结束时单独产出并移除
+    for run in element.iter(_R):
+        _parse_run(run, paragraph)
+    return paragraph
+
+
+def iter_docx_paragraphs(path: str) -> Iterator[Tuple[Paragraph, int]]:
+    """增量解析 word/document.xml，逐段产出(段落, 已解析的字节数)
+
+    每段解析完后从 XML 树中移除，内存占用与文档长度无关。
+    表格中的段落按顺序展开为普通段落。
+    """
+    with zipfile.ZipFile(path) as zf:
+        headings = _heading_styles(zf)
+        lists = _list_styles(zf)
+        parser = XMLPullParser(events=('start', 'end'))
+        stack = []
+        done = 0
+        with zf.open(DOCUMENT_PART) as f:
+            while True:
+                data = f.read(READ_CHUNK_SIZE)
+                if data:
+                    done += len(data)
+                    parser.feed(data)
+                else:
+                    parser.close()
+                for event, element in parser.read_events():
+                    if event == 'start':
+                        stack.append(element)
+                        continue
+                    stack.pop()
+                    if element.tag == _P:
+                        yield _parse_paragraph(element, headings, lists), done
+                    if element.tag in (_P, _TBL) and stack:
+                        stack[-1].remove(element)
+                if not data:
+                    break
+
+
+# ---- 写入 ----
+
+_CONTENT_TYPES = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">
+<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>
+<Default Extension="xml" ContentType="application/xml"/>
+<Override PartName="/word/document.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.document.main+xml"/>
+<Override PartName="/word/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.styles+xml"/>
+<Override PartName="/word/numbering.xml" ContentType="application/vnd.openxmlformats-officedocument.wordprocessingml.numbering+xml"/>
+</Types>"""
+
+_PACKAGE_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="word/document.xml"/>
+</Relationships>"""
+
+_DOCUMENT_RELS = """<?xml version="1.0" encoding="UTF-8" standalone="yes"?>
+<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">
+<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>
+<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/numbering" Target="numbering.xml"/>
+</Relationships>"""
+
+# 写出的列表编号 ID
+_NUM_IDS = {LIST_BULLET: 1, LIST_NUMBER: 2}
+
+
+def _styles_xml() -> str:
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>',
+        f'<w:styles xmlns:w="{W_NS}">',
+        '<w:style w:type="paragraph" w:default="1" w:styleId="Normal"><w:name w:val="Normal"/></w:style>',
+    ]
+    for level in range(1, MAX_HEADING_LEVEL + 1):
+        parts.append(
+            f'<w:style w:type="paragraph" w:styleId="Heading{level}"><w:name w:val="heading {level}"/>'
+            f'<w:basedOn w:val="Normal"/><w:next w:val="Normal"/><w:qFormat/>'
+            f'<w:pPr><w:keepNext/><w:outlineLvl w:val="{level - 1}"/></w:pPr>'
+            f'<w:rPr><w:b/><w:sz w:val="{HEADING_POINT_SIZES[level] * 2}"/></w:rPr></w:style>'
+        )
+    parts.append('</w:styles>')
+    return ''.join(parts)
+
+
+def _numbering_xml() -> str:
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>',
+        f'<w:numbering xmlns:w="{W_NS}">',
+    ]
+    for abstract_id, (num_fmt, text) in enumerate((('bullet', '\u2022'), ('decimal', None))):
+        parts.append(f'<w:abstractNum w:abstractNumId="{abstract_id}">')
+        for ilvl in range(9):
+            level_text = text or f'%{ilvl + 1}.'
+            parts.append(
+                f'<w:lvl w:ilvl="{ilvl}"><w:start w:val="1"/><w:numFmt w:val="{num_fmt}"/>'
+                f'<w:lvlText w:val="{level_text}"/><w:lvlJc w:val="left"/>'
+                f'<w:pPr><w:ind w:left="{720 * (ilvl + 1)}" w:hanging="360"/></w:pPr></w:lvl>'
+            )
+        parts.append('</w:abstractNum>')
+    for num_id in _NUM_IDS.values():
+        parts.append(f'<w:num w:numId="{num_id}"><w:abstractNumId w:val="{num_id - 1}"/></w:num>')
+    parts.append('</w:numbering>')
+    return ''.join(parts)
+
+
+def _run_xml(run: TextRun, parts: List[str]):
+    properties = []
+    if run.font_family:
+        family = quoteattr(_INVALID_XML_RE.sub('', run.font_family))
+        properties.append(f'<w:rFonts w:ascii={family} w:hAnsi={family} w:eastAsia={family}/>')
+    if run.bold:
+        properties.append('<w:b/>')
+    if run.italic:
+        properties.append('<w:i/>')
+    if run.strike:
+        properties.append('<w:strike/>')
+    if run.color:
+        properties.append(f'<w:color w:val="{run.color.lstrip("#")}"/>')
+    if run.font_size:
+        properties.append(f'<w:sz w:val="{round(run.font_size * 2)}"/>')
+    if run.underline:
+        properties.append('<w:u w:val="single"/>')
+
+    parts.append('<w:r>')
+    if properties:
+        parts.append('<w:rPr>')
+        parts.extend(properties)
+        parts.append('</w:rPr>')
+    for piece in _RUN_SPLIT_RE.split(_INVALID_XML_RE.sub('', run.text)):
+        if piece == '\t':
+            parts.append('<w:tab/>')
+        elif piece == LINE_BREAK:
+            parts.append('<w:br/>')
+        elif piece:
+            parts.append(f'<w:t xml:space="preserve">{escape(piece)}</w:t>')
+    parts.append('</w:r>')
+
+
+def _paragraph_xml(paragraph: Paragraph, parts: List[str]):
+    properties = []
+    if paragraph.heading_level:
+        properties.append(f'<w:pStyle w:val="Heading{min(paragraph.heading_level, MAX_HEADING_LEVEL)}"/>')
+    if paragraph.list_style:
+        properties.append(f'<w:numPr><w:ilvl w:val="{min(paragraph.list_level, 8)}"/>'
+                          f'<w:numId w:val="{_NUM_IDS[paragraph.list_style]}"/></w:numPr>')
+    if paragraph.alignment in _JC_VALUES:
+        properties.append(f'<w:jc w:val="{_JC_VALUES[paragraph.alignment]}"/>')
+
+    parts.append('<w:p>')
+    if properties:
+        parts.append('<w:pPr>')
+        parts.extend(properties)
+        parts.append('</w:pPr>')
+    for run in paragraph.runs:
+        _run_xml(run, parts)
+    parts.append('</w:p>')
+
+
+def write_docx(paragraphs: Iterable[Paragraph]) -> bytes:
+    """生成完整的 docx 文件内容
+
+    只写出段落、文字格式、标题和列表；片段收集到列表中最后一次拼接，
+    长文档也不会反复复制字符串。
+    """
+    parts = [
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>',
+        f'<w:document xmlns:w="{W_NS}"><w:body>',
+    ]
+    empty = True
+    for paragraph in paragraphs:
+        _paragraph_xml(paragraph, parts)
+        empty = False
+    if empty:
+        # Word 要求正文至少有一个段落
+        parts.append('<w:p/>')
+    parts.append('</w:body></w:document>')
+
+    buffer = io.BytesIO()
+    with zipfile.ZipFile(buffer, 'w', zipfile.ZIP_DEFLATED) as zf:
+        zf.writestr('[Content_Types].xml', _CONTENT_TYPES)
+        zf.writestr('_rels/.rels', _PACKAGE_RELS)
+        zf.writestr('word/_rels/document.xml.rels', _DOCUMENT_RELS)
+        zf.writestr(DOCUMENT_PART, ''.join(parts))
+        zf.writestr(STYLES_PART, _styles_xml())
+        zf.writestr(NUMBERING_PART, _numbering_xml())
+    return buffer.getvalue()
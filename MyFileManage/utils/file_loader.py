@@ -0,0 +1,43 @@
+import codecs
+import io
+import mmap
+import os
+from typing import Iterator, Tuple
+
+# 每次读取并插入编辑器的字节数
+CHUNK_SIZE = 256 * 1024
+# 超过该大小时用 mmap 读取，避免缓冲区的额外复制
+MMAP_THRESHOLD = 4 * 1024 * 1024
+
+
+def _iter_byte_chunks(f, size: int, chunk_size: int) -> Iterator[bytes]:
+    if size >= MMAP_THRESHOLD:
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            for offset in range(0, size, chunk_size):
+                yield mm[offset:offset + chunk_size]
+    else:
+        while True:
+            data = f.read(chunk_size)
+            if not data:
+                break
+            yield data
+
+
+def iter_text_chunks(file_path: str, chunk_size: int = CHUNK_SIZE,
+                     encoding: str = 'utf-8') -> Iterator[Tuple[str, int]]:
+    """分块读取文本文件，逐块产出(文本, 已读取字节数)
+
+    使用增量解码器，多字节字符和 \\r\\n 被切断在块边界时也能正确处理。
+    """
+    decoder = io.IncrementalNewlineDecoder(codecs.getincrementaldecoder(encoding)(), translate=True)
+    with open(file_path, 'rb') as f:
+        size = os.fstat(f.fileno()).st_size
+        done = 0
+        for data in _iter_byte_chunks(f, size, chunk_size):
+            done += len(data)
+            text = decoder.decode(data)
+            if text:
+                yield text, done
+        tail = decoder.decode(b'', final=True)
+        if tail:
+            yield tail, done
@@ -1,37 +1,395 @@
+import errno
 import os
-from typing import Optional
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Optional, Set, Tuple
 
 from models.document import DocumentType
+from utils import tracing
 
+# 单次内核拷贝的最大字节数
+COPY_CHUNK_SIZE = 64 * 1024 * 1024
+# 批量导入的默认并发数
+IMPORT_WORKERS = 8
 
-def import_file(src_path: str, dest_dir: str) -> Optional[str]:
-    """导入文件到目标目录"""
-    if not os.path.exists(src_path):
-        return None
+# 导入内容已存在时的处理方式
+DEDUP_SKIP = 'skip'  # 不导入，记录已存在的文件
+DEDUP_LINK = 'link'  # 在目标目录创建指向已有文件的硬链接
+
+
+def copy_file(src_path: str, dest_path: str):
+    """在内核中复制文件内容，不经过 Python 内存
+
+    优先使用 copy_file_range，其次 sendfile，都不可用时退回到分块复制。
+    目标文件必须不存在，避免覆盖并发创建的同名文件。
+    """
+    with open(src_path, 'rb') as src_file, open(dest_path, 'xb') as dest_file:
+        try:
+            _copy_fd(src_file, dest_file)
+        except BaseException:
+            dest_file.close()
+            os.remove(dest_path)
+            raise
+
+
+def _copy_fd(src_file, dest_file):
+    size = os.fstat(src_file.fileno()).st_size
+    src_fd, dest_fd = src_file.fileno(), dest_file.fileno()
+    copied = 0
+    for copy in (getattr(os, 'copy_file_range', None), getattr(os, 'sendfile', None)):
+        if copy is None:
+            continue
+        try:
+            # sendfile 写入目标文件的当前位置，copy_file_range 使用显式偏移
+            os.lseek(dest_fd, copied, os.SEEK_SET)
+            while copied < size:
+                count = min(COPY_CHUNK_SIZE, size - copied)
+                if copy is os.sendfile:
+                    sent = os.sendfile(dest_fd, src_fd, copied, count)
+                else:
+                    sent = os.copy_file_range(src_fd, dest_fd, count, copied, copied)
+                if sent == 0:
+                    break
+                copied += sent
+            if copied >= size:
+                return
+        except OSError:
+            # 跨文件系统或文件系统不支持时换下一种方式
+            continue
+    src_file.seek(copied)
+    dest_file.seek(copied)
+    shutil.copyfileobj(src_file, dest_file, 1024 * 1024)
+
+
+def _copy_entry(src_path: str, dest_path: str):
+    if os.path.islink(src_path):
+        os.symlink(os.readlink(src_path), dest_path)
+    else:
+        copy_file(src_path, dest_path)
+        shutil.copystat(src_path, dest_path)
+
+
+def count_tree(path: str) -> int:
+    """文件或目录树中的条目数，包括目录自身；不进入符号链接指向的目录"""
+    if not os.path.isdir(path) or os.path.islink(path):
+        return 1
+    count = 1
+    for _, dirs, files in os.walk(path):
+        count += len(dirs) + len(files)
+    return count
+
+
+def _raise(error):
+    raise error
+
+
+def remove_tree(path: str, progress: Optional[Callable[[int], None]] = None,
+                is_cancelled: Optional[Callable[[], bool]] = None) -> bool:
+    """自底向上逐个删除文件或目录树，progress 收到已删除的条目数
+
+    取消时返回 False，已删除的部分不会恢复。
+    """
+    if not os.path.isdir(path) or os.path.islink(path):
+        os.remove(path)
+        if progress:
+            progress(1)
+        return True
+
+    removed = 0
+    for dir_path, dirs, files in os.walk(path, topdown=False, onerror=_raise):
+        # 子目录已在之前被删空；指向目录的符号链接出现在 dirs 中，要按文件删除
+        for name, is_dir in [(name, False) for name in files] + [(name, True) for name in dirs]:
+            if is_cancelled and is_cancelled():
+                return False
+            entry = os.path.join(dir_path, name)
+            if is_dir and not os.path.islink(entry):
+                os.rmdir(entry)
+            else:
+                os.remove(entry)
+            removed += 1
+            if progress:
+                progress(removed)
+    os.rmdir(path)
+    if progress:
+        progress(removed + 1)
+    return True
+
+
+def move_path(src_path: str, dest_path: str, progress: Optional[Callable[[int, int], None]] = None,
+              is_cancelled: Optional[Callable[[], bool]] = None) -> bool:
+    """把文件或目录移动到 dest_path(必须不存在)，返回是否完成
+
+    同一文件系统内只是一次改名。跨文件系统时先逐个复制再删除源，progress 收到(已处理数, 总数)；
+    复制阶段被取消时删除已复制的部分，源保持不变。
+    """
+    src_path, dest_path = os.path.abspath(src_path), os.path.abspath(dest_path)
+    if dest_path == src_path or dest_path.startswith(src_path + os.sep):
+        raise ValueError("不能移动到自身或其子目录中")
+    if os.path.lexists(dest_path):
+        raise FileExistsError(errno.EEXIST, "目标已存在", dest_path)
+    try:
+        os.rename(src_path, dest_path)
+        return True
+    except OSError as e:
+        if e.errno != errno.EXDEV:
+            raise
+
+    total = count_tree(src_path) * 2
+    copied = 0
+    try:
+        if os.path.isdir(src_path) and not os.path.islink(src_path):
+            for dir_path, dirs, files in os.walk(src_path, onerror=_raise):
+                target_dir = os.path.normpath(os.path.join(dest_path, os.path.relpath(dir_path, src_path)))
+                os.mkdir(target_dir)
+                copied += 1
+                for name in files + [name for name in dirs if os.path.islink(os.path.join(dir_path, name))]:
+                    if is_cancelled and is_cancelled():
+                        remove_tree(dest_path)
+                        return False
+                    _copy_entry(os.path.join(dir_path, name), os.path.join(target_dir, name))
+                    copied += 1
+                    if progress:
+                        progress(copied, total)
+        else:
+            _copy_entry(src_path, dest_path)
+            copied += 1
+    except BaseException:
+        if os.path.lexists(dest_path):
+            remove_tree(dest_path)
+        raise
+
+    # 复制完成后删除源，这一步不再响应取消，避免两边各留一部分
+    remove_tree(src_path, (lambda removed: progress(copied + removed, total)) if progress else None)
+    return True
+
+
+class NameAllocator:
+    """在目标目录中分配不冲突的文件名
+
+    只列一次目录，之后在内存中判断冲突；每个文件名记住下一个可用序号，
+    大量同名文件导入时不会反复从 _1 开始探测。
+    """
+
+    def __init__(self, dest_dir: str):
+        self.dest_dir = dest_dir
+        self.used: Set[str] = set(os.listdir(dest_dir)) if os.path.isdir(dest_dir) else set()
+        self.next_counter: Dict[str, int] = {}
+        self._lock = threading.Lock()
 
-    filename = os.path.basename(src_path)
-    dest_path = os.path.join(dest_dir, filename)
+    def allocate(self, filename: str) -> str:
+        """返回目标路径并占用该名称"""
+        with self._lock:
+            if filename not in self.used:
+                self.used.add(filename)
+                return os.path.join(self.dest_dir, filename)
 
-    if os.path.exists(dest_path):
-        base, ext = os.path.splitext(filename)
-        counter = 1
-        while True:
+            base, ext = os.path.splitext(filename)
+            counter = self.next_counter.get(filename, 1)
+            while f"{base}_{counter}{ext}" in self.used:
+                counter += 1
             new_filename = f"{base}_{counter}{ext}"
-            new_dest_path = os.path.join(dest_dir, new_filename)
-            if not os.path.exists(new_dest_path):
-                dest_path = new_dest_path
-                break
-            counter += 1
+            self.next_counter[filename] = counter + 1
+            self.used.add(new_filename)
+            return os.path.join(self.dest_dir, new_filename)
 
+
+def import_file(src_path: str, dest_dir: str, dedup=None) -> Optional[str]:
+    """导入文件到目标目录
+
+    给定 dedup(DedupStore) 时，内容已存在的文件不再复制，直接返回已有文件的路径。
+    """
+    if not os.path.exists(src_path):
+        return None
+
+    if dedup is not None:
+        existing, _, _ = dedup.find_existing(src_path)
+        if existing is not None:
+            return existing
+
+    dest_path = NameAllocator(dest_dir).allocate(os.path.basename(src_path))
     try:
-        with open(src_path, 'rb') as src_file, open(dest_path, 'wb') as dest_file:
-            dest_file.write(src_file.read())
+        copy_file(src_path, dest_path)
         return dest_path
     except Exception as e:
         print(f"Error importing file: {e}")
         return None
 
 
+@dataclass
+class ImportProgress:
+    files_done: int
+    files_total: int
+    bytes_done: int
+    bytes_total: int
+    elapsed: float
+
+    @property
+    def throughput(self) -> float:
+        """每秒复制的字节数"""
+        return self.bytes_done / self.elapsed if self.elapsed > 0 else 0.0
+
+
+@dataclass
+class ImportResult:
+    imported: List[Tuple[str, str]] = field(default_factory=list)  # (源路径, 目标路径)
+    failed: List[Tuple[str, str]] = field(default_factory=list)  # (源路径, 错误信息)
+    skipped: List[Tuple[str, str]] = field(default_factory=list)  # (源路径, 内容相同的已有文件)
+    linked: int = 0  # imported 中以硬链接方式导入的数量
+    bytes_copied: int = 0
+    elapsed: float = 0.0
+    cancelled: bool = False
+
+
+class BulkImporter:
+    """把大量文件或整个目录树并行导入到目标目录
+
+    目录按原有结构导入，其中只复制受支持的文档类型。
+    给定 dedup(DedupStore) 时，内容已存在于文档根目录的文件按 dedup_mode 跳过或硬链接。
+    """
+
+    def __init__(self, dest_dir: str, max_workers: int = IMPORT_WORKERS,
+                 dedup=None, dedup_mode: str = DEDUP_SKIP):
+        self.dest_dir = dest_dir
+        self.max_workers = max_workers
+        self.dedup = dedup
+        self.dedup_mode = dedup_mode
+        self._allocators: Dict[str, NameAllocator] = {}
+        self._lock = threading.Lock()
+
+    def _allocator(self, dest_dir: str) -> NameAllocator:
+        with self._lock:
+            allocator = self._allocators.get(dest_dir)
+            if allocator is None:
+                allocator = self._allocators[dest_dir] = NameAllocator(dest_dir)
+            return allocator
+
+    def _allocate_directory(self, parent_dir: str, name: str) -> str:
+        """在目标中创建目录；同名目录已存在时使用新的名称"""
+        dest_path = self._allocator(parent_dir).allocate(name)
+        os.makedirs(dest_path)
+        return dest_path
+
+    def plan(self, sources: Iterable[str]) -> List[Tuple[str, str, int]]:
+        """展开源路径，返回 [(源文件, 目标目录, 大小)]，并创建需要的目录"""
+        tasks = []
+        for src in sources:
+            if os.path.isdir(src):
+                src_abs = os.path.abspath(src)
+                if os.path.commonpath([src_abs, os.path.abspath(self.dest_dir)]) == src_abs:
+                    print(f"Error importing directory: {src} contains the destination")
+                    continue
+                top = self._allocate_directory(self.dest_dir, os.path.basename(os.path.normpath(src)))
+                for root, dirs, files in os.walk(src):
+                    dirs[:] = sorted(d for d in dirs if not d.startswith('.'))
+                    rel = os.path.relpath(root, src)
+                    dest_root = top if rel == '.' else os.path.join(top, rel)
+                    os.makedirs(dest_root, exist_ok=True)
+                    for name in sorted(files):
+                        if get_document_type(name) is None:
+                            continue
+                        path = os.path.join(root, name)
+                        try:
+                            tasks.append((path, dest_root, os.path.getsize(path)))
+                        except OSError:
+                            continue
+            elif os.path.isfile(src):
+                tasks.append((src, self.dest_dir, os.path.getsize(src)))
+        return tasks
+
+    def _copy_one(self, src: str, dest_dir: str, link_target: Optional[str] = None) -> Tuple[str, bool]:
+        """返回 (目标路径, 是否为硬链接)"""
+        with tracing.span('import_file', 'import', path=src):
+            dest_path = self._allocator(dest_dir).allocate(os.path.basename(src))
+            if link_target is not None:
+                try:
+                    os.link(link_target, dest_path)
+                    return dest_path, True
+                except OSError:
+                    # 跨文件系统或不支持硬链接时退回到复制
+                    pass
+            copy_file(src, dest_path)
+            return dest_path, False
+
+    def _find_duplicates(self, tasks, result):
+        """在调用线程中查重，返回 (需要导入的任务, {源路径: 已知哈希}, {源路径: 链接目标})"""
+        remaining = []
+        hashes = {}
+        links = {}
+        self.dedup.refresh()
+        for src, dest_dir, size in tasks:
+            try:
+                existing, partial, full = self.dedup.find_existing(src)
+            except OSError:
+                existing, partial, full = None, None, None
+            hashes[src] = (partial, full)
+            if existing is None:
+                remaining.append((src, dest_dir, size))
+            elif self.dedup_mode == DEDUP_LINK:
+                links[src] = existing
+                remaining.append((src, dest_dir, size))
+            else:
+                result.skipped.append((src, existing))
+        return remaining, hashes, links
+
+    @tracing.traced('bulk_import', 'import')
+    def run(self, sources: Iterable[str],
+            progress: Optional[Callable[[ImportProgress], None]] = None,
+            is_cancelled: Optional[Callable[[], bool]] = None) -> ImportResult:
+        """执行导入；progress 在调用线程中回调"""
+        start = time.monotonic()
+        result = ImportResult()
+        with tracing.span('import_plan', 'import'):
+            tasks = self.plan(sources)
+        hashes, links = {}, {}
+        if self.dedup is not None:
+            with tracing.span('import_dedup', 'import', files=len(tasks)):
+                tasks, hashes, links = self._find_duplicates(tasks, result)
+        bytes_total = sum(size for src, _, size in tasks if src not in links)
+
+        with ThreadPoolExecutor(max_workers=self.max_workers) as executor:
+            futures = {executor.submit(self._copy_one, src, dest_dir, links.get(src)): (src, size)
+                       for src, dest_dir, size in tasks}
+            for future in as_completed(futures):
+                src, size = futures[future]
+                try:
+                    dest_path, linked = future.result()
+                    result.imported.append((src, dest_path))
+                    if linked:
+                        result.linked += 1
+                    else:
+                        result.bytes_copied += size
+                except Exception as e:
+                    if not future.cancelled():
+                        result.failed.append((src, str(e)))
+
+                if is_cancelled and is_cancelled() and not result.cancelled:
+                    result.cancelled = True
+                    for pending in futures:
+                        pending.cancel()
+                if progress:
+                    progress(ImportProgress(
+                        files_done=len(result.imported) + len(result.failed),
+                        files_total=len(tasks),
+                        bytes_done=result.bytes_copied,
+                        bytes_total=bytes_total,
+                        elapsed=time.monotonic() - start
+                    ))
+
+        if self.dedup is not None:
+            # 新文件加入哈希索引，之后的导入可以直接比对
+            for src, dest in result.imported:
+                try:
+                    self.dedup.register(dest, *hashes.get(src, (None, None)))
+                except OSError:
+                    continue
+
+        result.elapsed = time.monotonic() - start
+        return result
+
+
 def get_document_type(filename: str) -> Optional[DocumentType]:
     """根据文件名获取文档类型"""
     _, ext = os.path.splitext(filename)
@@ -39,4 +397,4 @@ def get_document_type(filename: str) -> Optional[DocumentType]:
     try:
         return DocumentType(ext.lower())
     except ValueError:
-        return None
\ No newline at end of file
+        return None
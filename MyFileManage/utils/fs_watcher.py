@@ -0,0 +1,299 @@
+import ctypes
+import ctypes.util
+import os
+import select
+import struct
+import threading
+import time
+from dataclasses import dataclass, field
+from typing import Callable, Dict, Iterable, List, Set, Tuple
+
+# inotify 常量，见 <sys/inotify.h>
+IN_ATTRIB = 0x00000004
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_DELETE_SELF = 0x00000400
+IN_MOVE_SELF = 0x00000800
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ONLYDIR = 0x01000000
+IN_NONBLOCK = 0o4000
+IN_CLOEXEC = 0o2000000
+
+WATCH_MASK = (IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE |
+              IN_DELETE | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR)
+_EVENT_HEADER = struct.Struct('iIII')
+
+# 最后一个事件之后等待多久再提交(秒)
+COALESCE_DELAY = 0.3
+# 持续有事件时最长等待多久必须提交一次(秒)
+MAX_DELAY = 2.0
+# 轮询模式的扫描间隔(秒)
+POLL_INTERVAL = 2.0
+
+
+@dataclass
+class ChangeBatch:
+    """一次合并后的文件变化"""
+    paths: Set[str] = field(default_factory=set)  # 发生变化的文件或目录
+    overflow: bool = False  # 事件队列溢出，需要全量刷新
+
+    @property
+    def directories(self) -> Set[str]:
+        """内容发生变化的目录"""
+        return {os.path.dirname(path) for path in self.paths}
+
+
+class _InotifyBackend:
+    """Linux inotify，每个目录一个非递归监视
+
+    add、remove 在界面线程中调用，read_events 在监视线程中调用，两个字典由 lock 保护。
+    """
+
+    def __init__(self):
+        self.libc = ctypes.CDLL(ctypes.util.find_library('c') or 'libc.so.6', use_errno=True)
+        self.fd = self.libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self.fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self.wd_to_path: Dict[int, str] = {}
+        self.path_to_wd: Dict[str, int] = {}
+        self.lock = threading.Lock()
+
+    def add(self, path: str):
+        with self.lock:
+            wd = self.libc.inotify_add_watch(self.fd, os.fsencode(path), WATCH_MASK)
+            if wd < 0:
+                raise OSError(ctypes.get_errno(), f"inotify_add_watch failed: {path}")
+            self.wd_to_path[wd] = path
+            self.path_to_wd[path] = wd
+
+    def paths(self) -> Set[str]:
+        with self.lock:
+            return set(self.path_to_wd)
+
+    def remove(self, path: str):
+        with self.lock:
+            wd = self.path_to_wd.pop(path, None)
+            if wd is not None:
+                self.wd_to_path.pop(wd, None)
+                self.libc.inotify_rm_watch(self.fd, wd)
+
+    def read_events(self, timeout: float) -> Tuple[List[str], bool]:
+        readable, _, _ = select.select([self.fd], [], [], timeout)
+        if not readable:
+            return [], False
+        try:
+            data = os.read(self.fd, 64 * 1024)
+        except BlockingIOError:
+            return [], False
+
+        with self.lock:
+            return self._parse(data)
+
+    def _parse(self, data: bytes) -> Tuple[List[str], bool]:
+        paths = []
+        overflow = False
+        offset = 0
+        while offset + _EVENT_HEADER.size <= len(data):
+            wd, mask, _cookie, length = _EVENT_HEADER.unpack_from(data, offset)
+            offset += _EVENT_HEADER.size
+            name = data[offset:offset + length].rstrip(b'\0')
+            offset += length
+
+            if mask & IN_Q_OVERFLOW:
+                overflow = True
+                continue
+            directory = self.wd_to_path.get(wd)
+            if directory is None:
+                continue
+            if mask & IN_IGNORED:
+                # 目录被删除或监视被移除
+                self.wd_to_path.pop(wd, None)
+                if self.path_to_wd.get(directory) == wd:
+                    del self.path_to_wd[directory]
+                continue
+            paths.append(os.path.join(directory, os.fsdecode(name)) if name else directory)
+        return paths, overflow
+
+    def close(self):
+        os.close(self.fd)
+
+
+class _PollingBackend:
+    """没有 inotify 时定期比较目录快照
+
+    快照字典由 lock 保护；扫描目录不持有锁，写回前确认目录仍被监视且快照没有被替换。
+    """
+
+    def __init__(self, interval: float = POLL_INTERVAL):
+        self.interval = interval
+        self.snapshots: Dict[str, Dict[str, Tuple[int, int]]] = {}
+        self.lock = threading.Lock()
+        self._next_poll = time.monotonic() + interval
+        self._wakeup = threading.Event()
+
+    @staticmethod
+    def _snapshot(path: str) -> Dict[str, Tuple[int, int]]:
+        snapshot = {}
+        with os.scandir(path) as it:
+            for entry in it:
+                try:
+                    st = entry.stat(follow_symlinks=False)
+                except OSError:
+                    continue
+                snapshot[entry.name] = (st.st_mtime_ns, st.st_size)
+        return snapshot
+
+    def add(self, path: str):
+        with self.lock:
+            if path in self.snapshots:
+                return
+        snapshot = self._snapshot(path)
+        with self.lock:
+            self.snapshots.setdefault(path, snapshot)
+
+    def paths(self) -> Set[str]:
+        with self.lock:
+            return set(self.snapshots)
+
+    def remove(self, path: str):
+        with self.lock:
+            self.snapshots.pop(path, None)
+
+    def read_events(self, timeout: float) -> Tuple[List[str], bool]:
+        if time.monotonic() < self._next_poll:
+            self._wakeup.wait(timeout)
+            return [], False
+        self._next_poll = time.monotonic() + self.interval
+
+        with self.lock:
+            watched = list(self.snapshots.items())
+        paths = []
+        for directory, old in watched:
+            try:
+                new = self._snapshot(directory)
+            except OSError:
+                new = None
+            with self.lock:
+                # 扫描期间目录可能已被移除监视或重新添加，此时放弃这次的结果
+                if self.snapshots.get(directory) is not old:
+                    continue
+                if new is None:
+                    del self.snapshots[directory]
+                    paths.append(directory)
+                    continue
+                self.snapshots[directory] = new
+            for name in old.keys() | new.keys():
+                if old.get(name) != new.get(name):
+                    paths.append(os.path.join(directory, name))
+        return paths, False
+
+    def close(self):
+        self._wakeup.set()
+
+
+class FileSystemWatcher:
+    """监视目录变化，把短时间内的大量事件合并成一次回调
+
+    callback 在监视线程中调用，参数为 ChangeBatch。
+    """
+
+    def __init__(self, callback: Callable[[ChangeBatch], None], use_inotify: bool = True):
+        self.callback = callback
+        self.backend = None
+        if use_inotify:
+            try:
+                self.backend = _InotifyBackend()
+            except (OSError, AttributeError):
+                self.backend = None
+        if self.backend is None:
+            self.backend = _PollingBackend()
+
+        self._pending = ChangeBatch()
+        self._first_event = 0.0
+        self._last_event = 0.0
+        self._lock = threading.Lock()
+        self._stopped = threading.Event()
+        self._thread = None
+
+    @property
+    def watched(self) -> Set[str]:
+        """当前被监视的目录；被删除的目录会自动移除"""
+        return self.backend.paths()
+
+    @property
+    def is_polling(self) -> bool:
+        return isinstance(self.backend, _PollingBackend)
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, daemon=True)
+            self._thread.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        self.backend.close()
+
+    def watch(self, path: str):
+        try:
+            self.backend.add(path)
+        except OSError as e:
+            # 例如超出 max_user_watches，变化只能通过 notify 得知
+            print(f"Error watching directory: {e}")
+
+    def unwatch(self, path: str):
+        self.backend.remove(path)
+
+    def unwatch_missing(self):
+        """移除已被删除或移走的目录的监视"""
+        for path in self.watched:
+            if not os.path.isdir(path):
+                self.unwatch(path)
+
+    def unwatch_all(self):
+        for path in list(self.watched):
+            self.unwatch(path)
+
+    def notify(self, paths: Iterable[str]):
+        """手动报告变化，例如程序自身执行的文件操作"""
+        self._add_events(list(paths), False)
+
+    def _add_events(self, paths: List[str], overflow: bool):
+        if not paths and not overflow:
+            return
+        now = time.monotonic()
+        with self._lock:
+            if not self._pending.paths and not self._pending.overflow:
+                self._first_event = now
+            self._last_event = now
+            self._pending.paths.update(paths)
+            self._pending.overflow |= overflow
+
+    def _take_batch(self):
+        now = time.monotonic()
+        with self._lock:
+            if not self._pending.paths and not self._pending.overflow:
+                return None
+            if now - self._last_event < COALESCE_DELAY and now - self._first_event < MAX_DELAY:
+                return None
+            batch, self._pending = self._pending, ChangeBatch()
+        return batch
+
+    def _run(self):
+        while not self._stopped.is_set():
+            try:
+                paths, overflow = self.backend.read_events(COALESCE_DELAY / 3)
+            except OSError as e:
+                print(f"Error reading file system events: {e}")
+                paths, overflow = [], True
+                time.sleep(COALESCE_DELAY)
+            self._add_events(paths, overflow)
+            batch = self._take_batch()
+            if batch is not None:
+                self.callback(batch)
@@ -0,0 +1,101 @@
+import mmap
+import os
+import threading
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Optional
+
+# 建立索引时每次扫描的字节数
+SCAN_CHUNK_SIZE = 8 * 1024 * 1024
+# 单行最多解码的字节数，超长行只显示开头
+MAX_LINE_BYTES = 64 * 1024
+
+
+class LineIndex:
+    """基于 mmap 的文件行偏移索引
+
+    offsets[i] 为第 i 行起始字节偏移，用 uint64 数组保存，每行只占 8 字节。
+    索引在后台线程中逐块建立，建立过程中已扫描部分即可使用。
+    """
+
+    def __init__(self, file_path: str):
+        self.file_path = file_path
+        self.file = open(file_path, 'rb')
+        self.size = os.fstat(self.file.fileno()).st_size
+        self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ) if self.size else None
+        self.offsets = array('Q', [0])
+        self.scanned = 0
+        self.complete = self.size == 0
+        self._cancelled = False
+        self._thread = None
+
+    def start(self):
+        """在后台线程中建立索引"""
+        if self.complete or self._thread is not None:
+            return
+        self._thread = threading.Thread(target=self.build, daemon=True)
+        self._thread.start()
+
+    def build(self):
+        base = 0
+        while base < self.size and not self._cancelled:
+            chunk = self.mm[base:base + SCAN_CHUNK_SIZE]
+            parts = chunk.split(b'\n')
+            # 每个换行符之后是下一行的开头
+            starts = accumulate((len(part) + 1 for part in parts[:-1]), initial=base)
+            next(starts)
+            self.offsets.extend(starts)
+            base += len(chunk)
+            self.scanned = base
+        if not self._cancelled:
+            # 文件以换行结尾时不存在额外的空行
+            if len(self.offsets) > 1 and self.offsets[-1] == self.size:
+                self.offsets.pop()
+            self.complete = True
+
+    def close(self):
+        self._cancelled = True
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+        self.file.close()
+
+    @property
+    def line_count(self) -> int:
+        """已知的行数；索引未完成时只包含已扫描部分"""
+        return len(self.offsets)
+
+    def line_bytes(self, line: int) -> bytes:
+        if self.mm is None or line >= len(self.offsets):
+            return b''
+        start = self.offsets[line]
+        end = self.offsets[line + 1] - 1 if line + 1 < len(self.offsets) else self.size
+        if end - start > MAX_LINE_BYTES:
+            end = start + MAX_LINE_BYTES
+        elif not self.complete and line + 1 >= len(self.offsets):
+            # 最后一行可能还没扫描完
+            newline = self.mm.find(b'\n', start, start + MAX_LINE_BYTES)
+            end = newline if newline >= 0 else min(self.size, start + MAX_LINE_BYTES)
+        return self.mm[start:end].rstrip(b'\r\n')
+
+    def line_text(self, line: int) -> str:
+        return self.line_bytes(line).decode('utf-8', errors='replace')
+
+    def line_for_offset(self, offset: int) -> Optional[int]:
+        """返回包含该字节偏移的行号；该位置尚未被索引时返回 None"""
+        if offset > self.scanned and not self.complete:
+            return None
+        return bisect_right(self.offsets, offset) - 1
+
+    def find(self, text: str, start_line: int = 0) -> Optional[int]:
+        """从指定行开始查找文本，返回所在行号"""
+        if self.mm is None or not text or start_line >= len(self.offsets):
+            return None
+        offset = self.mm.find(text.encode('utf-8'), self.offsets[start_line])
+        if offset < 0:
+            return None
+        return self.line_for_offset(offset)
@@ -0,0 +1,86 @@
+import re
+from collections import OrderedDict
+from typing import List, Tuple
+
+from markdown import markdown
+
+_FENCE_RE = re.compile(r"^ {0,3}(`{3,}|~{3,})")
+_CLOSING_FENCE_RE = re.compile(r"^ {0,3}(`{3,}|~{3,})[ \t]*$")
+_REF_DEF_RE = re.compile(r"^ {0,3}\[[^\]]+\]:\s*\S")
+_LIST_ITEM_RE = re.compile(r"^ {0,3}([-*+]|\d+[.)])\s")
+
+
+def split_blocks(text: str) -> Tuple[List[str], str]:
+    """把 Markdown 文本切分为可独立渲染的顶层块
+
+    返回(块列表, 引用式链接定义)。链接定义会附加到每个块上渲染，
+    这样块之间的引用依然有效。
+    """
+    blocks = []
+    refs = []
+    current = []
+    fence = None
+
+    def close_block():
+        if not current:
+            return
+        # 缩进的续行和相邻的列表项属于前一个块
+        first = current[0]
+        if blocks and (first[:1] in (' ', '\t') and not _LIST_ITEM_RE.match(first)
+                       or _LIST_ITEM_RE.match(first) and _LIST_ITEM_RE.match(blocks[-1])):
+            blocks[-1] = blocks[-1] + '\n\n' + '\n'.join(current)
+        else:
+            blocks.append('\n'.join(current))
+        current.clear()
+
+    for line in text.split('\n'):
+        if fence:
+            current.append(line)
+            # 只有仅由同种围栏字符组成、且不短于开头的行才结束代码块，"```python" 之类的行属于代码
+            closing = _CLOSING_FENCE_RE.match(line)
+            if closing and closing.group(1)[0] == fence[0] and len(closing.group(1)) >= len(fence):
+                fence = None
+            continue
+
+        match = _FENCE_RE.match(line)
+        if match:
+            fence = match.group(1)
+            current.append(line)
+        elif not line.strip():
+            close_block()
+        elif not current and _REF_DEF_RE.match(line):
+            refs.append(line)
+        else:
+            current.append(line)
+    close_block()
+
+    return blocks, '\n'.join(refs)
+
+
+class BlockRenderCache:
+    """按块缓存渲染结果的 LRU 缓存"""
+
+    def __init__(self, max_entries: int = 4096):
+        self.max_entries = max_entries
+        self._cache = OrderedDict()
+
+    def render(self, block: str, refs: str = '') -> str:
+        key = (block, refs)
+        html = self._cache.get(key)
+        if html is not None:
+            self._cache.move_to_end(key)
+            return html
+
+        html = markdown(f"{block}\n\n{refs}" if refs else block)
+        self._cache[key] = html
+        if len(self._cache) > self.max_entries:
+            self._cache.popitem(last=False)
+        return html
+
+    def render_document(self, text: str) -> Tuple[List[str], str, List[str]]:
+        """切分并渲染整篇文档，返回(块列表, 引用定义, 各块 HTML)"""
+        blocks, refs = split_blocks(text)
+        return blocks, refs, [self.render(block, refs) for block in blocks]
+
+    def clear(self):
+        self._cache.clear()
@@ -0,0 +1,133 @@
+import builtins
+import keyword
+import re
+from typing import List, Tuple
+
+# 行首状态：低 2 位为未结束的三引号字符串，其余位为括号嵌套深度
+STATE_NORMAL = 0
+STATE_SINGLE_TRIPLE = 1  # '''
+STATE_DOUBLE_TRIPLE = 2  # """
+_STRING_MASK = 0b11
+_DEPTH_SHIFT = 2
+# 括号深度的上限，避免状态无限增长
+MAX_DEPTH = 63
+
+# 词法单元类型
+KEYWORD = 'keyword'
+BUILTIN = 'builtin'
+SELF = 'self'
+STRING = 'string'
+COMMENT = 'comment'
+NUMBER = 'number'
+DECORATOR = 'decorator'
+DEFINITION = 'definition'  # def/class 后面的名称
+BRACKET_ERROR = 'bracket_error'  # 没有匹配的右括号
+
+Token = Tuple[int, int, str]  # (起始位置, 长度, 类型)
+
+_KEYWORDS = frozenset(keyword.kwlist) | {'match', 'case'}
+_BUILTINS = frozenset(name for name in dir(builtins) if not name.startswith('_'))
+_TRIPLES = {"'''": STATE_SINGLE_TRIPLE, '"""': STATE_DOUBLE_TRIPLE}
+_CLOSERS = {STATE_SINGLE_TRIPLE: "'''", STATE_DOUBLE_TRIPLE: '"""'}
+
+_TOKEN_RE = re.compile(r"""
+    (?P<comment>\#.*)
+  | (?P<string>[rRbBuUfF]{0,2}(?:'''|\"\"\"|'(?:[^'\\]|\\.)*(?:'|\\?$)|"(?:[^"\\]|\\.)*(?:"|\\?$)))
+  | (?P<number>(?<![\w.])(?:0[xXoObB][0-9a-fA-F_]+|(?:\d[\d_]*\.?[\d_]*|\.\d[\d_]*)(?:[eE][+-]?\d+)?[jJ]?))
+  | (?P<decorator>(?<![\w)\]])@[A-Za-z_][\w.]*)
+  | (?P<name>[A-Za-z_]\w*)
+  | (?P<open>[(\[{])
+  | (?P<close>[)\]}])
+""", re.VERBOSE)
+
+
+def _find_closing(text: str, start: int, closer: str) -> int:
+    """返回三引号字符串结束后的位置，没有结束时返回 -1；跳过反斜杠转义"""
+    pos = start
+    while True:
+        index = text.find(closer, pos)
+        if index < 0:
+            return -1
+        backslashes = 0
+        while index - backslashes - 1 >= start and text[index - backslashes - 1] == '\\':
+            backslashes += 1
+        if backslashes % 2 == 0:
+            return index + 3
+        pos = index + 1
+
+
+def lex_line(text: str, state: int) -> Tuple[List[Token], int]:
+    """对一行做词法分析，返回 (词法单元, 行尾状态)
+
+    只依赖上一行的行尾状态，因此编辑后可以从修改的行开始重新分析，
+    直到某一行的行尾状态与之前相同为止。
+    """
+    tokens: List[Token] = []
+    string_state = state & _STRING_MASK
+    depth = state >> _DEPTH_SHIFT
+    pos = 0
+
+    if string_state:
+        end = _find_closing(text, 0, _CLOSERS[string_state])
+        if end < 0:
+            if text:
+                tokens.append((0, len(text), STRING))
+            return tokens, state
+        tokens.append((0, end, STRING))
+        string_state = STATE_NORMAL
+        pos = end
+
+    expect_definition = False
+    while True:
+        match = _TOKEN_RE.search(text, pos)
+        if match is None:
+            break
+        kind = match.lastgroup
+        start, end = match.span()
+        pos = end
+        if kind == 'string':
+            value = match.group()
+            triple = value[-3:]
+            if triple in _TRIPLES:
+                closing = _find_closing(text, end, triple)
+                if closing < 0:
+                    tokens.append((start, len(text) - start, STRING))
+                    string_state = _TRIPLES[triple]
+                    break
+                end = pos = closing
+            tokens.append((start, end - start, STRING))
+        elif kind == 'name':
+            word = match.group()
+            if expect_definition:
+                tokens.append((start, end - start, DEFINITION))
+            elif word in _KEYWORDS:
+                tokens.append((start, end - start, KEYWORD))
+            elif word in ('self', 'cls'):
+                tokens.append((start, end - start, SELF))
+            elif word in _BUILTINS:
+                tokens.append((start, end - start, BUILTIN))
+            expect_definition = word in ('def', 'class')
+            continue
+        elif kind == 'open':
+            depth = min(depth + 1, MAX_DEPTH)
+        elif kind == 'close':
+            if depth == 0:
+                tokens.append((start, 1, BRACKET_ERROR))
+            else:
+                depth -= 1
+        elif kind == 'comment':
+            tokens.append((start, end - start, COMMENT))
+        elif kind == 'number':
+            tokens.append((start, end - start, NUMBER))
+        elif kind == 'decorator':
+            tokens.append((start, end - start, DECORATOR))
+        expect_definition = False
+
+    return tokens, (depth << _DEPTH_SHIFT) | string_state
+
+
+def lex_lines(lines, state: int = STATE_NORMAL):
+    """依次分析多行，逐行产生 (词法单元, 行尾状态)"""
+    for line in lines:
+        tokens, state = lex_line(line, state)
+        yield tokens, state
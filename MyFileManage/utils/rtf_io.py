@@ -0,0 +1,465 @@
+import re
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from models.rich_text import (
+    Paragraph, TextRun, ALIGN_LEFT, ALIGN_CENTER, ALIGN_RIGHT, ALIGN_JUSTIFY,
+    LIST_BULLET, LIST_NUMBER, LINE_BREAK, HEADING_POINT_SIZES
+)
+
+# 一次扫描完成词法分析：控制字、\'hh、控制符号、分组括号、换行(忽略)、普通文本
+_TOKEN_RE = re.compile(
+    r"\\([a-zA-Z]{1,32})(-?\d{1,10})? ?"
+    r"|\\'([0-9a-fA-F]{2})"
+    r"|\\([^a-zA-Z])"
+    r"|([{}])"
+    r"|[\r\n]+"
+    r"|([^\\{}\r\n]+)",
+    re.DOTALL
+)
+
+DEFAULT_CODEPAGE = 'cp1252'
+# \fcharset -> 代码页
+_CHARSET_CODEPAGES = {
+    0: 'cp1252', 128: 'cp932', 129: 'cp949', 134: 'cp936', 136: 'cp950', 161: 'cp1253',
+    162: 'cp1254', 177: 'cp1255', 178: 'cp1256', 186: 'cp1257', 204: 'cp1251',
+    222: 'cp874', 238: 'cp1250',
+}
+# 内容不显示的目标组
+_SKIPPED_DESTINATIONS = frozenset((
+    'stylesheet', 'info', 'pict', 'shppict', 'nonshppict', 'object', 'header', 'headerl',
+    'headerr', 'headerf', 'footer', 'footerl', 'footerr', 'footerf', 'footnote', 'annotation',
+    'listtable', 'listoverridetable', 'revtbl', 'rsidtbl', 'themedata', 'colorschememapping',
+    'latentstyles', 'datastore', 'xmlnstbl', 'generator', 'fldinst', 'bkmkstart', 'bkmkend',
+    'filetbl', 'mmathPr', 'userprops', 'docvar',
+))
+# 记录内容但不作为正文输出的目标组
+_CAPTURED_DESTINATIONS = frozenset(('fonttbl', 'colortbl', 'listtext', 'pntext', 'pn'))
+_ALIGNMENT_WORDS = {'ql': ALIGN_LEFT, 'qc': ALIGN_CENTER, 'qr': ALIGN_RIGHT, 'qj': ALIGN_JUSTIFY}
+_SYMBOLS = {'~': '\xa0', '_': '\u2011', '-': '', '\\': '\\', '{': '{', '}': '}'}
+_WORD_TEXT = {
+    'tab': '\t', 'line': LINE_BREAK, 'emdash': '\u2014', 'endash': '\u2013',
+    'lquote': '\u2018', 'rquote': '\u2019', 'ldblquote': '\u201c', 'rdblquote': '\u201d',
+    'bullet': '\u2022', 'emspace': '\u2003', 'enspace': '\u2002',
+}
+# 这些控制字结束当前段落；表格单元格按顺序展开为段落
+_PARAGRAPH_BREAKS = frozenset(('par', 'sect', 'page', 'cell', 'row'))
+
+
+class _GroupState:
+    """分组内的字符格式，进入 { 时复制，遇到 } 时恢复"""
+    __slots__ = ('bold', 'italic', 'underline', 'strike', 'font', 'size', 'color',
+                 'uc', 'destination', 'skip')
+
+    def __init__(self):
+        self.bold = self.italic = self.underline = self.strike = False
+        self.font = None
+        self.size = None  # 半磅
+        self.color = 0
+        self.uc = 1
+        self.destination = None
+        self.skip = False
+
+    def copy(self):
+        other = _GroupState.__new__(_GroupState)
+        for name in _GroupState.__slots__:
+            setattr(other, name, getattr(self, name))
+        return other
+
+    def reset_format(self):
+        self.bold = self.italic = self.underline = self.strike = False
+        self.font = None
+        self.size = None
+        self.color = 0
+
+    def format_key(self):
+        return self.bold, self.italic, self.underline, self.strike, self.font, self.size, self.color
+
+
+class _RtfParser:
+    """把 RTF 词法单元映射为段落；文字先收集到列表，格式变化或段落结束时一次拼接"""
+
+    def __init__(self):
+        self.state = _GroupState()
+        self.stack = []
+        self.codepage = DEFAULT_CODEPAGE
+        self.default_font = None
+        self.fonts = {}  # 字体号 -> (名称, 代码页)
+        self.font_id = None
+        self.font_charsets = {}
+        self.font_name_parts = []
+        self.colors = []  # 颜色号 -> '#rrggbb'，0 号一般为空，表示自动颜色
+        self.rgb = None
+        self.paragraph = Paragraph()
+        self.pieces = []
+        self.piece_key = None
+        self.pending_bytes = bytearray()
+        self.pending_skip = 0
+        self.high_surrogate = None
+        # 列表信息：\ls 或 \pn 出现时为列表段落，样式来自 \pn 或列表编号的文字
+        self.in_list = False
+        self.list_style = None
+        self.list_level = 0
+        self.list_text = []
+        self.expect_destination = False
+
+    # ---- 文字 ----
+
+    def flush_run(self):
+        if not self.pieces:
+            return
+        bold, italic, underline, strike, font, size, color = self.piece_key
+        # 默认字体即编辑器字体，不写成文字格式
+        font_name = self.fonts.get(font, (None, None))[0] if font != self.default_font else None
+        self.paragraph.append(TextRun(
+            ''.join(self.pieces), bold=bold, italic=italic, underline=underline, strike=strike,
+            font_family=font_name or None,
+            font_size=size / 2 if size else None,
+            color=self.colors[color] if 0 < color < len(self.colors) else None,
+        ))
+        self.pieces = []
+
+    def add_text(self, text):
+        if self.pending_skip:
+            skipped = min(self.pending_skip, len(text))
+            self.pending_skip -= skipped
+            text = text[skipped:]
+            if not text:
+                return
+        state = self.state
+        if state.skip:
+            return
+        destination = state.destination
+        if destination is not None:
+            if destination == 'fonttbl':
+                self.add_font_name(text)
+            elif destination == 'colortbl':
+                for _ in range(text.count(';')):
+                    self.colors.append(self.rgb)
+                    self.rgb = None
+            elif destination in ('listtext', 'pntext'):
+                self.list_text.append(text)
+            return
+        key = state.format_key()
+        if key != self.piece_key:
+            self.flush_run()
+            self.piece_key = key
+        self.pieces.append(text)
+
+    def add_font_name(self, text):
+        while text:
+            index = text.find(';')
+            if index < 0:
+                self.font_name_parts.append(text)
+                return
+            self.font_name_parts.append(text[:index])
+            if self.font_id is not None:
+                charset = self.font_charsets.get(self.font_id)
+                self.fonts[self.font_id] = (''.join(self.font_name_parts).strip(),
+                                            _CHARSET_CODEPAGES.get(charset))
+            self.font_name_parts = []
+            text = text[index + 1:]
+
+    def flush_bytes(self):
+        if not self.pending_bytes:
+            return
+        codepage = None
+        font = self.state.font
+        if self.state.destination == 'fonttbl':
+            codepage = _CHARSET_CODEPAGES.get(self.font_charsets.get(self.font_id))
+        elif font is not None and font in self.fonts:
+            codepage = self.fonts[font][1]
+        try:
+            text = bytes(self.pending_bytes).decode(codepage or self.codepage, errors='replace')
+        except LookupError:
+            text = bytes(self.pending_bytes).decode(DEFAULT_CODEPAGE, errors='replace')
+        self.pending_bytes.clear()
+        self.add_text(text)
+
+    def add_unicode(self, value):
+        if value < 0:
+            value += 65536
+        if 0xD800 <= value < 0xDC00:
+            self.high_surrogate = value
+        else:
+            if self.high_surrogate is not None and 0xDC00 <= value < 0xE000:
+                value = 0x10000 + ((self.high_surrogate - 0xD800) << 10) + (value - 0xDC00)
+            self.high_surrogate = None
+            if not 0 <= value <= 0x10FFFF or 0xD800 <= value < 0xE000:
+                # 超出范围的码位和落单的代理项替换为 U+FFFD
+                value = 0xFFFD
+            self.add_text(chr(value))
+        self.pending_skip = self.state.uc
+
+    # ---- 段落 ----
+
+    def end_paragraph(self):
+        self.flush_run()
+        paragraph = self.paragraph
+        if self.in_list:
+            style = self.list_style
+            if style is None:
+                style = LIST_NUMBER if any(ch.isdigit() for ch in ''.join(self.list_text)) else LIST_BULLET
+            paragraph.list_style = style
+            paragraph.list_level = self.list_level
+        self.list_text = []
+        # 段落属性一直有效，直到 \pard
+        self.paragraph = Paragraph(alignment=paragraph.alignment,
+                                   heading_level=paragraph.heading_level)
+        return paragraph
+
+    def reset_paragraph(self):
+        self.paragraph.alignment = ALIGN_LEFT
+        self.paragraph.heading_level = 0
+        self.in_list = False
+        self.list_style = None
+        self.list_level = 0
+
+    # ---- 控制字 ----
+
+    def control_word(self, word, param):
+        """处理一个控制字，结束段落时返回该段落"""
+        state = self.state
+        if self.expect_destination:
+            # \* 之后的目标组，不认识的整组跳过
+            self.expect_destination = False
+            if word not in _CAPTURED_DESTINATIONS:
+                state.skip = True
+                return None
+        if word in _SKIPPED_DESTINATIONS:
+            state.skip = True
+            return None
+        if word in _CAPTURED_DESTINATIONS:
+            state.destination = word
+            if word == 'pn':
+                self.in_list = True
+            elif word in ('listtext', 'pntext'):
+                self.list_text = []
+            return None
+        if state.skip:
+            return None
+        # 字体名等目标组中也可能出现 Unicode 字符
+        if word == 'u' and param is not None:
+            self.add_unicode(param)
+            return None
+        if word == 'uc':
+            state.uc = param if param is not None else 1
+            return None
+
+        destination = state.destination
+        if destination == 'fonttbl':
+            if word == 'f':
+                self.font_id = param
+                self.font_name_parts = []
+            elif word == 'fcharset':
+                self.font_charsets[self.font_id] = param
+            return None
+        if destination == 'colortbl':
+            if word in ('red', 'green', 'blue'):
+                red, green, blue = self.rgb_components()
+                value = max(0, min(param or 0, 255))
+                if word == 'red':
+                    red = value
+                elif word == 'green':
+                    green = value
+                else:
+                    blue = value
+                self.rgb = f'#{red:02x}{green:02x}{blue:02x}'
+            return None
+        if destination == 'pn':
+            if word == 'pnlvlblt':
+                self.list_style = LIST_BULLET
+            elif word in ('pnlvlbody', 'pndec', 'pnlcltr', 'pnucltr', 'pnlcrm', 'pnucrm'):
+                self.list_style = LIST_NUMBER
+            elif word == 'pnlvl' and param:
+                self.list_level = max(param - 1, 0)
+            return None
+
+        if word in _PARAGRAPH_BREAKS:
+            return self.end_paragraph()
+        if word in _WORD_TEXT:
+            self.add_text(_WORD_TEXT[word])
+        elif word in ('b', 'i', 'strike'):
+            setattr(state, {'b': 'bold', 'i': 'italic', 'strike': 'strike'}[word], param != 0)
+        elif word == 'ul':
+            state.underline = param != 0
+        elif word == 'ulnone':
+            state.underline = False
+        elif word == 'f':
+            state.font = param
+        elif word == 'fs':
+            state.size = param
+        elif word == 'cf':
+            state.color = param or 0
+        elif word == 'plain':
+            state.reset_format()
+            state.font = self.default_font
+        elif word == 'pard':
+            self.reset_paragraph()
+        elif word in _ALIGNMENT_WORDS:
+            self.paragraph.alignment = _ALIGNMENT_WORDS[word]
+        elif word == 'outlinelevel' and param is not None and 0 <= param < 9:
+            self.paragraph.heading_level = min(param + 1, 6)
+        elif word == 'ls':
+            self.in_list = True
+        elif word == 'ilvl':
+            self.list_level = param or 0
+        elif word == 'ansicpg' and param:
+            self.codepage = f'cp{param}'
+        elif word == 'deff':
+            self.default_font = param
+            state.font = param
+        return None
+
+    def rgb_components(self):
+        if self.rgb is None:
+            return 0, 0, 0
+        return int(self.rgb[1:3], 16), int(self.rgb[3:5], 16), int(self.rgb[5:7], 16)
+
+    # ---- 分组 ----
+
+    def open_group(self):
+        self.stack.append(self.state)
+        self.state = self.state.copy()
+        self.state.uc = self.stack[-1].uc
+
+    def close_group(self):
+        if self.state.destination == 'fonttbl' and self.font_name_parts and self.font_id is not None:
+            # 最后一个字体名后面可能没有分号
+            self.add_font_name(';')
+        if self.stack:
+            self.state = self.stack.pop()
+
+
+def iter_rtf_paragraphs(text: str) -> Iterator[Tuple[Paragraph, int]]:
+    """单次线性扫描 RTF，逐段产出(段落, 已处理的字符数)
+
+    text 按 latin-1 解码，每个字符对应一个字节；\\'hh 和 \\uN 按字体字符集或文档代码页解码。
+    """
+    parser = _RtfParser()
+    for match in _TOKEN_RE.finditer(text):
+        word, param, hex_byte, symbol, brace, plain = match.groups()
+        if hex_byte is not None:
+            if parser.pending_skip:
+                parser.pending_skip -= 1
+            elif not parser.state.skip:
+                parser.pending_bytes.append(int(hex_byte, 16))
+            continue
+        parser.flush_bytes()
+
+        if plain is not None:
+            parser.add_text(plain)
+        elif word is not None:
+            paragraph = parser.control_word(word, int(param) if param is not None else None)
+            if paragraph is not None:
+                yield paragraph, match.end()
+        elif brace == '{':
+            parser.open_group()
+        elif brace == '}':
+            parser.close_group()
+        elif symbol is not None:
+            if symbol == '*':
+                parser.expect_destination = True
+            elif symbol in _SYMBOLS:
+                parser.add_text(_SYMBOLS[symbol])
+            elif symbol == '\n' or symbol == '\r':
+                # 反斜杠加换行等同于 \par
+                yield parser.end_paragraph(), match.end()
+    parser.flush_bytes()
+    parser.flush_run()
+    if parser.paragraph.runs:
+        yield parser.end_paragraph(), len(text)
+
+
+def read_rtf(path: str) -> str:
+    with open(path, 'rb') as f:
+        return f.read().decode('latin-1')
+
+
+# ---- 写入 ----
+
+_ESCAPE_RE = re.compile('[\\\\{}\t%s]|[^\x00-\x7f]' % LINE_BREAK)
+_ALIGNMENT_CONTROLS = {ALIGN_CENTER: r'\qc', ALIGN_RIGHT: r'\qr', ALIGN_JUSTIFY: r'\qj'}
+_LIST_INDENT = 360  # 缇
+
+
+def _escape_char(match) -> str:
+    char = match.group()
+    if char in '\\{}':
+        return '\\' + char
+    if char == '\t':
+        return r'\tab '
+    if char == LINE_BREAK:
+        return r'\line '
+    code = ord(char)
+    if code > 0xFFFF:
+        code -= 0x10000
+        high, low = 0xD800 + (code >> 10), 0xDC00 + (code & 0x3FF)
+        return f'\\u{high - 65536}?\\u{low - 65536}?'
+    return f'\\u{code if code < 32768 else code - 65536}?'
+
+
+def _escape(text: str) -> str:
+    return _ESCAPE_RE.sub(_escape_char, text)
+
+
+def write_rtf(paragraphs: Iterable[Paragraph]) -> str:
+    """把段落写成 RTF；所有片段收集到列表中最后一次拼接"""
+    paragraphs = list(paragraphs)
+    fonts: Dict[str, int] = {}
+    colors: Dict[str, int] = {}
+    for paragraph in paragraphs:
+        for run in paragraph.runs:
+            if run.font_family and run.font_family not in fonts:
+                fonts[run.font_family] = len(fonts) + 1
+            if run.color and run.color not in colors:
+                colors[run.color] = len(colors) + 1
+
+    parts: List[str] = [r'{\rtf1\ansi\ansicpg1252\deff0\uc1', r'{\fonttbl{\f0\fnil\fcharset0 Arial;}']
+    for family, index in fonts.items():
+        parts.append(f'{{\\f{index}\\fnil\\fcharset1 {_escape(family)};}}')
+    parts.append('}')
+    parts.append(r'{\colortbl;')
+    for color, _ in sorted(colors.items(), key=lambda item: item[1]):
+        parts.append(f'\\red{int(color[1:3], 16)}\\green{int(color[3:5], 16)}\\blue{int(color[5:7], 16)};')
+    parts.append('}\n')
+
+    for paragraph in paragraphs:
+        parts.append(r'\pard')
+        parts.append(_ALIGNMENT_CONTROLS.get(paragraph.alignment, ''))
+        heading_size: Optional[float] = None
+        if paragraph.heading_level:
+            parts.append(f'\\outlinelevel{paragraph.heading_level - 1}')
+            heading_size = HEADING_POINT_SIZES.get(paragraph.heading_level)
+        if paragraph.list_style:
+            indent = _LIST_INDENT * (paragraph.list_level + 2)
+            if paragraph.list_style == LIST_BULLET:
+                parts.append(f'{{\\pntext\\u8226?\\tab}}{{\\*\\pn\\pnlvlblt\\pnindent{_LIST_INDENT}'
+                             f'{{\\pntxtb\\u8226?}}}}')
+            else:
+                parts.append(f'{{\\*\\pn\\pnlvlbody\\pndec\\pnindent{_LIST_INDENT}{{\\pntxta.}}}}')
+            parts.append(f'\\fi-{_LIST_INDENT}\\li{indent}\\ilvl{paragraph.list_level}')
+        parts.append(' ')
+        for run in paragraph.runs:
+            controls = [r'{\plain']
+            if run.bold or paragraph.heading_level:
+                controls.append(r'\b')
+            if run.italic:
+                controls.append(r'\i')
+            if run.underline:
+                controls.append(r'\ul')
+            if run.strike:
+                controls.append(r'\strike')
+            if run.font_family:
+                controls.append(f'\\f{fonts[run.font_family]}')
+            size = run.font_size or heading_size
+            if size:
+                controls.append(f'\\fs{round(size * 2)}')
+            if run.color:
+                controls.append(f'\\cf{colors[run.color]}')
+            parts.append(''.join(controls))
+            parts.append(' ')
+            parts.append(_escape(run.text))
+            parts.append('}')
+        parts.append('\\par\n')
+    parts.append('}')
+    return ''.join(parts)
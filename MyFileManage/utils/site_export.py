@@ -0,0 +1,268 @@
+import hashlib
+import html
+import json
+import os
+import re
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from typing import Callable, Dict, List, Optional, Tuple
+from urllib.parse import unquote
+
+from models.document import DocumentType
+from utils.atomic_writer import atomic_write
+from utils.batch_ops import iter_documents
+
+# 构建清单文件名，位于输出目录中
+MANIFEST_NAME = '.site-manifest.json'
+# 渲染方式改变时递增，旧清单中的结果全部作废
+SITE_FORMAT_VERSION = 1
+# 每个子进程任务处理的文档数
+SITE_BATCH_SIZE = 32
+SITE_TYPES = (DocumentType.MARKDOWN, DocumentType.HTML)
+
+PAGE_SHELL = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"><title>{title}</title></head>
+<body>
+{body}
+</body></html>
+"""
+
+_MD_HEADING_RE = re.compile(r"^ {0,3}#\s+(.+?)\s*#*\s*$", re.MULTILINE)
+_HTML_TITLE_RE = re.compile(r"<(title|h1)[^>]*>(.*?)</\1>", re.IGNORECASE | re.DOTALL)
+_TAG_RE = re.compile(r"<[^>]+>")
+_MD_LINK_RE = re.compile(r"\]\(\s*<?([^)\s>]+)")
+_MD_REF_RE = re.compile(r"^ {0,3}\[[^\]]+\]:\s*<?(\S+?)>?(?:\s|$)", re.MULTILINE)
+_HREF_RE = re.compile(r"""href\s*=\s*["']([^"']+)["']""", re.IGNORECASE)
+_ANCHOR_RE = re.compile(r"""<a\b([^>]*?)href\s*=\s*(["'])([^"']*)\2([^>]*)>(.*?)</a>""",
+                        re.IGNORECASE | re.DOTALL)
+_SCHEME_RE = re.compile(r"^[a-zA-Z][a-zA-Z0-9+.-]*:")
+
+# 进度回调：(阶段, 已完成数, 总数)
+SiteProgress = Callable[[str, int, int], None]
+
+
+@dataclass
+class SiteBuildResult:
+    rendered: List[str] = field(default_factory=list)  # 重新渲染的文档(相对路径)
+    reused: int = 0  # 沿用上次输出的文档数
+    removed: List[str] = field(default_factory=list)  # 源文档已删除而清理的输出
+    failed: List[Tuple[str, str]] = field(default_factory=list)  # (相对路径, 错误信息)
+    elapsed: float = 0.0
+
+
+def output_name(rel: str) -> str:
+    return os.path.splitext(rel)[0] + '.html'
+
+
+def resolve_link(rel: str, href: str) -> Optional[str]:
+    """把文档 rel 中的链接解析为站点内的相对路径；外部链接或不是文档的链接返回 None"""
+    if _SCHEME_RE.match(href) or href.startswith(('/', '#')):
+        return None
+    target = unquote(href.split('#', 1)[0].split('?', 1)[0])
+    if not target.lower().endswith(('.md', '.html')):
+        return None
+    target = os.path.normpath(os.path.join(os.path.dirname(rel), target)).replace(os.sep, '/')
+    if target.startswith('../') or target == '..':
+        return None
+    return target
+
+
+# ---- 以下函数在子进程中执行 ----
+
+def _title_of(text: str, doc_type: DocumentType, rel: str) -> str:
+    if doc_type == DocumentType.MARKDOWN:
+        match = _MD_HEADING_RE.search(text)
+    else:
+        match = _HTML_TITLE_RE.search(text)
+        if match is not None:
+            return html.unescape(_TAG_RE.sub('', match.group(2))).strip() or os.path.basename(rel)
+    if match is not None:
+        return match.group(1)
+    return os.path.splitext(os.path.basename(rel))[0]
+
+
+def analyze_documents(batch: List[Tuple[str, str, DocumentType]]) -> List[tuple]:
+    """读取文档，返回 [(相对路径, 内容哈希, 标题, 链接的文档, 错误信息)]"""
+    results = []
+    for path, rel, doc_type in batch:
+        try:
+            with open(path, 'rb') as f:
+                data = f.read()
+            text = data.decode('utf-8')
+        except (OSError, UnicodeDecodeError) as e:
+            results.append((rel, None, None, [], str(e)))
+            continue
+        if doc_type == DocumentType.MARKDOWN:
+            hrefs = _MD_LINK_RE.findall(text) + _MD_REF_RE.findall(text) + _HREF_RE.findall(text)
+        else:
+            hrefs = _HREF_RE.findall(text)
+        links = sorted({target for target in (resolve_link(rel, href) for href in hrefs) if target})
+        digest = hashlib.blake2b(data, digest_size=20).hexdigest()
+        results.append((rel, digest, _title_of(text, doc_type, rel), links, None))
+    return results
+
+
+def _rewrite_links(body: str, rel: str, titles: Dict[str, Optional[str]]) -> str:
+    """指向站点文档的链接改为输出的 .html；目标不存在时标记为失效，空的链接文字用目标标题填充"""
+    def replace(match):
+        before, quote, href, after, text = match.groups()
+        target = resolve_link(rel, href)
+        if target is None:
+            return match.group(0)
+        title = titles.get(target)
+        if title is None:
+            return f'<a{before}href={quote}{href}{quote} class="broken-link"{after}>{text}</a>'
+        path, hash_mark, fragment = href.partition('#')
+        if path.lower().endswith('.md'):
+            path = path[:-3] + '.html'
+        if not text.strip():
+            text = html.escape(title)
+        return f'<a{before}href={quote}{path}{hash_mark}{fragment}{quote}{after}>{text}</a>'
+    return _ANCHOR_RE.sub(replace, body)
+
+
+def render_pages(batch: List[tuple]) -> List[Tuple[str, Optional[str]]]:
+    """渲染并原子写入页面，batch 为 [(源路径, 输出路径, 相对路径, 类型, 标题, {链接目标: 标题})]"""
+    # 只有导出依赖 markdown，命令行的其他功能不需要安装
+    from markdown import markdown
+
+    results = []
+    for src_path, dest_path, rel, doc_type, title, titles in batch:
+        try:
+            with open(src_path, 'r', encoding='utf-8') as f:
+                text = f.read()
+            if doc_type == DocumentType.MARKDOWN:
+                page = PAGE_SHELL.format(title=html.escape(title), body=markdown(text))
+            else:
+                page = text
+            os.makedirs(os.path.dirname(dest_path), exist_ok=True)
+            atomic_write(dest_path, _rewrite_links(page, rel, titles))
+            results.append((rel, None))
+        except Exception as e:
+            results.append((rel, str(e)))
+    return results
+
+
+class SiteBuilder:
+    """把根目录中的 Markdown 和 HTML 文档导出为静态站点
+
+    输出目录中的清单记录每个文档的内容哈希、输出文件和所链接文档的标题。
+    再次构建时只渲染内容变化的文档，以及所链接的文档被增删或改了标题的文档。
+    """
+
+    def __init__(self, root: str, out_dir: str, max_workers: Optional[int] = None):
+        self.root = os.path.abspath(root)
+        self.out_dir = os.path.abspath(out_dir)
+        self.max_workers = max_workers
+        self.manifest_path = os.path.join(self.out_dir, MANIFEST_NAME)
+
+    def load_manifest(self) -> Dict[str, dict]:
+        try:
+            with open(self.manifest_path, 'r', encoding='utf-8') as f:
+                manifest = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if manifest.get('version') != SITE_FORMAT_VERSION:
+            return {}
+        return manifest.get('documents', {})
+
+    def save_manifest(self, documents: Dict[str, dict]):
+        os.makedirs(self.out_dir, exist_ok=True)
+        atomic_write(self.manifest_path, json.dumps(
+            {'version': SITE_FORMAT_VERSION, 'documents': documents}, ensure_ascii=False, sort_keys=True))
+
+    def _sources(self) -> Dict[str, Tuple[str, DocumentType, int, int]]:
+        """{相对路径: (路径, 类型, 大小, 修改时间)}，不包括输出目录自身"""
+        sources = {}
+        for path, doc_type in iter_documents(self.root):
+            if doc_type not in SITE_TYPES or path.startswith(self.out_dir + os.sep):
+                continue
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            rel = os.path.relpath(path, self.root).replace(os.sep, '/')
+            sources[rel] = (path, doc_type, st.st_size, st.st_mtime_ns)
+        return sources
+
+    def _run(self, executor, func, items, stage, progress):
+        futures = {executor.submit(func, items[start:start + SITE_BATCH_SIZE]):
+                   len(items[start:start + SITE_BATCH_SIZE])
+                   for start in range(0, len(items), SITE_BATCH_SIZE)}
+        done = 0
+        for future in as_completed(futures):
+            done += futures[future]
+            if progress:
+                progress(stage, done, len(items))
+            yield from future.result()
+
+    def build(self, full: bool = False, progress: Optional[SiteProgress] = None) -> SiteBuildResult:
+        start = time.monotonic()
+        result = SiteBuildResult()
+        # 完整构建不沿用旧清单中的任何结果，但仍用它清理已删除文档的输出
+        previous_manifest = self.load_manifest()
+        old = {} if full else previous_manifest
+        sources = self._sources()
+
+        # 大小和修改时间都没变的文档沿用清单中的哈希和链接，不再读取
+        entries = {}
+        stale = []
+        for rel, (path, doc_type, size, mtime_ns) in sources.items():
+            entry = old.get(rel)
+            if entry is not None and entry['size'] == size and entry['mtime_ns'] == mtime_ns:
+                entries[rel] = dict(entry)
+            else:
+                stale.append((path, rel, doc_type))
+
+        with ProcessPoolExecutor(max_workers=self.max_workers) as executor:
+            for rel, digest, title, links, error in self._run(
+                    executor, analyze_documents, stale, "分析", progress):
+                if error is not None:
+                    result.failed.append((rel, error))
+                    continue
+                _, _, size, mtime_ns = sources[rel]
+                entries[rel] = {'size': size, 'mtime_ns': mtime_ns, 'hash': digest, 'title': title,
+                                'links': links, 'deps': None}
+
+            # 需要渲染：新文档、内容变化、输出丢失，或链接目标的状态(是否存在、标题)变化
+            titles = {rel: entry['title'] for rel, entry in entries.items()}
+            pending = []
+            for rel, entry in entries.items():
+                deps = {target: titles.get(target) for target in entry['links']}
+                previous = old.get(rel)
+                output = os.path.join(self.out_dir, output_name(rel))
+                if (previous is None or previous['hash'] != entry['hash'] or previous['deps'] != deps
+                        or not os.path.exists(output)):
+                    path, doc_type, _, _ = sources[rel]
+                    pending.append((path, output, rel, doc_type, entry['title'], deps))
+                else:
+                    result.reused += 1
+                entry['deps'] = deps
+
+            for rel, error in self._run(executor, render_pages, pending, "渲染", progress):
+                if error is None:
+                    result.rendered.append(rel)
+                else:
+                    result.failed.append((rel, error))
+
+        failed = {rel for rel, _ in result.failed}
+        for rel in failed:
+            # 下次构建重新处理
+            entries.pop(rel, None)
+
+        outputs = {output_name(rel) for rel in sources}
+        for rel in previous_manifest:
+            if rel in sources or output_name(rel) in outputs:
+                continue
+            try:
+                os.remove(os.path.join(self.out_dir, output_name(rel)))
+                result.removed.append(rel)
+            except FileNotFoundError:
+                pass
+            except OSError as e:
+                print(f"Error removing exported page: {e}")
+
+        self.save_manifest(entries)
+        result.elapsed = time.monotonic() - start
+        return result
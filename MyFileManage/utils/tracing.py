@@ -0,0 +1,218 @@
+import collections
+import functools
+import json
+import os
+import sys
+import threading
+import time
+import traceback
+from typing import Any, Callable, Dict, List, Optional
+
+# 环境变量：设为 1 时启用跟踪；设为以 .json 结尾的路径时还会在退出时导出到该文件；
+# 设为 0、false、no、off 时关闭跟踪。设置了该变量时界面中的开关不会被保存
+TRACE_ENV = 'PDM_TRACE'
+_OFF_VALUES = ('0', 'false', 'no', 'off')
+# 环形缓冲区保留的事件数，超出后丢弃最早的事件
+RING_BUFFER_SIZE = 200_000
+# 界面线程阻塞超过该时长(毫秒)视为卡顿
+DEFAULT_STALL_MS = 200
+
+_events = collections.deque(maxlen=RING_BUFFER_SIZE)
+_thread_names: Dict[int, str] = {}
+_epoch_ns = time.perf_counter_ns()
+
+
+def enabled_from_env() -> Optional[bool]:
+    """环境变量对跟踪的设置，没有设置或为空时返回 None"""
+    value = os.environ.get(TRACE_ENV, '').strip()
+    if not value:
+        return None
+    return value.lower() not in _OFF_VALUES
+
+
+_enabled = bool(enabled_from_env())
+
+
+def is_enabled() -> bool:
+    return _enabled
+
+
+def set_enabled(enabled: bool):
+    global _enabled
+    _enabled = enabled
+
+
+def export_path_from_env() -> Optional[str]:
+    """环境变量指定的导出文件"""
+    value = os.environ.get(TRACE_ENV, '')
+    return value if value.lower().endswith('.json') else None
+
+
+def now_us() -> float:
+    return (time.perf_counter_ns() - _epoch_ns) / 1000
+
+
+def record(name: str, category: str, start_us: float, end_us: float, args: Optional[dict] = None):
+    """记录一段已经结束的耗时，可以在任意线程调用"""
+    if not _enabled:
+        return
+    tid = threading.get_native_id()
+    if tid not in _thread_names:
+        _thread_names[tid] = threading.current_thread().name
+    _events.append(('X', name, category, start_us, end_us - start_us, tid, args))
+
+
+def instant(name: str, category: str = 'app', **args):
+    """记录一个时间点事件"""
+    if not _enabled:
+        return
+    tid = threading.get_native_id()
+    if tid not in _thread_names:
+        _thread_names[tid] = threading.current_thread().name
+    _events.append(('i', name, category, now_us(), 0, tid, args or None))
+
+
+class _Span:
+    __slots__ = ('name', 'category', 'args', 'start')
+
+    def __init__(self, name, category, args):
+        self.name = name
+        self.category = category
+        self.args = args
+
+    def __enter__(self):
+        self.start = now_us()
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        if exc_type is not None:
+            self.args = dict(self.args or {}, error=repr(exc))
+        record(self.name, self.category, self.start, now_us(), self.args)
+        return False
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        return False
+
+
+_NULL_SPAN = _NullSpan()
+
+
+def span(name: str, category: str = 'app', **args):
+    """记录 with 块的耗时；未启用时返回共享的空对象，几乎没有开销"""
+    if not _enabled:
+        return _NULL_SPAN
+    return _Span(name, category, args or None)
+
+
+def traced(name: Optional[str] = None, category: str = 'app'):
+    """记录函数耗时的装饰器"""
+    def decorator(func: Callable):
+        label = name or func.__qualname__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if not _enabled:
+                return func(*args, **kwargs)
+            start = now_us()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                record(label, category, start, now_us())
+        return wrapper
+    return decorator
+
+
+def events() -> List[tuple]:
+    """环形缓冲区中事件的快照"""
+    return list(_events)
+
+
+def clear():
+    _events.clear()
+
+
+def chrome_trace() -> Dict[str, Any]:
+    """转换为 Chrome trace-event 格式，可在 chrome://tracing 或 Perfetto 中打开"""
+    pid = os.getpid()
+    trace = [{'ph': 'M', 'name': 'thread_name', 'pid': pid, 'tid': tid, 'args': {'name': name}}
+             for tid, name in list(_thread_names.items())]
+    for ph, name, category, ts, dur, tid, args in events():
+        event = {'ph': ph, 'name': name, 'cat': category, 'ts': round(ts, 1), 'pid': pid, 'tid': tid}
+        if ph == 'X':
+            event['dur'] = round(dur, 1)
+        else:
+            event['s'] = 't'
+        if args:
+            event['args'] = args
+        trace.append(event)
+    return {'traceEvents': trace, 'displayTimeUnit': 'ms'}
+
+
+def export_chrome_trace(path: str) -> int:
+    """导出到 JSON 文件，返回事件数"""
+    data = chrome_trace()
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, ensure_ascii=False, default=str)
+    return len(data['traceEvents'])
+
+
+class StallDetector:
+    """检测界面线程的事件循环阻塞
+
+    界面线程按 interval_ms 定时调用 beat()。监视线程发现心跳停止超过阈值时，
+    抓取一次界面线程当时的调用栈；心跳恢复后把整段阻塞记为一个 stall 事件。
+    必须在界面线程中创建。
+    """
+
+    def __init__(self, threshold_ms: int = DEFAULT_STALL_MS, interval_ms: int = 50):
+        self.threshold = threshold_ms / 1000
+        self.interval = interval_ms / 1000
+        self.thread_id = threading.get_ident()
+        self.last_beat = time.perf_counter()
+        self.stall_stack: Optional[str] = None
+        self.stalls = 0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        if self._thread is not None:
+            return
+        self.last_beat = time.perf_counter()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="StallDetector", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join()
+        self._thread = None
+
+    def beat(self):
+        now = time.perf_counter()
+        blocked = now - self.last_beat - self.interval
+        self.last_beat = now
+        if blocked < self.threshold:
+            return
+        self.stalls += 1
+        stack, self.stall_stack = self.stall_stack, None
+        end = now_us()
+        record('GUI stall', 'stall', end - blocked * 1_000_000, end,
+               {'blocked_ms': round(blocked * 1000), 'stack': stack})
+
+    def _watch(self):
+        while not self._stop.wait(self.threshold / 2):
+            if self.stall_stack is not None:
+                continue
+            if time.perf_counter() - self.last_beat - self.interval >= self.threshold:
+                frame = sys._current_frames().get(self.thread_id)
+                if frame is not None:
+                    self.stall_stack = ''.join(traceback.format_stack(frame))
@@ -0,0 +1,132 @@
+import itertools
+import json
+import os
+import time
+from dataclasses import dataclass
+from typing import Callable, List, Optional
+
+from utils.atomic_writer import atomic_write
+from utils.file_utils import count_tree, remove_tree
+
+# 回收区目录名，位于文档根目录下；以 . 开头，目录树和各种索引都会跳过
+TRASH_DIR_NAME = '.pdm-trash'
+# 回收区中的条目保留的天数，过期后在后台清除
+TRASH_RETENTION_DAYS = 7
+INFO_SUFFIX = '.json'
+
+_counter = itertools.count()
+
+
+@dataclass
+class TrashEntry:
+    entry_id: str
+    original_path: str
+    deleted_at: float
+    trash_path: str  # 在回收区中的路径
+
+    @property
+    def name(self) -> str:
+        return os.path.basename(self.original_path)
+
+
+class Trash:
+    """文档根目录的回收区
+
+    删除只是把文件或目录改名到回收区，并在旁边的 JSON 文件中记下原路径，可以随时还原；
+    逐个文件的删除留给后台任务。回收区与根目录在同一文件系统上时改名是瞬时的，
+    不在时 move_to_trash 抛出 EXDEV，由调用方决定是否直接删除。
+    """
+
+    def __init__(self, root_path: str):
+        self.root_path = os.path.abspath(root_path)
+        self.trash_dir = os.path.join(self.root_path, TRASH_DIR_NAME)
+
+    def _entry(self, entry_id: str, original_path: str, deleted_at: float) -> TrashEntry:
+        return TrashEntry(entry_id, original_path, deleted_at, os.path.join(self.trash_dir, entry_id))
+
+    def move_to_trash(self, path: str) -> TrashEntry:
+        path = os.path.abspath(path)
+        if path == self.trash_dir or path.startswith(self.trash_dir + os.sep):
+            raise ValueError("不能把回收区移入回收区")
+        if not os.path.lexists(path):
+            raise FileNotFoundError(path)
+        os.makedirs(self.trash_dir, exist_ok=True)
+        entry = self._entry(f"{time.time_ns()}-{next(_counter)}", path, time.time())
+        # 先写记录再改名：中途失败时只会留下一个没有对应条目的记录
+        info_path = entry.trash_path + INFO_SUFFIX
+        atomic_write(info_path, json.dumps(
+            {'original_path': path, 'deleted_at': entry.deleted_at}, ensure_ascii=False))
+        try:
+            os.rename(path, entry.trash_path)
+        except OSError:
+            os.remove(info_path)
+            raise
+        return entry
+
+    def restore(self, entry: TrashEntry) -> str:
+        """把条目改名回原路径，原路径已被占用时抛出 FileExistsError"""
+        if not os.path.lexists(entry.trash_path):
+            raise FileNotFoundError(f"回收区中已没有 {entry.name}")
+        if os.path.lexists(entry.original_path):
+            raise FileExistsError(f"{entry.original_path} 已存在")
+        os.makedirs(os.path.dirname(entry.original_path), exist_ok=True)
+        os.rename(entry.trash_path, entry.original_path)
+        self._discard_info(entry)
+        return entry.original_path
+
+    def _discard_info(self, entry: TrashEntry):
+        try:
+            os.remove(entry.trash_path + INFO_SUFFIX)
+        except FileNotFoundError:
+            pass
+
+    def entries(self) -> List[TrashEntry]:
+        """回收区中的条目，按删除时间排序"""
+        try:
+            names = os.listdir(self.trash_dir)
+        except FileNotFoundError:
+            return []
+        entries = []
+        for name in names:
+            if not name.endswith(INFO_SUFFIX):
+                continue
+            try:
+                with open(os.path.join(self.trash_dir, name), 'r', encoding='utf-8') as f:
+                    info = json.load(f)
+            except (OSError, ValueError) as e:
+                print(f"Error reading trash entry: {e}")
+                continue
+            entries.append(self._entry(name[:-len(INFO_SUFFIX)], info['original_path'], info['deleted_at']))
+        entries.sort(key=lambda entry: entry.deleted_at)
+        return entries
+
+    def expired(self, retention_days: float = TRASH_RETENTION_DAYS) -> List[TrashEntry]:
+        cutoff = time.time() - retention_days * 24 * 3600
+        return [entry for entry in self.entries() if entry.deleted_at < cutoff]
+
+    def purge(self, entries: List[TrashEntry], progress: Optional[Callable[[int, int], None]] = None,
+              is_cancelled: Optional[Callable[[], bool]] = None) -> int:
+        """逐个删除条目，progress 收到(已删除数, 总数)；返回删完的条目数
+
+        取消后已删除一部分的条目留在回收区中，下次清除时继续。
+        """
+        sizes = []
+        for entry in entries:
+            if os.path.lexists(entry.trash_path):
+                sizes.append((entry, count_tree(entry.trash_path)))
+            else:
+                # 还原时中断留下的记录
+                self._discard_info(entry)
+        total = sum(size for _, size in sizes)
+        done = 0
+        purged = 0
+        for entry, size in sizes:
+            def on_removed(removed, base=done):
+                if progress:
+                    progress(base + removed, total)
+            if not remove_tree(entry.trash_path, on_removed, is_cancelled):
+                break
+            self._discard_info(entry)
+            done += size
+            purged += 1
+        return purged
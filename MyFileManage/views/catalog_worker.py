@@ -0,0 +1,38 @@
+import os
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from models.catalog import Catalog
+from utils.app_paths import data_dir_for_root
+
+
+def catalog_db_path(root_path):
+    return os.path.join(data_dir_for_root(root_path), "catalog.db")
+
+
+class CatalogSyncWorker(QThread):
+    """在后台把整个根目录同步到文档目录数据库；给定 paths 时只同步这些路径"""
+    finished_sync = pyqtSignal(int)  # 变化的条目数
+
+    def __init__(self, root_path, paths=None, parent=None):
+        super().__init__(parent)
+        self.root_path = root_path
+        self.paths = paths
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        changes = 0
+        catalog = Catalog(catalog_db_path(self.root_path))
+        try:
+            if self.paths is not None:
+                changes = catalog.sync_paths(self.paths)
+            else:
+                changes = catalog.sync(self.root_path, is_cancelled=lambda: self._cancelled)
+        except Exception as e:
+            print(f"Error syncing catalog: {e}")
+        finally:
+            catalog.close()
+        self.finished_sync.emit(changes)
@@ -0,0 +1,103 @@
+import os
+
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+
+from models.dir_stats import DirectoryStatsTree
+
+
+class DirectoryStatsWorker(QThread):
+    """在后台线程遍历根目录，建立目录汇总统计"""
+    finished_stats = pyqtSignal(object)  # DirectoryStatsTree，取消时为 None
+
+    def __init__(self, root_path, parent=None):
+        super().__init__(parent)
+        self.root_path = root_path
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        stats = None
+        try:
+            stats = DirectoryStatsTree.build(self.root_path, is_cancelled=lambda: self._cancelled)
+        except Exception as e:
+            print(f"Error building directory stats: {e}")
+        self.finished_stats.emit(stats)
+
+
+class DirectoryStatsService(QObject):
+    """维护根目录的汇总统计：启用时在后台建立一次，之后按文件变化增量更新
+
+    统计建好之前的文件变化先排队，建好后按文件系统的当前状态补上。
+    只有目录树中已加载的目录被监视，其他目录中的变化要由 refresh 定期在后台重新统计才能发现。
+    """
+    stats_ready = pyqtSignal(object)  # DirectoryStatsTree，停用时为 None
+    stats_changed = pyqtSignal(object)  # 汇总发生变化的目录路径集合
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.root_path = None
+        self.enabled = False
+        self.stats = None
+        self.worker = None
+        self.pending_paths = set()
+
+    def set_root_path(self, path):
+        self.root_path = os.path.abspath(path)
+        self.rebuild()
+
+    def set_enabled(self, enabled):
+        if enabled == self.enabled:
+            return
+        self.enabled = enabled
+        self.rebuild()
+
+    def rebuild(self):
+        self.stop()
+        self.pending_paths.clear()
+        if self.stats is not None:
+            self.stats = None
+            self.stats_ready.emit(None)
+        if not self.enabled or not self.root_path:
+            return
+        self.start_worker()
+
+    def refresh(self):
+        """在后台重新统计，完成前继续使用现有的统计"""
+        if self.worker is None and self.stats is not None:
+            self.start_worker()
+
+    def start_worker(self):
+        self.worker = DirectoryStatsWorker(self.root_path, self)
+        self.worker.finished_stats.connect(self.on_stats_built)
+        self.worker.start()
+
+    def stop(self):
+        if self.worker is not None:
+            self.worker.finished_stats.disconnect(self.on_stats_built)
+            self.worker.cancel()
+            self.worker.wait()
+            self.worker.deleteLater()
+            self.worker = None
+
+    def on_stats_built(self, stats):
+        self.worker.wait()
+        self.worker.deleteLater()
+        self.worker = None
+        if stats is None:
+            return
+        if self.pending_paths:
+            paths, self.pending_paths = list(self.pending_paths), set()
+            stats.update_paths(paths)
+        self.stats = stats
+        self.stats_ready.emit(stats)
+
+    def update_paths(self, paths):
+        """文件变化后只更新变化所在的目录及其祖先"""
+        if self.worker is not None:
+            self.pending_paths.update(paths)
+        if self.stats is not None:
+            changed = self.stats.update_paths(paths)
+            if changed:
+                self.stats_changed.emit(changed)
@@ -0,0 +1,172 @@
+import os
+import pickle
+import tempfile
+import zlib
+from collections import OrderedDict
+
+from utils.app_paths import cache_root
+
+# 默认内存预算(MB)，可通过设置项 document_cache_mb 修改
+DEFAULT_BUDGET_MB = 256
+# 估算 QTextDocument 内存占用：每个字符(UTF-16 加格式片段)和每个文本块的大致开销
+BYTES_PER_CHAR = 4
+BYTES_PER_BLOCK = 160
+# 换出文件的压缩级别，优先速度
+SPILL_COMPRESS_LEVEL = 1
+
+
+class OpenDocument:
+    """一个已打开的文档；document 为 None 时内容已换出到磁盘"""
+
+    def __init__(self, path, editor, document):
+        self.path = path
+        self.editor = editor
+        self.document = document
+        self.spill_path = None
+        self.modified = False
+        self.read_only = False
+        self.large_file = False  # 由大文件查看器显示，不缓存内容
+        self.cursor_position = 0
+        self.preview_state = None
+
+    @property
+    def resident(self):
+        return self.document is not None
+
+    def memory_size(self):
+        """估算常驻内存中的字节数"""
+        if self.document is None:
+            return 0
+        size = self.document.characterCount() * BYTES_PER_CHAR + self.document.blockCount() * BYTES_PER_BLOCK
+        if self.preview_state is not None:
+            size += sum(len(html) for html in self.preview_state[2]) * 2
+        return size
+
+
+class DocumentCache:
+    """已打开文档的 LRU 缓存
+
+    常驻内存的 QTextDocument 和预览渲染结果超出预算时，把最久未使用的文档压缩写入
+    换出目录，未保存的修改也一并保留；再次切换到该文档时从换出文件恢复。
+    最近使用的文档永远不会被换出。
+    """
+
+    def __init__(self, budget_bytes=DEFAULT_BUDGET_MB * 1024 * 1024, spill_dir=None):
+        self.budget_bytes = budget_bytes
+        self.entries = OrderedDict()  # 路径 -> OpenDocument，最近使用的在最后
+        if spill_dir is None:
+            base = os.path.join(cache_root(), "spill")
+            os.makedirs(base, exist_ok=True)
+            spill_dir = tempfile.mkdtemp(prefix="session-", dir=base)
+        self.spill_dir = spill_dir
+        # 换出有未保存修改的文档时调用 on_spill(路径, 内容)，用于写恢复日志
+        self.on_spill = None
+        self.spills = 0
+        self.restores = 0
+
+    def __contains__(self, path):
+        return path in self.entries
+
+    def __len__(self):
+        return len(self.entries)
+
+    def get(self, path):
+        return self.entries.get(path)
+
+    def add(self, entry):
+        self.entries[entry.path] = entry
+        self.entries.move_to_end(entry.path)
+
+    def touch(self, path):
+        self.entries.move_to_end(path)
+
+    def rename(self, old_path, new_path):
+        entry = self.entries.pop(old_path, None)
+        if entry is not None:
+            entry.path = new_path
+            self.entries[new_path] = entry
+
+    def remove(self, path):
+        """移除并释放一个文档"""
+        entry = self.entries.pop(path, None)
+        if entry is None:
+            return None
+        self._release(entry)
+        self._remove_spill(entry)
+        return entry
+
+    def memory_usage(self):
+        return sum(entry.memory_size() for entry in self.entries.values())
+
+    def enforce_budget(self):
+        """按 LRU 顺序换出文档，直到常驻内存回到预算以内"""
+        usage = self.memory_usage()
+        candidates = list(self.entries.values())[:-1]
+        for entry in candidates:
+            if usage <= self.budget_bytes:
+                break
+            if entry.resident:
+                usage -= entry.memory_size()
+                self.spill(entry)
+
+    def spill(self, entry):
+        """把文档内容压缩写入磁盘并释放 QTextDocument"""
+        if not entry.large_file:
+            text = entry.editor.document_text(entry.document)
+            state = {
+                'text': text,
+                'modified': entry.document.isModified(),
+                'preview': entry.preview_state,
+            }
+            if entry.spill_path is None:
+                fd, entry.spill_path = tempfile.mkstemp(suffix=".spill", dir=self.spill_dir)
+                os.close(fd)
+            with open(entry.spill_path, 'wb') as f:
+                f.write(zlib.compress(pickle.dumps(state, pickle.HIGHEST_PROTOCOL), SPILL_COMPRESS_LEVEL))
+            entry.modified = state['modified']
+            if entry.modified and self.on_spill is not None:
+                self.on_spill(entry.path, text)
+            self.spills += 1
+        entry.preview_state = None
+        self._release(entry)
+
+    def restore(self, entry):
+        """从换出文件重建 QTextDocument；大文件返回 False，需要重新打开"""
+        if entry.resident:
+            return True
+        entry.document = entry.editor.create_document()
+        if entry.large_file or entry.spill_path is None:
+            return False
+        with open(entry.spill_path, 'rb') as f:
+            state = pickle.loads(zlib.decompress(f.read()))
+        entry.editor.set_document_text(entry.document, state['text'])
+        entry.document.setModified(state['modified'])
+        entry.preview_state = state['preview']
+        self.restores += 1
+        return True
+
+    def clear(self):
+        for path in list(self.entries):
+            self.remove(path)
+        try:
+            os.rmdir(self.spill_dir)
+        except OSError:
+            pass
+
+    def _release(self, entry):
+        document, entry.document = entry.document, None
+        if document is None:
+            return
+        if entry.editor.editor.document() is document:
+            # 编辑器不拥有文档，释放前先换上空文档
+            entry.editor.detach_document()
+        document.deleteLater()
+
+    @staticmethod
+    def _remove_spill(entry):
+        if entry.spill_path is not None:
+            try:
+                os.remove(entry.spill_path)
+            except OSError:
+                pass
+            entry.spill_path = None
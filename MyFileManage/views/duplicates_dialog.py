@@ -0,0 +1,65 @@
+import os
+
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLabel, QTreeWidget, QTreeWidgetItem, QDialogButtonBox
+from PyQt5.QtCore import Qt, QThread, pyqtSignal
+
+from utils.dedup import DedupStore, hash_db_path
+
+
+class DuplicateWorker(QThread):
+    """在后台线程查找根目录中的重复文件"""
+    finished_report = pyqtSignal(object)  # [[路径, ...], ...]
+
+    def __init__(self, root_path, parent=None):
+        super().__init__(parent)
+        self.root_path = root_path
+
+    def run(self):
+        groups = []
+        store = DedupStore(self.root_path, hash_db_path(self.root_path))
+        try:
+            groups = store.find_duplicates()
+        except Exception as e:
+            print(f"Error finding duplicates: {e}")
+        finally:
+            store.close()
+        self.finished_report.emit(groups)
+
+
+class DuplicatesDialog(QDialog):
+    """按内容分组显示重复文件，双击打开文档"""
+    document_selected = pyqtSignal(str)  # 文档路径
+
+    def __init__(self, root_path, groups, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("重复文件")
+        self.resize(700, 500)
+
+        layout = QVBoxLayout(self)
+        wasted = sum(os.path.getsize(paths[0]) * (len(paths) - 1)
+                     for paths in groups if os.path.exists(paths[0]))
+        layout.addWidget(QLabel(
+            f"共 {len(groups)} 组重复文件，可节省 {wasted / 1024 / 1024:.1f} MB"
+        ))
+
+        self.tree = QTreeWidget()
+        self.tree.setHeaderHidden(True)
+        for paths in groups:
+            group_item = QTreeWidgetItem([f"{os.path.basename(paths[0])} ({len(paths)} 个副本)"])
+            for path in paths:
+                item = QTreeWidgetItem([os.path.relpath(path, root_path)])
+                item.setData(0, Qt.UserRole, path)
+                item.setToolTip(0, path)
+                group_item.addChild(item)
+            self.tree.addTopLevelItem(group_item)
+        self.tree.itemDoubleClicked.connect(self.on_item_double_clicked)
+        layout.addWidget(self.tree)
+
+        buttons = QDialogButtonBox(QDialogButtonBox.Close)
+        buttons.rejected.connect(self.reject)
+        layout.addWidget(buttons)
+
+    def on_item_double_clicked(self, item, column):
+        path = item.data(0, Qt.UserRole)
+        if path:
+            self.document_selected.emit(path)
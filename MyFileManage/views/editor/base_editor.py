@@ -1,17 +1,60 @@
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QToolBar, QAction
-from PyQt5.QtGui import QIcon
-from PyQt5.QtCore import Qt, pyqtSignal
+import os
+from dataclasses import dataclass
+
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QToolBar, QAction, QProgressBar, QPushButton,
+    QPlainTextEdit, QPlainTextDocumentLayout
+)
+from PyQt5.QtGui import QIcon, QTextCursor, QTextDocument
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
+
+from utils.atomic_writer import background_writer
+from utils.file_loader import iter_text_chunks
+from utils import tracing
+from .large_file_viewer import LargeFileViewer
+
+# 超过该大小时分块加载到编辑器
+STREAMING_THRESHOLD = 2 * 1024 * 1024
+# 超过该大小时改用基于行索引的只读查看器，不再使用 QPlainTextEdit
+LARGE_FILE_THRESHOLD = 256 * 1024 * 1024
+
+
+@dataclass
+class ContentChange:
+    """一次编辑：在 position 处删除 removed 个字符，插入 added 个字符"""
+    revision: int
+    position: int
+    removed: int
+    added: int
 
 
 class BaseEditor(QWidget):
-    content_changed = pyqtSignal(str)
+    # 编辑器是否支持把文本分块追加到 self.editor
+    supports_streaming = False
+    # 保存和换出到磁盘时使用 HTML 而不是纯文本
+    rich_text = False
+
+    # 每次编辑只发出变化的位置和长度，需要完整内容时再调用 get_content
+    content_changed = pyqtSignal(object)  # ContentChange
+    modification_changed = pyqtSignal(bool)  # 是否有未保存的修改
     save_requested = pyqtSignal()
     save_as_requested = pyqtSignal()
+    # 后台写入结束后发出，可能来自写入线程，接收方在界面线程中处理
+    file_saved = pyqtSignal(str)  # 路径
+    save_failed = pyqtSignal(str, str)  # 路径, 错误信息
 
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setup_ui()
         self.current_file_path = None
+        # 显示的不是完整可编辑内容时(大文件查看、取消加载)禁止保存
+        self.read_only_view = False
+        self.large_viewer = None
+        self.stream = None
+        self.stream_size = 0
+        self.stream_cursor = None
+        self.tracked_document = None
+        self.save_failed.connect(self.on_save_failed)
 
     def setup_ui(self):
         self.layout = QVBoxLayout(self)
@@ -30,40 +73,263 @@ class BaseEditor(QWidget):
         self.save_as_action.triggered.connect(self.save_as_requested.emit)
         self.toolbar.addAction(self.save_as_action)
 
+        # 分块加载进度
+        self.load_bar = QWidget()
+        load_layout = QHBoxLayout(self.load_bar)
+        load_layout.setContentsMargins(4, 0, 4, 0)
+        self.load_progress = QProgressBar()
+        self.load_progress.setRange(0, 100)
+        self.load_cancel_button = QPushButton("取消")
+        self.load_cancel_button.clicked.connect(lambda: self.finish_streaming_load(False))
+        load_layout.addWidget(self.load_progress)
+        load_layout.addWidget(self.load_cancel_button)
+        self.load_bar.hide()
+        self.layout.addWidget(self.load_bar)
+
+        # 每轮事件循环插入一块，界面在加载期间保持响应
+        self.load_timer = QTimer(self)
+        self.load_timer.setInterval(0)
+        self.load_timer.timeout.connect(self.load_next_chunk)
+
     def load_file(self, file_path):
         """加载文件内容"""
+        self.cancel_loading()
         self.current_file_path = file_path
         try:
-            with open(file_path, 'r', encoding='utf-8') as f:
-                content = f.read()
-            self.set_content(content)
+            size = os.path.getsize(file_path)
+            if self.supports_streaming and size >= LARGE_FILE_THRESHOLD:
+                self.show_large_file_viewer(file_path)
+                return
+
+            self.hide_large_file_viewer()
+            if self.supports_streaming and size >= STREAMING_THRESHOLD:
+                self.start_streaming_load(file_path, size)
+                return
+
+            with tracing.span('load_file', 'editor', path=file_path, size=size):
+                with open(file_path, 'r', encoding='utf-8') as f:
+                    content = f.read()
+                self.set_content(content)
         except Exception as e:
             print(f"Error loading file: {e}")
 
+    def start_streaming_load(self, file_path, size, stream=None):
+        """分块读取文件并逐步追加到编辑器
+
+        stream 产出(块, 已读取字节数)，默认按文本分块读取；块由 insert_chunk 插入。
+        """
+        self.stream = stream if stream is not None else iter_text_chunks(file_path)
+        self.stream_size = size
+        self.stream_started = tracing.now_us()
+
+        # 加载期间屏蔽 textChanged，并关闭撤销记录，避免每块都复制一遍全文
+        self.editor.blockSignals(True)
+        self.editor.setReadOnly(True)
+        self.editor.clear()
+        document = self.editor.document()
+        document.setUndoRedoEnabled(False)
+        self.stream_cursor = QTextCursor(document)
+
+        self.load_progress.setValue(0)
+        self.load_bar.show()
+        self.load_timer.start()
+
+    def load_next_chunk(self):
+        try:
+            chunk, done = next(self.stream)
+        except StopIteration:
+            self.finish_streaming_load(True)
+            return
+        except Exception as e:
+            print(f"Error loading file: {e}")
+            self.finish_streaming_load(False)
+            return
+
+        self.insert_chunk(chunk)
+        self.load_progress.setValue(int(done * 100 / max(self.stream_size, 1)))
+
+    def insert_chunk(self, chunk):
+        """把分块加载的一块追加到文档末尾"""
+        self.stream_cursor.movePosition(QTextCursor.End)
+        self.stream_cursor.insertText(chunk)
+
+    def finish_streaming_load(self, completed):
+        """结束分块加载；未完成时编辑器保持只读"""
+        if self.stream is None:
+            return
+        self.load_timer.stop()
+        self.stream.close()
+        self.stream = None
+        self.stream_cursor = None
+
+        document = self.editor.document()
+        document.setUndoRedoEnabled(True)
+        document.setModified(False)
+        self.editor.setReadOnly(not completed)
+        self.editor.blockSignals(False)
+        self.read_only_view = not completed
+        self.load_bar.hide()
+        tracing.record('streaming_load', 'editor', self.stream_started, tracing.now_us(),
+                       {'path': self.current_file_path, 'size': self.stream_size, 'completed': completed})
+
+    def cancel_loading(self):
+        self.finish_streaming_load(False)
+        self.read_only_view = False
+        self.editor.setReadOnly(False)
+
+    def show_large_file_viewer(self, file_path):
+        if self.large_viewer is None:
+            self.large_viewer = LargeFileViewer()
+            self.layout.addWidget(self.large_viewer)
+        self.editor.hide()
+        self.editor.clear()
+        self.large_viewer.open_file(file_path)
+        self.large_viewer.show()
+        self.read_only_view = True
+
+    def hide_large_file_viewer(self):
+        if self.large_viewer is not None and self.large_viewer.isVisible():
+            self.large_viewer.close_file()
+            self.large_viewer.hide()
+            self.editor.show()
+
     def save_file(self, file_path=None):
-        """保存文件内容"""
+        """保存文件内容
+
+        在界面线程中取得内容快照，由后台线程原子写入；返回 True 表示已提交写入，
+        失败时通过 save_failed 通知并重新标记为已修改。
+        """
         if file_path is None:
             file_path = self.current_file_path
 
+        if self.read_only_view:
+            print("Error saving file: content is not fully loaded")
+            return False
+
         if file_path:
+            with tracing.span('save_snapshot', 'editor', path=file_path):
+                content = self.content_for_save(file_path)
+            background_writer().submit(file_path, content, self.on_file_written)
+            self.current_file_path = file_path
+            self.set_modified(False)
+            return True
+        return False
+
+    def on_file_written(self, path, error):
+        # 在写入线程中调用，只发信号
+        if error is None:
+            self.file_saved.emit(path)
+        else:
+            self.save_failed.emit(path, error)
+
+    def on_save_failed(self, path, error):
+        if path == self.current_file_path:
+            self.set_modified(True)
+
+    # ---- 多文档：一个编辑器实例轮流显示多个 QTextDocument ----
+
+    def create_document(self):
+        """创建一个可以挂到此编辑器上的空文档"""
+        document = QTextDocument()
+        if isinstance(self.editor, QPlainTextEdit):
+            document.setDocumentLayout(QPlainTextDocumentLayout(document))
+        document.setDefaultFont(self.editor.document().defaultFont())
+        return document
+
+    def attach_document(self, document, read_only=False):
+        """在编辑器中显示该文档，不触发 textChanged"""
+        self.cancel_loading()
+        self.hide_large_file_viewer()
+        self.editor.blockSignals(True)
+        self.editor.setDocument(document)
+        self.editor.blockSignals(False)
+        self.track_document()
+        self.read_only_view = read_only
+        self.editor.setReadOnly(read_only)
+
+    def detach_document(self):
+        """换上一个空文档，原文档可以安全释放"""
+        self.attach_document(self.create_document())
+        self.current_file_path = None
+
+    # ---- 修改跟踪 ----
+
+    def track_document(self):
+        """订阅当前文档的变化信号；更换文档后需要重新调用"""
+        document = self.editor.document()
+        if document is self.tracked_document:
+            return
+        if self.tracked_document is not None:
             try:
-                content = self.get_content()
-                with open(file_path, 'w', encoding='utf-8') as f:
-                    f.write(content)
-                self.current_file_path = file_path
-                return True
-            except Exception as e:
-                print(f"Error saving file: {e}")
+                self.tracked_document.contentsChange.disconnect(self.on_contents_change)
+                self.tracked_document.modificationChanged.disconnect(self.modification_changed)
+            except (TypeError, RuntimeError):
+                # 文档已被释放
+                pass
+        document.contentsChange.connect(self.on_contents_change)
+        document.modificationChanged.connect(self.modification_changed)
+        self.tracked_document = document
+
+    def on_contents_change(self, position, removed, added):
+        if self.stream is not None:
+            # 分块加载不算编辑
+            return
+        change = ContentChange(self.revision(), position, removed, added)
+        self.content_changed.emit(change)
+        self.on_content_changed(change)
+
+    def on_content_changed(self, change):
+        """内容变化后的处理，例如刷新预览"""
+        pass
+
+    def revision(self):
+        """当前文档的修订号，每次编辑递增"""
+        return self.editor.document().revision()
+
+    def is_modified(self):
+        return self.editor.document().isModified()
+
+    def set_modified(self, modified):
+        self.editor.document().setModified(modified)
+
+    def document_text(self, document):
+        """序列化文档内容"""
+        return document.toHtml() if self.rich_text else document.toPlainText()
+
+    def set_document_text(self, document, text):
+        if self.rich_text:
+            document.setHtml(text)
+        else:
+            document.setPlainText(text)
+
+    def preview_state(self):
+        """当前预览的渲染结果，切换回此文档时用于恢复预览"""
+        return None
+
+    def restore_preview(self, state):
+        """切换文档后恢复或重新生成预览"""
+        pass
+
+    def cancel_preview(self):
+        """切换到其他文档前放弃尚未应用的预览，返回是否有预览被放弃"""
         return False
 
+    def shutdown(self):
+        """程序退出前停止编辑器的后台任务"""
+        pass
+
     def set_content(self, content):
         """设置编辑器内容"""
         raise NotImplementedError
 
     def get_content(self):
-        """获取编辑器内容"""
+        """序列化完整的编辑器内容，只在保存或确实需要全文时调用"""
         raise NotImplementedError
 
+    def content_for_save(self, file_path):
+        """写入 file_path 的内容，可以是文本或字节"""
+        return self.get_content()
+
     def setup_formatting_toolbar(self):
         """设置格式工具栏"""
         pass
\ No newline at end of file
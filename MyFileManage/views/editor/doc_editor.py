@@ -1,18 +1,46 @@
+import os
+
 from PyQt5.QtWidgets import QTextEdit
 from PyQt5.QtGui import QTextCharFormat, QTextCursor, QFont
+
+from models.document import DocumentType
+from utils.docx_io import docx_content_size, iter_docx_paragraphs, write_docx
+from utils.file_utils import get_document_type
+from utils.rtf_io import iter_rtf_paragraphs, read_rtf, write_rtf
 from .base_editor import BaseEditor
+from .rich_text import DocumentBuilder, document_paragraphs
+
+# 分块加载 docx/rtf 时每轮事件循环插入的段落数
+PARAGRAPH_BATCH_SIZE = 200
+# 按段落读写而不是按 HTML 处理的文档类型
+PARAGRAPH_FORMATS = (DocumentType.DOC, DocumentType.RICH_TEXT)
+
+
+def _paragraph_batches(paragraphs):
+    batch = []
+    done = 0
+    for paragraph, done in paragraphs:
+        batch.append(paragraph)
+        if len(batch) >= PARAGRAPH_BATCH_SIZE:
+            yield batch, done
+            batch = []
+    if batch:
+        yield batch, done
 
 
 class DocEditor(BaseEditor):
+    rich_text = True
+
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.builder = None
         self.setup_editor()
         self.setup_formatting_toolbar()
 
     def setup_editor(self):
         self.editor = QTextEdit()
         self.editor.setStyleSheet("font-family: Arial; font-size: 12pt;")
-        self.editor.textChanged.connect(self.on_text_changed)
+        self.track_document()
         self.layout.addWidget(self.editor)
 
     def setup_formatting_toolbar(self):
@@ -65,11 +93,56 @@ class DocEditor(BaseEditor):
         cursor.mergeCharFormat(format)
         self.editor.mergeCurrentCharFormat(format)
 
+    def load_file(self, file_path):
+        doc_type = get_document_type(file_path)
+        if doc_type in PARAGRAPH_FORMATS:
+            self.load_paragraphs(file_path, doc_type)
+        else:
+            super().load_file(file_path)
+
+    def load_paragraphs(self, file_path, doc_type):
+        """边解析边逐段构建文档；docx 不把整个 XML 读入内存，rtf 只扫描一遍"""
+        self.cancel_loading()
+        self.hide_large_file_viewer()
+        self.current_file_path = file_path
+        try:
+            if os.path.getsize(file_path) == 0:
+                # 新建的空文档
+                self.editor.clear()
+                return
+            if doc_type == DocumentType.DOC:
+                size = docx_content_size(file_path)
+                paragraphs = iter_docx_paragraphs(file_path)
+            else:
+                text = read_rtf(file_path)
+                size = len(text)
+                paragraphs = iter_rtf_paragraphs(text)
+        except Exception as e:
+            print(f"Error loading file: {e}")
+            self.editor.clear()
+            # 没能读出内容，禁止保存以免覆盖原文件
+            self.read_only_view = True
+            return
+        self.start_streaming_load(file_path, size, _paragraph_batches(paragraphs))
+        self.builder = DocumentBuilder(self.stream_cursor)
+
+    def insert_chunk(self, chunk):
+        self.builder.add_all(chunk)
+
+    def finish_streaming_load(self, completed):
+        super().finish_streaming_load(completed)
+        self.builder = None
+
+    def content_for_save(self, file_path):
+        doc_type = get_document_type(file_path)
+        if doc_type == DocumentType.DOC:
+            return write_docx(document_paragraphs(self.editor.document()))
+        if doc_type == DocumentType.RICH_TEXT:
+            return write_rtf(document_paragraphs(self.editor.document()))
+        return self.get_content()
+
     def set_content(self, content):
         self.editor.setHtml(content)
 
     def get_content(self):
-        return self.editor.toHtml()
-
-    def on_text_changed(self):
-        self.content_changed.emit(self.get_content())
\ No newline at end of file
+        return self.editor.toHtml()
\ No newline at end of file
@@ -1,9 +1,15 @@
+import time
+
 from PyQt5.QtGui import QTextCursor
 from PyQt5.QtWidgets import QSplitter, QTextEdit, QVBoxLayout
 from PyQt5.QtWebEngineWidgets import QWebEngineView
-from PyQt5.QtCore import Qt
+from PyQt5.QtCore import Qt, QTimer
 
 from views.editor.base_editor import BaseEditor
+from views.editor.preview_worker import RenderStats
+
+# 停止输入多久后刷新预览(毫秒)
+PREVIEW_DELAY_MS = 200
 
 
 class HtmlEditor(BaseEditor):
@@ -19,10 +25,19 @@ class HtmlEditor(BaseEditor):
         # HTML编辑器
         self.editor = QTextEdit()
         self.editor.setStyleSheet("font-family: Consolas; font-size: 12pt;")
-        self.editor.textChanged.connect(self.on_text_changed)
+        self.track_document()
 
-        # 预览
+        # 预览：HTML 无需转换，解析和排版在 Chromium 渲染进程中完成，
+        # 这里只做防抖并统计从提交到加载完成的耗时
         self.preview = QWebEngineView()
+        self.preview.loadFinished.connect(self.on_preview_loaded)
+        self.render_stats = RenderStats()
+        self.preview_started = None
+
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(PREVIEW_DELAY_MS)
+        self.preview_timer.timeout.connect(self.update_preview)
 
         self.splitter.addWidget(self.editor)
         self.splitter.addWidget(self.preview)
@@ -53,10 +68,31 @@ class HtmlEditor(BaseEditor):
     def get_content(self):
         return self.editor.toPlainText()
 
-    def on_text_changed(self):
-        content = self.get_content()
-        self.content_changed.emit(content)
-        self.update_preview()
+    def on_content_changed(self, change):
+        self.preview_timer.start()
 
     def update_preview(self):
-        self.preview.setHtml(self.get_content())
\ No newline at end of file
+        self.preview_timer.stop()
+        # 上一次加载尚未完成就会被新内容取代
+        if self.preview_started is not None:
+            self.render_stats.dropped += 1
+        self.preview_started = time.perf_counter()
+        self.preview.setHtml(self.get_content())
+
+    def restore_preview(self, state):
+        self.update_preview()
+
+    def cancel_preview(self):
+        # 切换回来时总会重新加载预览
+        self.preview_timer.stop()
+        return False
+
+    def on_preview_loaded(self, ok):
+        if self.preview_started is None:
+            return
+        elapsed_ms = (time.perf_counter() - self.preview_started) * 1000
+        self.preview_started = None
+        self.render_stats.rendered += 1
+        self.render_stats.last_ms = elapsed_ms
+        self.render_stats.max_ms = max(self.render_stats.max_ms, elapsed_ms)
+        self.render_stats.total_ms += elapsed_ms
\ No newline at end of file
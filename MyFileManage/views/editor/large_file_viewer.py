@@ -0,0 +1,193 @@
+from PyQt5.QtWidgets import (
+    QWidget, QVBoxLayout, QHBoxLayout, QAbstractScrollArea, QLineEdit, QPushButton, QLabel
+)
+from PyQt5.QtGui import QPainter, QFont, QColor
+from PyQt5.QtCore import Qt, QTimer
+
+from utils.line_index import LineIndex
+
+# 行索引建立期间刷新滚动条和状态的间隔(毫秒)
+INDEX_POLL_MS = 200
+
+
+class LineView(QAbstractScrollArea):
+    """只绘制可见行的虚拟化文本视图"""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.index = None
+        self.current_line = -1
+        self.max_text_width = 0
+
+        font = QFont("Consolas")
+        font.setStyleHint(QFont.Monospace)
+        font.setPointSize(12)
+        self.setFont(font)
+
+        self.verticalScrollBar().valueChanged.connect(self.viewport().update)
+        self.horizontalScrollBar().valueChanged.connect(self.viewport().update)
+
+    def set_index(self, index):
+        self.index = index
+        self.current_line = -1
+        self.max_text_width = 0
+        self.verticalScrollBar().setValue(0)
+        self.horizontalScrollBar().setValue(0)
+        self.update_scrollbars()
+        self.viewport().update()
+
+    def visible_line_count(self):
+        return max(1, self.viewport().height() // self.fontMetrics().lineSpacing())
+
+    def update_scrollbars(self):
+        count = self.index.line_count if self.index else 0
+        page = self.visible_line_count()
+        self.verticalScrollBar().setPageStep(page)
+        self.verticalScrollBar().setRange(0, max(0, count - page))
+        self.horizontalScrollBar().setPageStep(self.viewport().width())
+        self.horizontalScrollBar().setRange(0, max(0, self.max_text_width - self.viewport().width() // 2))
+
+    def scroll_to_line(self, line):
+        self.current_line = line
+        self.verticalScrollBar().setValue(max(0, line - self.visible_line_count() // 2))
+        self.viewport().update()
+
+    def first_visible_line(self):
+        return self.verticalScrollBar().value()
+
+    def resizeEvent(self, event):
+        super().resizeEvent(event)
+        self.update_scrollbars()
+
+    def paintEvent(self, event):
+        painter = QPainter(self.viewport())
+        painter.fillRect(event.rect(), self.palette().base())
+        if self.index is None:
+            return
+
+        metrics = self.fontMetrics()
+        line_height = metrics.lineSpacing()
+        char_width = metrics.averageCharWidth()
+        gutter = metrics.horizontalAdvance(str(self.index.line_count)) + 12
+        x_offset = gutter + 4 - self.horizontalScrollBar().value()
+        first = self.first_visible_line()
+        count = min(self.visible_line_count() + 1, self.index.line_count - first)
+
+        painter.setPen(self.palette().text().color())
+        for i in range(count):
+            line = first + i
+            y = i * line_height
+            if line == self.current_line:
+                painter.fillRect(0, y, self.viewport().width(), line_height, QColor(255, 240, 170))
+            text = self.index.line_text(line).expandtabs(4)
+            painter.drawText(x_offset, y + metrics.ascent(), text)
+            self.max_text_width = max(self.max_text_width, len(text) * char_width)
+
+        # 行号栏
+        painter.fillRect(0, 0, gutter, self.viewport().height(), self.palette().window())
+        painter.setPen(self.palette().mid().color())
+        for i in range(count):
+            painter.drawText(0, i * line_height, gutter - 6, line_height,
+                             Qt.AlignRight | Qt.AlignVCenter, str(first + i + 1))
+        painter.end()
+
+        if self.horizontalScrollBar().maximum() < self.max_text_width - self.viewport().width() // 2:
+            self.update_scrollbars()
+
+
+class LargeFileViewer(QWidget):
+    """超大文件的只读查看器
+
+    文件通过 mmap 访问，行偏移索引在后台建立，只渲染可见行，
+    内存占用与文件大小基本无关。
+    """
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.index = None
+        self.setup_ui()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        bar_layout = QHBoxLayout()
+        bar_layout.setContentsMargins(4, 0, 4, 0)
+        self.goto_edit = QLineEdit()
+        self.goto_edit.setPlaceholderText("跳转到行")
+        self.goto_edit.setMaximumWidth(120)
+        self.goto_edit.returnPressed.connect(self.goto_line)
+        self.find_edit = QLineEdit()
+        self.find_edit.setPlaceholderText("查找")
+        self.find_edit.returnPressed.connect(self.find_next)
+        self.find_button = QPushButton("查找下一个")
+        self.find_button.clicked.connect(self.find_next)
+        self.status_label = QLabel()
+        bar_layout.addWidget(self.goto_edit)
+        bar_layout.addWidget(self.find_edit)
+        bar_layout.addWidget(self.find_button)
+        bar_layout.addStretch()
+        bar_layout.addWidget(self.status_label)
+        layout.addLayout(bar_layout)
+
+        self.line_view = LineView()
+        layout.addWidget(self.line_view)
+
+        self.index_timer = QTimer(self)
+        self.index_timer.setInterval(INDEX_POLL_MS)
+        self.index_timer.timeout.connect(self.on_index_progress)
+
+    def open_file(self, file_path):
+        self.close_file()
+        self.index = LineIndex(file_path)
+        self.index.start()
+        self.line_view.set_index(self.index)
+        self.index_timer.start()
+        self.on_index_progress()
+
+    def close_file(self):
+        self.index_timer.stop()
+        self.line_view.set_index(None)
+        if self.index is not None:
+            self.index.close()
+            self.index = None
+        self.status_label.clear()
+
+    def on_index_progress(self):
+        if self.index is None:
+            return
+        self.line_view.update_scrollbars()
+        self.line_view.viewport().update()
+        if self.index.complete:
+            self.index_timer.stop()
+            self.status_label.setText(f"只读 | 共 {self.index.line_count} 行")
+        else:
+            percent = self.index.scanned * 100 // max(self.index.size, 1)
+            self.status_label.setText(f"只读 | 正在建立行索引 {percent}%")
+
+    def goto_line(self):
+        if self.index is None:
+            return
+        try:
+            line = int(self.goto_edit.text()) - 1
+        except ValueError:
+            return
+        if 0 <= line < self.index.line_count:
+            self.line_view.scroll_to_line(line)
+        else:
+            self.status_label.setText(f"行号超出范围(当前已知 {self.index.line_count} 行)")
+
+    def find_next(self):
+        text = self.find_edit.text()
+        if self.index is None or not text:
+            return
+        if self.line_view.current_line >= 0:
+            start = self.line_view.current_line + 1
+        else:
+            start = self.line_view.first_visible_line()
+
+        line = self.index.find(text, start)
+        if line is None:
+            self.status_label.setText("未找到" if self.index.complete else "未找到(行索引尚未完成)")
+            return
+        self.line_view.scroll_to_line(line)
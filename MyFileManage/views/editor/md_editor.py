@@ -1,8 +1,34 @@
-from PyQt5.QtCore import Qt
+import json
+
+from PyQt5.QtCore import Qt, QTimer
 from PyQt5.QtWidgets import QSplitter, QTextEdit, QVBoxLayout
 from PyQt5.QtWebEngineWidgets import QWebEngineView
-from markdown import markdown
+from utils.markdown_blocks import BlockRenderCache
 from .base_editor import BaseEditor
+from .preview_worker import PreviewRenderer
+
+# 停止输入多久后刷新预览(毫秒)
+PREVIEW_DELAY_MS = 200
+
+# 预览页面只加载一次，之后通过 mdPatch 原地替换变化的块
+PREVIEW_SHELL = """<!DOCTYPE html>
+<html><head><meta charset="utf-8"></head>
+<body><div id="md-root"></div>
+<script>
+function mdPatch(start, removeCount, blocks) {
+    var root = document.getElementById('md-root');
+    for (var i = 0; i < removeCount; i++) {
+        root.removeChild(root.children[start]);
+    }
+    var ref = root.children[start] || null;
+    for (var j = 0; j < blocks.length; j++) {
+        var div = document.createElement('div');
+        div.className = 'md-block';
+        div.innerHTML = blocks[j];
+        root.insertBefore(div, ref);
+    }
+}
+</script></body></html>"""
 
 
 class MarkdownEditor(BaseEditor):
@@ -18,10 +44,27 @@ class MarkdownEditor(BaseEditor):
         # 编辑器
         self.editor = QTextEdit()
         self.editor.setStyleSheet("font-family: Consolas; font-size: 12pt;")
-        self.editor.textChanged.connect(self.on_text_changed)
+        self.track_document()
 
         # 预览
         self.preview = QWebEngineView()
+        self.preview_ready = False
+        self.preview_blocks = []
+        self.preview_refs = ''
+        self.preview_htmls = []
+        # 渲染缓存只在渲染线程中访问
+        self.render_cache = BlockRenderCache()
+        self.renderer = PreviewRenderer(self.render_cache.render_document, self)
+        self.renderer.rendered.connect(self.apply_preview)
+        self.render_stats = self.renderer.stats
+        self.preview.loadFinished.connect(self.on_preview_loaded)
+        self.preview.setHtml(PREVIEW_SHELL)
+
+        # 输入防抖
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(PREVIEW_DELAY_MS)
+        self.preview_timer.timeout.connect(self.update_preview)
 
         self.splitter.addWidget(self.editor)
         self.splitter.addWidget(self.preview)
@@ -71,11 +114,70 @@ class MarkdownEditor(BaseEditor):
     def get_content(self):
         return self.editor.toPlainText()
 
-    def on_text_changed(self):
-        content = self.get_content()
-        self.content_changed.emit(content)
+    def on_content_changed(self, change):
+        self.preview_timer.start()
+
+    def on_preview_loaded(self, ok):
+        self.preview_ready = ok
+        self.preview_blocks = []
+        self.preview_htmls = []
         self.update_preview()
 
+    def preview_state(self):
+        return self.preview_blocks, self.preview_refs, self.preview_htmls
+
+    def restore_preview(self, state):
+        """用缓存的渲染结果整体替换预览，不再重新解析 Markdown"""
+        if state is None or not self.preview_ready:
+            self.update_preview()
+            return
+        # 切换前提交的渲染结果属于其他文档，不能再应用
+        self.cancel_preview()
+        blocks, refs, html_blocks = state
+        self.preview.page().runJavaScript(
+            f"mdPatch(0, {len(self.preview_blocks)}, {json.dumps(html_blocks)});"
+        )
+        self.preview_blocks, self.preview_refs, self.preview_htmls = blocks, refs, html_blocks
+
+    def cancel_preview(self):
+        pending = self.preview_timer.isActive() or bool(self.renderer.jobs)
+        self.preview_timer.stop()
+        self.renderer.invalidate()
+        return pending
+
+    def shutdown(self):
+        # 等待正在进行的渲染结束，退出时不再有线程访问编辑器
+        self.preview_timer.stop()
+        self.renderer.shutdown()
+
     def update_preview(self):
-        html = markdown(self.get_content())
-        self.preview.setHtml(html)
\ No newline at end of file
+        """提交后台渲染任务"""
+        self.preview_timer.stop()
+        if self.preview_ready:
+            self.renderer.submit(self.get_content())
+
+    def apply_preview(self, result):
+        """只替换预览页中变化的块"""
+        blocks, refs, html_blocks = result
+        old_blocks = self.preview_blocks if refs == self.preview_refs else []
+
+        # 找出新旧块列表的公共前缀和后缀
+        limit = min(len(old_blocks), len(blocks))
+        start = 0
+        while start < limit and old_blocks[start] == blocks[start]:
+            start += 1
+        end = 0
+        while end < limit - start and old_blocks[-1 - end] == blocks[-1 - end]:
+            end += 1
+
+        remove_count = len(self.preview_blocks) - start - end
+        changed = html_blocks[start:len(blocks) - end]
+        if not remove_count and not changed:
+            return
+
+        self.preview.page().runJavaScript(
+            f"mdPatch({start}, {remove_count}, {json.dumps(changed)});"
+        )
+        self.preview_blocks = blocks
+        self.preview_htmls = html_blocks
+        self.preview_refs = refs
\ No newline at end of file
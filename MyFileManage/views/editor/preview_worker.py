@@ -0,0 +1,108 @@
+import time
+from dataclasses import dataclass
+
+from PyQt5.QtCore import QObject, QRunnable, QThreadPool, pyqtSignal
+
+from utils import tracing
+
+
+@dataclass
+class RenderStats:
+    """预览渲染统计"""
+    rendered: int = 0
+    dropped: int = 0
+    last_ms: float = 0.0
+    max_ms: float = 0.0
+    total_ms: float = 0.0
+
+    @property
+    def average_ms(self) -> float:
+        return self.total_ms / self.rendered if self.rendered else 0.0
+
+
+class _RenderSignals(QObject):
+    finished = pyqtSignal(int, object, float)  # 序号, 结果, 耗时(毫秒)
+    failed = pyqtSignal(int, str)  # 序号, 错误信息
+
+
+class _RenderJob(QRunnable):
+    def __init__(self, sequence, render_func, args, signals, latest):
+        super().__init__()
+        self.sequence = sequence
+        self.render_func = render_func
+        self.args = args
+        self.signals = signals
+        self.latest = latest
+        # 由 PreviewRenderer 持有引用，避免被取消的任务被 Qt 删除后仍被访问
+        self.setAutoDelete(False)
+
+    def run(self):
+        # 开始前已有更新的任务，直接放弃
+        if self.sequence != self.latest():
+            self.signals.finished.emit(self.sequence, None, 0.0)
+            return
+        start = time.perf_counter()
+        try:
+            with tracing.span('preview_render', 'preview', sequence=self.sequence):
+                result = self.render_func(*self.args)
+        except Exception as e:
+            self.signals.failed.emit(self.sequence, str(e))
+            return
+        self.signals.finished.emit(self.sequence, result, (time.perf_counter() - start) * 1000)
+
+
+class PreviewRenderer(QObject):
+    """在后台线程执行预览转换，只应用最新一次的结果"""
+    rendered = pyqtSignal(object)  # 渲染结果
+
+    def __init__(self, render_func, parent=None):
+        super().__init__(parent)
+        self.render_func = render_func
+        self.stats = RenderStats()
+        self.sequence = 0
+        self.jobs = {}  # 序号 -> 尚未结束的任务
+
+        # 每个编辑器一个单线程池，保证同一时间只有一个转换在运行
+        self.pool = QThreadPool(self)
+        self.pool.setMaxThreadCount(1)
+
+        self.signals = _RenderSignals()
+        self.signals.finished.connect(self.on_job_finished)
+        self.signals.failed.connect(self.on_job_failed)
+
+    def submit(self, *args):
+        """提交新的渲染任务，尚未开始的旧任务会被取消"""
+        self.invalidate()
+        job = _RenderJob(self.sequence, self.render_func, args, self.signals, lambda: self.sequence)
+        self.jobs[self.sequence] = job
+        self.pool.start(job)
+
+    def invalidate(self):
+        """放弃尚未开始和正在运行的任务，它们的结果不会再被应用"""
+        for sequence, job in list(self.jobs.items()):
+            if self.pool.tryTake(job):
+                del self.jobs[sequence]
+                self.stats.dropped += 1
+        self.sequence += 1
+
+    def on_job_finished(self, sequence, result, elapsed_ms):
+        self.jobs.pop(sequence, None)
+        if sequence != self.sequence or result is None:
+            self.stats.dropped += 1
+            return
+
+        self.stats.rendered += 1
+        self.stats.last_ms = elapsed_ms
+        self.stats.max_ms = max(self.stats.max_ms, elapsed_ms)
+        self.stats.total_ms += elapsed_ms
+        self.rendered.emit(result)
+
+    def on_job_failed(self, sequence, message):
+        self.jobs.pop(sequence, None)
+        print(f"Error rendering preview: {message}")
+
+    def shutdown(self):
+        self.sequence += 1
+        self.pool.clear()
+        self.pool.waitForDone()
+        self.jobs.clear()
@@ -0,0 +1,236 @@
+from PyQt5.QtCore import QObject, QTimer, QPoint, QElapsedTimer
+from PyQt5.QtGui import QTextCharFormat, QTextLayout, QColor, QFont
+
+from utils.python_lexer import (
+    lex_line, STATE_NORMAL, KEYWORD, BUILTIN, SELF, STRING, COMMENT, NUMBER, DECORATOR,
+    DEFINITION, BRACKET_ERROR
+)
+
+# 每轮空闲处理的时间片(毫秒)
+IDLE_SLICE_MS = 8
+# 一次编辑最多同步重新分析的块数，其余的留给空闲时处理
+SYNC_BLOCK_LIMIT = 200
+# 空闲处理中每隔多少块检查一次时间
+DEADLINE_CHECK_INTERVAL = 32
+# userState 中的标记位：行尾状态已知，但还没有设置格式
+_UNFORMATTED = 1 << 30
+# 切换文档时把进度保存在文档的动态属性上
+_PROGRESS_PROPERTY = 'python_highlight_done'
+_PENDING_PROPERTY = 'python_highlight_pending'
+
+
+def _make_format(color, bold=False, italic=False):
+    fmt = QTextCharFormat()
+    fmt.setForeground(QColor(color))
+    if bold:
+        fmt.setFontWeight(QFont.Bold)
+    if italic:
+        fmt.setFontItalic(True)
+    return fmt
+
+
+class PythonHighlighter(QObject):
+    """增量的 Python 语法高亮
+
+    每个文本块的 userState 保存该行结束时的词法状态(三引号字符串、括号深度)。
+    编辑后从修改的块开始重新分析，直到某块的行尾状态与之前相同为止；
+    打开文件时先处理可见的块，其余的在空闲时分批完成。
+    done_until 之前的块状态都是有效的，之后的块等待空闲处理。
+    """
+
+    def __init__(self, editor, parent=None):
+        super().__init__(parent)
+        self.editor = editor  # QPlainTextEdit
+        self.document = None
+        self.done_until = 0
+        self.block_count = 0
+        self.pending_format = False  # 有只计算了状态、还没设置格式的块
+        self.sweep_from = 0
+        self.formats = {
+            KEYWORD: _make_format('#0033b3', bold=True),
+            BUILTIN: _make_format('#000080'),
+            SELF: _make_format('#94558d', italic=True),
+            STRING: _make_format('#067d17'),
+            COMMENT: _make_format('#8c8c8c', italic=True),
+            NUMBER: _make_format('#1750eb'),
+            DECORATOR: _make_format('#9e880d'),
+            DEFINITION: _make_format('#00627a', bold=True),
+            BRACKET_ERROR: _make_format('#ff0000', bold=True),
+        }
+
+        self.idle_timer = QTimer(self)
+        self.idle_timer.setInterval(0)
+        self.idle_timer.timeout.connect(self.run_idle)
+        self.editor.verticalScrollBar().valueChanged.connect(self.highlight_visible)
+
+    def set_document(self, document):
+        """高亮该文档，传入 None 时停止高亮；进度保存在文档上，切换回来时继续"""
+        if document is self.document:
+            return
+        self.idle_timer.stop()
+        if self.document is not None:
+            try:
+                self.document.setProperty(_PROGRESS_PROPERTY, self.done_until)
+                self.document.setProperty(_PENDING_PROPERTY, self.pending_format)
+                self.document.contentsChange.disconnect(self.on_contents_change)
+            except (TypeError, RuntimeError):
+                # 文档已被释放
+                pass
+        self.document = document
+        if document is None:
+            return
+        self.done_until = document.property(_PROGRESS_PROPERTY) or 0
+        self.pending_format = bool(document.property(_PENDING_PROPERTY))
+        self.sweep_from = 0
+        self.block_count = document.blockCount()
+        document.contentsChange.connect(self.on_contents_change)
+        self.highlight_visible()
+
+    # ---- 分析与设置格式 ----
+
+    @staticmethod
+    def state_before(block):
+        previous = block.previous()
+        if not previous.isValid() or previous.userState() < 0:
+            return STATE_NORMAL
+        return previous.userState() & ~_UNFORMATTED
+
+    def highlight_block(self, block, state):
+        """分析一个块并设置格式，返回行尾状态"""
+        tokens, end_state = lex_line(block.text(), state)
+        ranges = []
+        for start, length, kind in tokens:
+            format_range = QTextLayout.FormatRange()
+            format_range.start = start
+            format_range.length = length
+            format_range.format = self.formats[kind]
+            ranges.append(format_range)
+        block.layout().setFormats(ranges)
+        block.setUserState(end_state)
+        self.document.markContentsDirty(block.position(), block.length())
+        return end_state
+
+    def advance(self, until, with_formats=True, deadline=None):
+        """从 done_until 向后处理到块号 until；with_formats 为 False 时只计算状态"""
+        block = self.document.findBlockByNumber(self.done_until)
+        state = self.state_before(block)
+        processed = 0
+        while block.isValid() and block.blockNumber() < until:
+            if with_formats:
+                state = self.highlight_block(block, state)
+            else:
+                state = lex_line(block.text(), state)[1]
+                block.setUserState(state | _UNFORMATTED)
+                self.pending_format = True
+            block = block.next()
+            processed += 1
+            if deadline is not None and processed % DEADLINE_CHECK_INTERVAL == 0 \
+                    and deadline.hasExpired(IDLE_SLICE_MS):
+                break
+        self.done_until = block.blockNumber() if block.isValid() else self.document.blockCount()
+
+    def visible_range(self):
+        viewport = self.editor.viewport()
+        first = self.editor.cursorForPosition(QPoint(0, 0)).blockNumber()
+        last = self.editor.cursorForPosition(QPoint(0, viewport.height() - 1)).blockNumber()
+        return first, last
+
+    def highlight_visible(self):
+        """立即处理可见的块；它们之前还没分析的块只计算状态，格式留给空闲时设置"""
+        if self.document is None:
+            return
+        first, last = self.visible_range()
+        self.document.blockSignals(True)
+        try:
+            if self.done_until < first:
+                self.advance(first, with_formats=False)
+            if self.done_until <= last:
+                self.advance(last + 1)
+            if self.pending_format:
+                block = self.document.findBlockByNumber(first)
+                while block.isValid() and block.blockNumber() <= last:
+                    if block.userState() & _UNFORMATTED:
+                        self.highlight_block(block, self.state_before(block))
+                    block = block.next()
+        finally:
+            self.document.blockSignals(False)
+        self.schedule()
+
+    # ---- 编辑 ----
+
+    def on_contents_change(self, position, removed, added):
+        document = self.document
+        count = document.blockCount()
+        delta, self.block_count = count - self.block_count, count
+        block = document.findBlock(position)
+        number = block.blockNumber()
+        if number >= self.done_until:
+            # 尚未分析的区域，交给空闲处理
+            self.schedule()
+            return
+        self.done_until = max(number, self.done_until + delta)
+        last_changed = document.findBlock(position + added).blockNumber()
+
+        state = self.state_before(block)
+        processed = 0
+        document.blockSignals(True)
+        try:
+            while block.isValid() and block.blockNumber() < self.done_until:
+                old_state = block.userState()
+                state = self.highlight_block(block, state)
+                processed += 1
+                reached_end = block.blockNumber() >= last_changed
+                block = block.next()
+                if reached_end and old_state >= 0 and old_state & ~_UNFORMATTED == state:
+                    # 状态收敛，后面的块不受影响
+                    break
+                if processed >= SYNC_BLOCK_LIMIT:
+                    # 例如新开了一个三引号字符串，后面的块可能都要重新分析
+                    self.done_until = block.blockNumber() if block.isValid() else count
+                    break
+        finally:
+            document.blockSignals(False)
+        self.schedule()
+
+    # ---- 空闲处理 ----
+
+    def schedule(self):
+        if self.document is None:
+            return
+        if self.done_until < self.document.blockCount() or self.pending_format:
+            if not self.idle_timer.isActive():
+                self.idle_timer.start()
+
+    def run_idle(self):
+        if self.document is None:
+            self.idle_timer.stop()
+            return
+        deadline = QElapsedTimer()
+        deadline.start()
+        # 编辑或滚动后先保证可见区域正确
+        self.highlight_visible()
+        self.document.blockSignals(True)
+        try:
+            if self.done_until < self.document.blockCount():
+                self.advance(self.document.blockCount(), deadline=deadline)
+            elif self.pending_format:
+                self.format_pending(deadline)
+        finally:
+            self.document.blockSignals(False)
+        if self.done_until >= self.document.blockCount() and not self.pending_format:
+            self.idle_timer.stop()
+
+    def format_pending(self, deadline):
+        """为只计算了状态的块设置格式"""
+        block = self.document.findBlockByNumber(self.sweep_from)
+        processed = 0
+        while block.isValid() and block.blockNumber() < self.done_until:
+            if block.userState() & _UNFORMATTED:
+                self.highlight_block(block, self.state_before(block))
+            block = block.next()
+            processed += 1
+            if processed % DEADLINE_CHECK_INTERVAL == 0 and deadline.hasExpired(IDLE_SLICE_MS):
+                self.sweep_from = block.blockNumber() if block.isValid() else 0
+                return
+        self.sweep_from = 0
+        self.pending_format = False
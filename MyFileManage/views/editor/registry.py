@@ -0,0 +1,53 @@
+import importlib
+
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from models.document import DocumentType
+
+# 文档类型 -> (模块, 编辑器类)。模块在第一次打开该类型的文档时才导入，
+# 这样 QtWebEngine、markdown 等较重的依赖不会拖慢启动
+EDITOR_CLASSES = {
+    DocumentType.TEXT: ('views.editor.text_editor', 'TextEditor'),
+    DocumentType.PYTHON: ('views.editor.text_editor', 'TextEditor'),
+    DocumentType.MARKDOWN: ('views.editor.md_editor', 'MarkdownEditor'),
+    DocumentType.HTML: ('views.editor.html_editor', 'HtmlEditor'),
+    DocumentType.DOC: ('views.editor.doc_editor', 'DocEditor'),
+    DocumentType.RICH_TEXT: ('views.editor.doc_editor', 'DocEditor'),
+}
+
+
+class EditorRegistry(QObject):
+    """按需创建编辑器；使用同一编辑器类的文档类型共享一个实例"""
+    editor_created = pyqtSignal(object)  # 新建的编辑器
+
+    def __init__(self, container, parent=None):
+        super().__init__(parent)
+        self.container = container
+        self._editors = {}  # (模块, 类名) -> 编辑器
+
+    def editor_for(self, doc_type):
+        """返回该文档类型的编辑器，第一次使用时创建；不支持的类型返回 None"""
+        key = EDITOR_CLASSES.get(doc_type)
+        if key is None:
+            return None
+        editor = self._editors.get(key)
+        if editor is None:
+            module_name, class_name = key
+            editor_class = getattr(importlib.import_module(module_name), class_name)
+            editor = editor_class()
+            editor.hide()
+            self.container.layout().addWidget(editor)
+            self._editors[key] = editor
+            self.editor_created.emit(editor)
+        return editor
+
+    def editors(self):
+        """已经创建的编辑器"""
+        return list(self._editors.values())
+
+    def current_editor(self):
+        """当前显示的编辑器"""
+        for editor in self._editors.values():
+            if editor.isVisible():
+                return editor
+        return None
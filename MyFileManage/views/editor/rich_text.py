@@ -0,0 +1,139 @@
+from PyQt5.QtCore import Qt
+from PyQt5.QtGui import (
+    QTextBlockFormat, QTextCharFormat, QTextListFormat, QTextFormat, QColor, QFont
+)
+
+from models.rich_text import (
+    Paragraph, TextRun, ALIGN_LEFT, ALIGN_CENTER, ALIGN_RIGHT, ALIGN_JUSTIFY,
+    LIST_BULLET, LIST_NUMBER, HEADING_POINT_SIZES
+)
+
+_QT_ALIGNMENTS = {
+    ALIGN_LEFT: Qt.AlignLeft,
+    ALIGN_CENTER: Qt.AlignHCenter,
+    ALIGN_RIGHT: Qt.AlignRight,
+    ALIGN_JUSTIFY: Qt.AlignJustify,
+}
+_NUMBERED_LIST_STYLES = (
+    QTextListFormat.ListDecimal, QTextListFormat.ListLowerAlpha, QTextListFormat.ListUpperAlpha,
+    QTextListFormat.ListLowerRoman, QTextListFormat.ListUpperRoman,
+)
+# 图片等对象在文本中的占位符
+_OBJECT_REPLACEMENT = '\ufffc'
+
+
+def char_format(run, heading_level=0):
+    fmt = QTextCharFormat()
+    if run.bold or heading_level:
+        fmt.setFontWeight(QFont.Bold)
+    if run.italic:
+        fmt.setFontItalic(True)
+    if run.underline:
+        fmt.setFontUnderline(True)
+    if run.strike:
+        fmt.setFontStrikeOut(True)
+    if run.font_family:
+        fmt.setFontFamily(run.font_family)
+    if run.font_size:
+        fmt.setFontPointSize(run.font_size)
+    elif heading_level:
+        fmt.setFontPointSize(HEADING_POINT_SIZES.get(heading_level, 12))
+    if run.color:
+        fmt.setForeground(QColor(run.color))
+    return fmt
+
+
+class DocumentBuilder:
+    """把段落逐个追加到 QTextDocument 末尾，连续的列表段落合并到同一个列表"""
+
+    def __init__(self, cursor):
+        self.cursor = cursor
+        self.first = cursor.document().isEmpty()
+        self.lists = {}  # (列表样式, 级别) -> QTextList
+
+    def add(self, paragraph):
+        cursor = self.cursor
+        block_format = QTextBlockFormat()
+        block_format.setAlignment(_QT_ALIGNMENTS.get(paragraph.alignment, Qt.AlignLeft))
+        block_format.setHeadingLevel(paragraph.heading_level)
+        if self.first:
+            cursor.setBlockFormat(block_format)
+            self.first = False
+        else:
+            cursor.insertBlock(block_format, QTextCharFormat())
+
+        if paragraph.list_style:
+            key = (paragraph.list_style, paragraph.list_level)
+            text_list = self.lists.get(key)
+            if text_list is None:
+                list_format = QTextListFormat()
+                list_format.setStyle(QTextListFormat.ListDecimal if paragraph.list_style == LIST_NUMBER
+                                     else QTextListFormat.ListDisc)
+                list_format.setIndent(paragraph.list_level + 1)
+                self.lists[key] = cursor.createList(list_format)
+            else:
+                text_list.add(cursor.block())
+        else:
+            self.lists.clear()
+
+        for run in paragraph.runs:
+            cursor.insertText(run.text, char_format(run, paragraph.heading_level))
+
+    def add_all(self, paragraphs):
+        for paragraph in paragraphs:
+            self.add(paragraph)
+
+
+def _alignment_of(block_format):
+    alignment = block_format.alignment() & Qt.AlignHorizontal_Mask
+    if alignment & Qt.AlignHCenter:
+        return ALIGN_CENTER
+    if alignment & Qt.AlignRight:
+        return ALIGN_RIGHT
+    if alignment & Qt.AlignJustify:
+        return ALIGN_JUSTIFY
+    return ALIGN_LEFT
+
+
+def _run_of(text, fmt, heading_level):
+    run = TextRun(text)
+    run.italic = fmt.fontItalic()
+    run.underline = fmt.fontUnderline()
+    run.strike = fmt.fontStrikeOut()
+    run.font_family = fmt.fontFamily() or None
+    size = fmt.fontPointSize()
+    bold = fmt.fontWeight() > QFont.Normal
+    if heading_level:
+        # 标题自带的加粗和字号来自段落样式，与 HEADING_POINT_SIZES 相同的字号不写成文字格式
+        run.bold = False
+        if size and size != HEADING_POINT_SIZES.get(heading_level, 12):
+            run.font_size = size
+    else:
+        run.bold = bold
+        run.font_size = size or None
+    if fmt.hasProperty(QTextFormat.ForegroundBrush):
+        run.color = fmt.foreground().color().name()
+    return run
+
+
+def document_paragraphs(document):
+    """按顺序读出 QTextDocument 中的段落"""
+    block = document.begin()
+    while block.isValid():
+        block_format = block.blockFormat()
+        paragraph = Paragraph(alignment=_alignment_of(block_format),
+                              heading_level=block_format.headingLevel())
+        text_list = block.textList()
+        if text_list is not None:
+            list_format = text_list.format()
+            paragraph.list_style = LIST_NUMBER if list_format.style() in _NUMBERED_LIST_STYLES else LIST_BULLET
+            paragraph.list_level = max(list_format.indent() - 1, 0)
+        it = block.begin()
+        while not it.atEnd():
+            fragment = it.fragment()
+            if fragment.isValid():
+                text = fragment.text().replace(_OBJECT_REPLACEMENT, '')
+                paragraph.append(_run_of(text, fragment.charFormat(), paragraph.heading_level))
+            it += 1
+        yield paragraph
+        block = block.next()
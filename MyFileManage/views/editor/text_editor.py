@@ -1,8 +1,13 @@
 from PyQt5.QtWidgets import QPlainTextEdit
+
+from models.document import DocumentType
+from utils.file_utils import get_document_type
 from .base_editor import BaseEditor
 
 
 class TextEditor(BaseEditor):
+    supports_streaming = True
+
     def __init__(self, parent=None):
         super().__init__(parent)
         self.setup_editor()
@@ -10,14 +15,31 @@ class TextEditor(BaseEditor):
     def setup_editor(self):
         self.editor = QPlainTextEdit()
         self.editor.setStyleSheet("font-family: Consolas; font-size: 12pt;")
-        self.editor.textChanged.connect(self.on_text_changed)
+        # 第一次打开 Python 文件时才创建
+        self.highlighter = None
+        self.track_document()
         self.layout.addWidget(self.editor)
 
+    def load_file(self, file_path):
+        super().load_file(file_path)
+        self.update_highlighter()
+
+    def track_document(self):
+        super().track_document()
+        self.update_highlighter()
+
+    def update_highlighter(self):
+        """文本文件和 Python 文件共用此编辑器，只为 Python 文件启用语法高亮"""
+        is_python = (self.current_file_path is not None
+                     and get_document_type(self.current_file_path) == DocumentType.PYTHON)
+        if is_python and self.highlighter is None:
+            from .python_highlighter import PythonHighlighter
+            self.highlighter = PythonHighlighter(self.editor, self)
+        if self.highlighter is not None:
+            self.highlighter.set_document(self.editor.document() if is_python else None)
+
     def set_content(self, content):
         self.editor.setPlainText(content)
 
     def get_content(self):
         return self.editor.toPlainText()
-
-    def on_text_changed(self):
-        self.content_changed.emit(self.get_content())
\ No newline at end of file
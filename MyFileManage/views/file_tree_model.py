@@ -0,0 +1,356 @@
+import os
+import time
+
+from PyQt5.QtWidgets import QFileIconProvider
+from PyQt5.QtCore import Qt, QAbstractItemModel, QModelIndex, pyqtSignal
+
+from models.directory import scan_entries
+from utils import tracing
+
+# 列：名称之后是可选的统计列，目录显示包括子目录在内的汇总
+COLUMN_TITLES = ("名称", "大小", "文档数", "修改时间")
+SIZE_COLUMN, DOCUMENTS_COLUMN, MTIME_COLUMN = 1, 2, 3
+
+
+def format_size(size):
+    for unit in ("B", "KB", "MB", "GB"):
+        if size < 1024 or unit == "GB":
+            return f"{size} {unit}" if unit == "B" else f"{size:.1f} {unit}"
+        size /= 1024
+
+
+def _format_mtime(mtime_ns):
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(mtime_ns / 1e9)) if mtime_ns else ""
+
+
+class _Node:
+    __slots__ = ('name', 'path', 'is_dir', 'parent', 'row', 'children', 'child_map', 'file_stat')
+
+    def __init__(self, name, path, is_dir, parent=None, row=0):
+        self.name = name
+        self.path = path
+        self.is_dir = is_dir
+        self.parent = parent
+        self.row = row
+        self.children = None  # None 表示尚未加载
+        self.child_map = None
+        self.file_stat = None  # 文件的(大小, 修改时间)，显示统计列时才读取
+
+    @property
+    def loaded(self):
+        return self.children is not None
+
+
+def _sort_key(name, is_dir):
+    # 目录在前，名称不区分大小写
+    return (not is_dir, name.lower(), name)
+
+
+def _list_children(path):
+    """返回排好序的 [(名称, 是否目录)]，只包含目录和受支持的文档"""
+    listing = scan_entries(path)
+    items = [(name, True) for name in listing.subdirectories if not name.startswith('.')]
+    items.extend((name, False) for name, _, _ in listing.documents if not name.startswith('.'))
+    items.sort(key=lambda item: _sort_key(*item))
+    return items
+
+
+class DocumentTreeModel(QAbstractItemModel):
+    """按需加载的文档目录树模型
+
+    目录在展开时才加载，优先从文档目录数据库读取，数据库中还没有的目录才扫描磁盘；
+    折叠的目录可以通过 unload_directory 释放子节点。
+    文件变化通过 refresh_directory 以最小的增删行更新。
+    设置了目录汇总统计(DirectoryStatsTree)时，统计列显示目录的汇总和文件自身的大小。
+    """
+    directory_loaded = pyqtSignal(str)  # 目录路径
+    directory_unloaded = pyqtSignal(str)  # 目录路径
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.root = None
+        self.catalog = None
+        self.stats = None
+        self.icon_provider = QFileIconProvider()
+        self.folder_icon = self.icon_provider.icon(QFileIconProvider.Folder)
+        self.file_icon = self.icon_provider.icon(QFileIconProvider.File)
+
+    # ---- 路径与节点 ----
+
+    def setRootPath(self, path):
+        path = os.path.abspath(path)
+        released = self.loaded_directories()
+        self.beginResetModel()
+        self.root = _Node(os.path.basename(path) or path, path, True)
+        self.endResetModel()
+        for directory in released:
+            self.directory_unloaded.emit(directory)
+        self._load(self.root, QModelIndex())
+
+    def set_catalog(self, catalog):
+        """设置文档目录数据库(models.catalog.Catalog)，None 表示直接扫描磁盘"""
+        self.catalog = catalog
+
+    def set_stats(self, stats):
+        """设置目录汇总统计(models.dir_stats.DirectoryStatsTree)，None 表示不显示"""
+        self.stats = stats
+        self.stats_changed(self.loaded_directories())
+
+    def stats_changed(self, paths):
+        """汇总变化的目录：刷新其中各行的统计列，文件重新读取大小"""
+        for path in paths:
+            node = self.node_for_path(path)
+            if node is None or not node.loaded or not node.children:
+                continue
+            for child in node.children:
+                child.file_stat = None
+            self.dataChanged.emit(self._index_for_node(node.children[0], SIZE_COLUMN),
+                                  self._index_for_node(node.children[-1], MTIME_COLUMN))
+
+    def _children_of(self, path):
+        if self.catalog is not None:
+            items = self.catalog.list_directory(path)
+            if items is not None:
+                return items
+        return _list_children(path)
+
+    def rootPath(self):
+        return self.root.path if self.root else ''
+
+    def node_for_path(self, path):
+        """返回已加载的节点；路径不在树中或祖先尚未加载时返回 None"""
+        if self.root is None:
+            return None
+        relative = os.path.relpath(os.path.abspath(path), self.root.path)
+        if relative == '.':
+            return self.root
+        if relative.startswith('..'):
+            return None
+        node = self.root
+        for part in relative.split(os.sep):
+            if not node.loaded:
+                return None
+            node = node.child_map.get(part)
+            if node is None:
+                return None
+        return node
+
+    def _node(self, index):
+        return index.internalPointer() if index.isValid() else self.root
+
+    def _index_for_node(self, node, column=0):
+        if node is None or node is self.root:
+            return QModelIndex()
+        return self.createIndex(node.row, column, node)
+
+    def filePath(self, index):
+        node = self._node(index)
+        return node.path if node else ''
+
+    def isDir(self, index):
+        node = self._node(index)
+        return bool(node and node.is_dir)
+
+    def loaded_directories(self, node=None):
+        """node(默认为根)及其下所有已加载的目录路径"""
+        result = []
+        if node is None:
+            node = self.root
+        stack = [node] if node else []
+        while stack:
+            node = stack.pop()
+            if node.loaded:
+                result.append(node.path)
+                stack.extend(child for child in node.children if child.is_dir)
+        return result
+
+    # ---- QAbstractItemModel ----
+
+    def index(self, row, column=0, parent=QModelIndex()):
+        if isinstance(row, str):
+            return self._index_for_node(self.node_for_path(row), column)
+        node = self._node(parent)
+        if node is None or not node.loaded or not 0 <= row < len(node.children):
+            return QModelIndex()
+        return self.createIndex(row, column, node.children[row])
+
+    def parent(self, index=None):
+        if index is None:
+            return super().parent()
+        if not index.isValid():
+            return QModelIndex()
+        return self._index_for_node(index.internalPointer().parent)
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.column() > 0:
+            return 0
+        node = self._node(parent)
+        return len(node.children) if node and node.loaded else 0
+
+    def columnCount(self, parent=QModelIndex()):
+        return len(COLUMN_TITLES)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if orientation == Qt.Horizontal and role == Qt.DisplayRole and 0 <= section < len(COLUMN_TITLES):
+            return COLUMN_TITLES[section]
+        return None
+
+    def hasChildren(self, parent=QModelIndex()):
+        node = self._node(parent)
+        if node is None or not node.is_dir:
+            return False
+        return not node.loaded or bool(node.children)
+
+    def canFetchMore(self, parent):
+        node = self._node(parent)
+        return bool(node and node.is_dir and not node.loaded)
+
+    def fetchMore(self, parent):
+        node = self._node(parent)
+        if node and node.is_dir and not node.loaded:
+            self._load(node, parent)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        node = index.internalPointer()
+        if index.column() > 0:
+            return self._stats_data(node, index.column(), role)
+        if role == Qt.DisplayRole:
+            return node.name
+        if role == Qt.DecorationRole:
+            return self.folder_icon if node.is_dir else self.file_icon
+        if role == Qt.ToolTipRole:
+            return node.path
+        return None
+
+    def _stats_data(self, node, column, role):
+        if role == Qt.TextAlignmentRole and column in (SIZE_COLUMN, DOCUMENTS_COLUMN):
+            return int(Qt.AlignRight | Qt.AlignVCenter)
+        if role not in (Qt.DisplayRole, Qt.ToolTipRole) or self.stats is None:
+            return None
+        if node.is_dir:
+            stats = self.stats.stats(node.path)
+            if stats is None:
+                return None
+            if column == SIZE_COLUMN:
+                return format_size(stats.size) if role == Qt.DisplayRole else f"{stats.files} 个文件"
+            if column == DOCUMENTS_COLUMN:
+                if role == Qt.DisplayRole:
+                    return str(stats.documents)
+                return "\n".join(f"{doc_type.value}: {count}"
+                                  for doc_type, count in sorted(stats.counts.items(), key=lambda item: item[0].value))
+            return _format_mtime(stats.newest_ns) if role == Qt.DisplayRole else None
+
+        if role != Qt.DisplayRole or column == DOCUMENTS_COLUMN:
+            return None
+        if node.file_stat is None:
+            try:
+                st = os.stat(node.path)
+                node.file_stat = (st.st_size, st.st_mtime_ns)
+            except OSError:
+                node.file_stat = (None, 0)
+        size, mtime_ns = node.file_stat
+        if column == SIZE_COLUMN:
+            return format_size(size) if size is not None else None
+        return _format_mtime(mtime_ns)
+
+    def flags(self, index):
+        if not index.isValid():
+            return Qt.NoItemFlags
+        return Qt.ItemIsEnabled | Qt.ItemIsSelectable
+
+    # ---- 加载与增量更新 ----
+
+    def _make_child(self, node, name, is_dir, row):
+        return _Node(name, os.path.join(node.path, name), is_dir, node, row)
+
+    def _load(self, node, parent_index):
+        with tracing.span('tree_load', 'tree', path=node.path):
+            try:
+                items = self._children_of(node.path)
+            except OSError:
+                items = []
+        if items:
+            self.beginInsertRows(parent_index, 0, len(items) - 1)
+        node.children = [self._make_child(node, name, is_dir, row)
+                         for row, (name, is_dir) in enumerate(items)]
+        node.child_map = {child.name: child for child in node.children}
+        if items:
+            self.endInsertRows()
+        self.directory_loaded.emit(node.path)
+
+    def unload_directory(self, path):
+        """释放已加载目录的子节点，再次展开时重新加载；根目录始终保持加载"""
+        node = self.node_for_path(path)
+        if node is None or node is self.root or not node.is_dir or not node.loaded:
+            return
+        released = self.loaded_directories(node)
+        if node.children:
+            self.beginRemoveRows(self._index_for_node(node), 0, len(node.children) - 1)
+            node.children = None
+            node.child_map = None
+            self.endRemoveRows()
+        else:
+            node.children = None
+            node.child_map = None
+        for directory in released:
+            self.directory_unloaded.emit(directory)
+
+    @tracing.traced('tree_refresh', 'tree')
+    def refresh_directory(self, path):
+        """重新扫描一个已加载的目录，只对增删的条目发出行变化信号"""
+        node = self.node_for_path(path)
+        if node is None or not node.is_dir or not node.loaded:
+            return
+        parent_index = self._index_for_node(node)
+        try:
+            items = self._children_of(node.path)
+        except OSError:
+            items = []
+        wanted = set(items)
+
+        # 先删除不存在的条目，连续的行合并为一次删除；从后往前处理行号保持有效
+        row = len(node.children) - 1
+        while row >= 0:
+            if (node.children[row].name, node.children[row].is_dir) in wanted:
+                row -= 1
+                continue
+            last = row
+            while row > 0 and (node.children[row - 1].name, node.children[row - 1].is_dir) not in wanted:
+                row -= 1
+            self.beginRemoveRows(parent_index, row, last)
+            removed = node.children[row:last + 1]
+            for child in removed:
+                del node.child_map[child.name]
+            del node.children[row:last + 1]
+            self._renumber(node, row)
+            self.endRemoveRows()
+            row -= 1
+
+        # 两个列表顺序一致，把缺少的连续条目合并为一次插入
+        row = 0
+        position = 0
+        while position < len(items):
+            existing = node.children[row] if row < len(node.children) else None
+            if existing is not None and (existing.name, existing.is_dir) == items[position]:
+                row += 1
+                position += 1
+                continue
+            end = position
+            while end < len(items) and (existing is None or (existing.name, existing.is_dir) != items[end]):
+                end += 1
+            new_children = [self._make_child(node, name, is_dir, row)
+                            for name, is_dir in items[position:end]]
+            self.beginInsertRows(parent_index, row, row + len(new_children) - 1)
+            node.children[row:row] = new_children
+            node.child_map.update((child.name, child) for child in new_children)
+            self._renumber(node, row)
+            self.endInsertRows()
+            row += len(new_children)
+            position = end
+
+    @staticmethod
+    def _renumber(node, start):
+        for row in range(start, len(node.children)):
+            node.children[row].row = row
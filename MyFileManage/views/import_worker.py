@@ -0,0 +1,50 @@
+import time
+
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from utils.dedup import DedupStore, hash_db_path
+from utils.file_utils import BulkImporter, ImportResult
+
+# 进度信号的最小间隔(秒)，避免大量小文件时塞满事件队列
+PROGRESS_INTERVAL = 0.1
+
+
+class ImportWorker(QThread):
+    """在后台线程执行批量导入；给定 root_path 时跳过根目录中已有的相同内容"""
+    progress = pyqtSignal(object)  # ImportProgress
+    finished_import = pyqtSignal(object)  # ImportResult
+
+    def __init__(self, sources, dest_dir, root_path=None, parent=None):
+        super().__init__(parent)
+        self.sources = list(sources)
+        self.dest_dir = dest_dir
+        self.root_path = root_path
+        self._cancelled = False
+        self._last_progress = 0.0
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        dedup = None
+        try:
+            # SQLite 连接只能在创建它的线程中使用
+            dedup = DedupStore(self.root_path, hash_db_path(self.root_path)) if self.root_path else None
+            result = BulkImporter(self.dest_dir, dedup=dedup).run(
+                self.sources,
+                progress=self.on_progress,
+                is_cancelled=lambda: self._cancelled
+            )
+        except Exception as e:
+            print(f"Error importing files: {e}")
+            result = ImportResult(failed=[(src, str(e)) for src in self.sources])
+        finally:
+            if dedup is not None:
+                dedup.close()
+        self.finished_import.emit(result)
+
+    def on_progress(self, progress):
+        now = time.monotonic()
+        if now - self._last_progress >= PROGRESS_INTERVAL or progress.files_done == progress.files_total:
+            self._last_progress = now
+            self.progress.emit(progress)
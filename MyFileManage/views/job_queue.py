@@ -0,0 +1,107 @@
+import time
+
+from PyQt5.QtCore import QObject, QThread, pyqtSignal
+
+# 进度信号的最小间隔(秒)
+PROGRESS_INTERVAL = 0.1
+
+
+class FileJob:
+    """排队执行的文件操作
+
+    func(progress, is_cancelled) 在后台线程中执行，progress 接收(已完成数, 总数)；
+    结束后在界面线程中调用 on_finished(job)，结果和异常分别在 result、error 中。
+    """
+
+    def __init__(self, label, func, on_finished=None):
+        self.label = label
+        self.func = func
+        self.on_finished = on_finished
+        self.result = None
+        self.error = None
+        self.cancelled = False
+
+
+class JobWorker(QThread):
+    progress = pyqtSignal(object, int, int)  # 任务, 已完成数, 总数
+    finished_job = pyqtSignal(object)  # 任务
+
+    def __init__(self, job, parent=None):
+        super().__init__(parent)
+        self.job = job
+        self._cancelled = False
+        self._last_progress = 0.0
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        try:
+            self.job.result = self.job.func(self.on_progress, lambda: self._cancelled)
+        except Exception as e:
+            self.job.error = e
+        self.job.cancelled = self._cancelled
+        self.finished_job.emit(self.job)
+
+    def on_progress(self, done, total):
+        now = time.monotonic()
+        if now - self._last_progress >= PROGRESS_INTERVAL or done == total:
+            self._last_progress = now
+            self.progress.emit(self.job, done, total)
+
+
+class JobQueue(QObject):
+    """文件操作的后台队列，任务按提交顺序逐个执行，后面的任务能看到前面任务的结果"""
+    job_started = pyqtSignal(object)
+    job_progress = pyqtSignal(object, int, int)
+    job_finished = pyqtSignal(object)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.pending = []
+        self.worker = None
+
+    @property
+    def current(self):
+        return self.worker.job if self.worker is not None else None
+
+    def submit(self, job):
+        self.pending.append(job)
+        if self.worker is None:
+            self._start_next()
+
+    def cancel_current(self):
+        if self.worker is not None:
+            self.worker.cancel()
+
+    def shutdown(self):
+        """取消排队和正在执行的任务，等待后台线程结束"""
+        self.pending.clear()
+        if self.worker is not None:
+            self.worker.finished_job.disconnect(self.on_job_finished)
+            self.worker.cancel()
+            self.worker.wait()
+            self.worker.deleteLater()
+            self.worker = None
+
+    def _start_next(self):
+        if not self.pending:
+            return
+        job = self.pending.pop(0)
+        self.worker = JobWorker(job, self)
+        self.worker.progress.connect(self.job_progress)
+        self.worker.finished_job.connect(self.on_job_finished)
+        self.worker.start()
+        self.job_started.emit(job)
+
+    def on_job_finished(self, job):
+        self.worker.wait()
+        self.worker.deleteLater()
+        self.worker = None
+        if job.on_finished is not None:
+            try:
+                job.on_finished(job)
+            except Exception as e:
+                print(f"Error finishing job: {e}")
+        self.job_finished.emit(job)
+        self._start_next()
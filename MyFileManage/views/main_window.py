@@ -1,27 +1,74 @@
+import errno
 import os
+import sqlite3
+from functools import partial
 
 from PyQt5.QtWidgets import (
-    QMainWindow, QWidget, QHBoxLayout, QSplitter, QFileDialog, QMessageBox
+    QMainWindow, QWidget, QHBoxLayout, QVBoxLayout, QSplitter, QFileDialog, QMessageBox,
+    QProgressDialog, QLabel, QProgressBar, QToolButton
 )
-from PyQt5.QtCore import Qt, QSettings, QDir, QByteArray
-
-from utils.file_utils import get_document_type
-from views.editor.doc_editor import DocEditor
-from views.editor.html_editor import HtmlEditor
-from views.editor.md_editor import MarkdownEditor
-from views.editor.text_editor import TextEditor
+from PyQt5.QtCore import Qt, QSettings, QDir, QByteArray, QTimer
+from PyQt5.QtGui import QKeySequence
+
+from models.catalog import Catalog
+from models.directory import scan_cache
+from search.path_index import MAX_RECENT
+from utils.atomic_writer import background_writer
+from utils.autosave import DEFAULT_AUTOSAVE_SECONDS, JournalStore
+from utils.file_utils import count_tree, move_path, remove_tree
+from utils.trash import Trash
+from utils import tracing
+from views.catalog_worker import CatalogSyncWorker, catalog_db_path
+from views.document_cache import DEFAULT_BUDGET_MB
+from views.dir_stats_service import DirectoryStatsService
+from views.duplicates_dialog import DuplicateWorker, DuplicatesDialog
+from views.import_worker import ImportWorker
+from views.job_queue import FileJob, JobQueue
+from views.quick_open import QuickOpenDialog
+from views.search_panel import SearchPanel
 from views.tree_view import DocumentTreeView
+from views.watch_service import WatchService
+from views.workspace import DocumentWorkspace
 from models.document import DocumentType
 
+# 卡顿检测的心跳间隔(毫秒)
+STALL_BEAT_MS = 50
+# 可撤销的删除和移动操作数
+MAX_FILE_UNDO = 50
+# 定期在后台重建快速打开索引和目录统计的间隔(毫秒)，用于发现未监视的目录中的变化
+RESCAN_INTERVAL_MS = 10 * 60 * 1000
+
+
+def _delete_permanently(path, progress, is_cancelled):
+    total = count_tree(path)
+    return remove_tree(path, lambda removed: progress(removed, total), is_cancelled)
+
 
 class MainWindow(QMainWindow):
     def __init__(self):
         super().__init__()
+        self.import_worker = None
+        self.import_progress = None
+        self.duplicate_worker = None
+        self.catalog = None
+        self.catalog_worker = None
+        # 同步任务进行中时到达的变化，任务结束后再同步
+        self.catalog_pending_paths = set()
+        self.catalog_full_sync_pending = False
+        # 恢复日志：记录每个文档最后写入日志时的修订号
+        self.journals = JournalStore(background_writer())
+        self.journaled_revisions = {}
+        self.stall_detector = None
+        self.stall_timer = None
+        # 可撤销的文件操作：('delete', TrashEntry) 或 ('move', 原路径, 新路径)
+        self.file_undo = []
         self.setWindowTitle("个人文档管理系统")
         self.resize(1200, 800)
         self.setup_ui()
         self.setup_connections()
         self.load_settings()
+        # 窗口显示后再检查上次异常退出留下的日志
+        QTimer.singleShot(0, self.recover_unsaved_documents)
 
     def setup_ui(self):
         # 主窗口布局
@@ -35,32 +82,122 @@ class MainWindow(QMainWindow):
         self.splitter = QSplitter(Qt.Horizontal)
         main_layout.addWidget(self.splitter)
 
-        # 左侧目录树
-        self.tree_view = DocumentTreeView()
-        self.splitter.addWidget(self.tree_view)
-
-        # 右侧编辑器区域
-        self.editor_stack = QWidget()
-        self.editor_stack.setLayout(QHBoxLayout())
-        self.editor_stack.layout().setContentsMargins(0, 0, 0, 0)
-
-        # 创建各种编辑器
-        self.editors = {
-            DocumentType.TEXT: TextEditor(),
-            DocumentType.MARKDOWN: MarkdownEditor(),
-            DocumentType.DOC: DocEditor(),
-            DocumentType.HTML: HtmlEditor(),
-            DocumentType.PYTHON: TextEditor(),
-            DocumentType.RICH_TEXT: DocEditor()
-        }
+        # 左侧搜索框和目录树
+        left_panel = QWidget()
+        left_layout = QVBoxLayout(left_panel)
+        left_layout.setContentsMargins(0, 0, 0, 0)
+
+        self.search_panel = SearchPanel()
+        left_layout.addWidget(self.search_panel)
 
-        for editor in self.editors.values():
-            self.editor_stack.layout().addWidget(editor)
-            editor.hide()
+        self.tree_view = DocumentTreeView()
+        left_layout.addWidget(self.tree_view)
+        self.splitter.addWidget(left_panel)
 
-        self.splitter.addWidget(self.editor_stack)
+        # 右侧多文档标签页，打开的文档缓存在内存预算以内
+        settings = QSettings("PersonalDocManager", "DocumentManager")
+        budget_mb = int(settings.value("document_cache_mb", DEFAULT_BUDGET_MB))
+        self.workspace = DocumentWorkspace(budget_mb * 1024 * 1024)
+        self.editor_registry = self.workspace.editor_registry
+        self.workspace.cache.on_spill = self.journals.write
+
+        # 定期把未保存的修改写入恢复日志
+        autosave_seconds = int(settings.value("autosave_seconds", DEFAULT_AUTOSAVE_SECONDS))
+        self.autosave_timer = QTimer(self)
+        self.autosave_timer.timeout.connect(self.autosave)
+        if autosave_seconds > 0:
+            self.autosave_timer.start(autosave_seconds * 1000)
+
+        self.splitter.addWidget(self.workspace)
         self.splitter.setSizes([300, 900])
 
+        # 文件变化监视：只监视目录树中已加载的目录
+        self.watch_service = WatchService(self)
+
+        self.quick_open = QuickOpenDialog(self)
+
+        # 目录汇总统计：启用后建立一次，之后只按文件变化更新祖先目录
+        self.stats_service = DirectoryStatsService(self)
+
+        # 折叠或从未展开的目录没有监视，其中的变化靠定期重建发现
+        self.rescan_timer = QTimer(self)
+        self.rescan_timer.timeout.connect(self.quick_open.refresh)
+        self.rescan_timer.timeout.connect(self.stats_service.refresh)
+        self.rescan_timer.start(RESCAN_INTERVAL_MS)
+
+        # 删除回收区内容和移动文件在后台依次执行，进度显示在状态栏
+        self.jobs = JobQueue(self)
+        self.job_label = QLabel()
+        self.job_progress = QProgressBar()
+        self.job_progress.setMaximumWidth(200)
+        self.job_cancel = QToolButton()
+        self.job_cancel.setText("取消")
+        for widget in (self.job_label, self.job_progress, self.job_cancel):
+            self.statusBar().addPermanentWidget(widget)
+            widget.hide()
+
+        # 文件菜单
+        file_menu = self.menuBar().addMenu("文件")
+        quick_open_action = file_menu.addAction("快速打开...")
+        quick_open_action.setShortcut(QKeySequence("Ctrl+P"))
+        quick_open_action.triggered.connect(self.quick_open.popup)
+        self.recent_menu = file_menu.addMenu("最近文档")
+        self.recent_menu.aboutToShow.connect(self.populate_recent_menu)
+        self.stats_action = file_menu.addAction("显示目录统计")
+        self.stats_action.setCheckable(True)
+        self.stats_action.setChecked(settings.value("show_directory_stats", False, type=bool))
+        self.stats_action.toggled.connect(self.set_stats_visible)
+
+        file_menu.addSeparator()
+        self.undo_file_action = file_menu.addAction("撤销删除/移动")
+        self.undo_file_action.setShortcut(QKeySequence("Ctrl+Alt+Z"))
+        self.undo_file_action.triggered.connect(self.undo_file_operation)
+        self.undo_file_action.setEnabled(False)
+        file_menu.addAction("清空回收区...").triggered.connect(self.empty_trash)
+
+        # 性能跟踪：环境变量或设置项启用
+        file_menu.addSeparator()
+        self.tracing_action = file_menu.addAction("性能跟踪")
+        self.tracing_action.setCheckable(True)
+        tracing_enabled = tracing.enabled_from_env()
+        if tracing_enabled is None:
+            tracing_enabled = settings.value("tracing_enabled", False, type=bool)
+        self.tracing_action.setChecked(tracing_enabled)
+        self.tracing_action.toggled.connect(self.set_tracing_enabled)
+        file_menu.addAction("导出性能跟踪...").triggered.connect(self.export_trace)
+        self.set_tracing_enabled(self.tracing_action.isChecked())
+
+    def set_tracing_enabled(self, enabled):
+        tracing.set_enabled(enabled)
+        if enabled and self.stall_detector is None:
+            self.stall_detector = tracing.StallDetector(interval_ms=STALL_BEAT_MS)
+            self.stall_timer = QTimer(self)
+            self.stall_timer.timeout.connect(self.stall_detector.beat)
+            self.stall_timer.start(STALL_BEAT_MS)
+            self.stall_detector.start()
+        elif not enabled and self.stall_detector is not None:
+            self.stall_timer.stop()
+            self.stall_detector.stop()
+            self.stall_detector = None
+            self.stall_timer = None
+
+    def set_stats_visible(self, visible):
+        self.tree_view.set_stats_visible(visible)
+        self.stats_service.set_enabled(visible)
+
+    def export_trace(self):
+        file_path, _ = QFileDialog.getSaveFileName(
+            self, "导出性能跟踪", "trace.json", "Chrome Trace (*.json)"
+        )
+        if not file_path:
+            return
+        try:
+            count = tracing.export_chrome_trace(file_path)
+        except OSError as e:
+            QMessageBox.critical(self, "错误", f"导出失败: {e}")
+            return
+        self.statusBar().showMessage(f"已导出 {count} 个跟踪事件", 3000)
+
     def setup_connections(self):
         # 连接目录树信号
         self.tree_view.document_selected.connect(self.open_document)
@@ -68,18 +205,52 @@ class MainWindow(QMainWindow):
         self.tree_view.new_directory_requested.connect(self.create_new_directory)
         self.tree_view.rename_requested.connect(self.rename_item)
         self.tree_view.delete_requested.connect(self.delete_item)
+        self.tree_view.move_requested.connect(self.move_item)
+        self.tree_view.import_requested.connect(self.import_into_directory)
+        self.tree_view.find_duplicates_requested.connect(self.find_duplicates)
+
+        # 连接搜索信号
+        self.search_panel.document_selected.connect(self.open_document)
+        self.quick_open.document_selected.connect(self.open_document)
+
+        # 连接目录统计信号
+        self.stats_service.stats_ready.connect(self.tree_view.model.set_stats)
+        self.stats_service.stats_changed.connect(self.tree_view.model.stats_changed)
+
+        # 连接后台文件任务信号
+        self.jobs.job_started.connect(self.on_job_started)
+        self.jobs.job_progress.connect(self.on_job_progress)
+        self.jobs.job_finished.connect(self.on_job_finished)
+        self.job_cancel.clicked.connect(self.jobs.cancel_current)
+
+        # 连接文件监视信号
+        self.tree_view.model.directory_loaded.connect(self.watch_service.watch)
+        self.tree_view.model.directory_unloaded.connect(self.watch_service.unwatch)
+        self.watch_service.changes_ready.connect(self.apply_file_changes)
 
         # 连接编辑器信号
-        for editor in self.editors.values():
-            editor.save_requested.connect(self.save_current_document)
-            editor.save_as_requested.connect(self.save_as_current_document)
+        self.editor_registry.editor_created.connect(self.connect_editor)
+        self.workspace.document_closed.connect(self.discard_journal)
+
+    def connect_editor(self, editor):
+        editor.save_requested.connect(self.save_current_document)
+        editor.save_as_requested.connect(self.save_as_current_document)
+        editor.file_saved.connect(self.on_file_saved)
+        editor.save_failed.connect(self.on_save_failed)
 
     def load_settings(self):
         settings = QSettings("PersonalDocManager", "DocumentManager")
 
         # 加载最后路径，默认使用用户主目录
         last_path = settings.value("last_path", QDir.homePath())
+        self.open_catalog(last_path)
         self.tree_view.set_root_path(last_path)
+        self.search_panel.set_root_path(last_path)
+        recent = self.catalog.recent_documents(MAX_RECENT) if self.catalog is not None else []
+        self.quick_open.set_root_path(last_path, {record.path: record.last_opened for record in recent})
+        self.stats_service.set_root_path(last_path)
+        self.set_stats_visible(self.stats_action.isChecked())
+        self.purge_expired_trash()
 
         # 加载窗口几何设置，带默认值和类型转换
         geometry = settings.value("window_geometry", None)
@@ -107,24 +278,91 @@ class MainWindow(QMainWindow):
         settings.setValue("last_path", self.tree_view.model.rootPath())
         settings.setValue("window_geometry", self.saveGeometry())
         settings.setValue("window_state", self.saveState())
+        settings.setValue("show_directory_stats", self.stats_action.isChecked())
+        if tracing.enabled_from_env() is None:
+            settings.setValue("tracing_enabled", self.tracing_action.isChecked())
 
     # def ", self.saveState())
 
     def open_document(self, file_path):
-        doc_type = get_document_type(file_path)
-        if doc_type is (file_path):
-            if doc_type is None:
-                QMessageBox.warning(self, "错误", "不支持的文件类型")
-                return
-
-        # 隐藏所有编辑器
-        for editor in self.editors.values():
-            editor.hide()
-
-        # 显示对应的编辑器并加载文件
-        editor = self.editors[doc_type]
-        editor.show()
-        editor.load_file(file_path)
+        if not self.workspace.open_document(file_path):
+            QMessageBox.warning(self, "错误", "不支持的文件类型")
+            return
+        if self.catalog is not None:
+            try:
+                self.catalog.mark_opened(os.path.abspath(file_path))
+            except sqlite3.OperationalError as e:
+                # 后台同步正占用写锁，打开记录可以丢失
+                print(f"Error recording opened document: {e}")
+        self.quick_open.touch(file_path)
+
+    def open_catalog(self, root_path):
+        """打开根目录的文档目录数据库，并在后台同步磁盘上的变化"""
+        root_path = os.path.abspath(root_path)
+        self.stop_catalog_sync()
+        if self.catalog is not None:
+            self.catalog.close()
+        self.catalog = Catalog(catalog_db_path(root_path))
+        self.tree_view.model.set_catalog(self.catalog)
+        self.start_catalog_sync(root_path)
+
+    def start_catalog_sync(self, root_path, paths=None):
+        """在后台同步整个根目录，或只同步 paths；已有同步任务时排队"""
+        if self.catalog_worker is not None:
+            if paths is None:
+                self.catalog_full_sync_pending = True
+            else:
+                self.catalog_pending_paths.update(paths)
+            return
+        self.catalog_worker = CatalogSyncWorker(root_path, None if paths is None else list(paths), self)
+        self.catalog_worker.finished_sync.connect(self.on_catalog_synced)
+        self.catalog_worker.start()
+
+    def stop_catalog_sync(self):
+        self.catalog_pending_paths.clear()
+        self.catalog_full_sync_pending = False
+        if self.catalog_worker is not None:
+            self.catalog_worker.cancel()
+            self.catalog_worker.wait()
+            self.catalog_worker.deleteLater()
+            self.catalog_worker = None
+
+    def on_catalog_synced(self, changes):
+        # 已被取消并替换的同步任务发出的信号可能晚到
+        if self.catalog_worker is None or self.sender() is not self.catalog_worker:
+            return
+        paths = self.catalog_worker.paths
+        self.catalog_worker.wait()
+        self.catalog_worker.deleteLater()
+        self.catalog_worker = None
+        if changes:
+            # 目录树从数据库读取，同步后更新受影响的已加载目录
+            if paths is None:
+                directories = self.tree_view.model.loaded_directories()
+            else:
+                directories = {os.path.dirname(path) for path in paths} | set(paths)
+            for dir_path in directories:
+                self.tree_view.model.refresh_directory(dir_path)
+
+        root_path = self.tree_view.model.rootPath()
+        if self.catalog_full_sync_pending:
+            self.catalog_full_sync_pending = False
+            self.catalog_pending_paths.clear()
+            self.start_catalog_sync(root_path)
+        elif self.catalog_pending_paths:
+            paths, self.catalog_pending_paths = self.catalog_pending_paths, set()
+            self.start_catalog_sync(root_path, paths)
+
+    def populate_recent_menu(self):
+        self.recent_menu.clear()
+        documents = self.catalog.recent_documents() if self.catalog is not None else []
+        if not documents:
+            self.recent_menu.addAction("(无)").setEnabled(False)
+            return
+        for record in documents:
+            action = self.recent_menu.addAction(record.name)
+            action.setToolTip(record.path)
+            action.triggered.connect(lambda checked=False, path=record.path: self.open_document(path))
 
     def create_new_document(self, dir_path, name, doc_type_str):
         try:
@@ -137,10 +375,7 @@ class MainWindow(QMainWindow):
 
             with open(file_path, 'w') as f:
                 f.write("")
-
-            # 刷新目录树
-            index = self.tree_view.model.index(dir_path)
-            self.tree_view.model.refresh(index)
+            self.watch_service.notify([file_path])
 
             # 打开新创建的文件
             self.open_document(file_path)
@@ -151,10 +386,7 @@ class MainWindow(QMainWindow):
         try:
             dir_path = os.path.join(parent_path, name)
             os.makedirs(dir_path, exist_ok=True)
-
-            # 刷新目录树
-            index = self.tree_view.model.index(parent_path)
-            self.tree_view.model.refresh(index)
+            self.watch_service.notify([dir_path])
         except Exception as e:
             QMessageBox.critical(self, "错误", f"创建目录失败: {str(e)}")
 
@@ -165,65 +397,381 @@ class MainWindow(QMainWindow):
             new_path = os.path.join(dir_name, new_name + ext)
 
             os.rename(old_path, new_path)
+            self.watch_service.notify([old_path, new_path])
 
-            # 刷新目录树
-            index = self.tree_view.model.index(dir_name)
-            self.tree_view.model.refresh(index)
-
-            # 如果重命名的是当前打开的文件，更新编辑器
-            for editor in self.editors.values():
-                if editor.current_file_path == old_path:
-                    editor.current_file_path = new_path
-                    break
+            # 更新已打开文档的路径
+            self.workspace.rename_path(old_path, new_path)
         except Exception as e:
             QMessageBox.critical(self, "错误", f"重命名失败: {str(e)}")
 
+    def trash(self):
+        return Trash(self.tree_view.model.rootPath())
+
+    def close_documents_under(self, path):
+        for open_path in self.workspace.open_paths_under(path):
+            self.workspace.close_document(open_path, ask=False)
+
+    def confirm_discard_modified(self, path):
+        """path 或其下有未保存修改的已打开文档时询问是否放弃修改，用户取消时返回 False"""
+        modified = [open_path for open_path in self.workspace.open_paths_under(path)
+                    if self.workspace.is_modified(self.workspace.cache.get(open_path))]
+        if not modified:
+            return True
+        names = '\n'.join(os.path.relpath(open_path, os.path.dirname(path)) for open_path in modified[:10])
+        if len(modified) > 10:
+            names += f'\n... 共 {len(modified)} 个文档'
+        reply = QMessageBox.question(
+            self, "确认删除", f'以下已打开的文档有未保存的修改，删除后修改将丢失:\n{names}\n\n仍要删除吗?',
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.No
+        )
+        return reply == QMessageBox.Yes
+
     def delete_item(self, path, is_dir):
+        """移入回收区，可以撤销；回收区中的内容由后台任务清除"""
+        name = os.path.basename(path)
+        if not self.confirm_discard_modified(path):
+            return
         try:
-            if is_dir:
-                import shutil
-                shutil.rmtree(path)
-            else:
-                os.remove(path)
-
-            # 刷新目录树
-            dir_name = os.path.dirname(path)
-            index = self.tree_view.model.index(dir_name)
-            self.tree_view.model.refresh(index)
-
-            # 如果删除的是当前打开的文件，关闭编辑器
-            for editor in self.editors.values():
-                if editor.current_file_path == path:
-                    editor.hide()
-                    editor.current_file_path = None
-                    break
-        except Exception as e:
-            QMessageBox.critical(self, "错误", f"删除失败: {str(e)}")
+            entry = self.trash().move_to_trash(path)
+        except (OSError, ValueError) as e:
+            if getattr(e, 'errno', None) != errno.EXDEV:
+                QMessageBox.critical(self, "错误", f"删除失败: {str(e)}")
+                return
+            # 与根目录不在同一文件系统上，改名进不了回收区
+            reply = QMessageBox.question(
+                self, "确认删除", f'"{name}" 无法移入回收区，要直接删除吗? 删除后无法撤销。',
+                QMessageBox.Yes | QMessageBox.No, QMessageBox.No
+            )
+            if reply == QMessageBox.Yes:
+                self.close_documents_under(path)
+                self.jobs.submit(FileJob(f"删除 {name}", partial(_delete_permanently, path),
+                                         lambda job: self.on_delete_finished(job, path)))
+            return
+
+        self.watch_service.notify([path])
+        self.close_documents_under(path)
+        self.push_file_undo(('delete', entry))
+        self.statusBar().showMessage(f'已将 "{name}" 移入回收区 (Ctrl+Alt+Z 撤销)', 5000)
+
+    def on_delete_finished(self, job, path):
+        self.watch_service.notify([path])
+        if job.error is not None:
+            QMessageBox.critical(self, "错误", f"删除失败: {job.error}")
+        elif job.cancelled:
+            self.statusBar().showMessage(f'已取消删除 "{os.path.basename(path)}"，部分内容已被删除', 5000)
+
+    def move_item(self, path, dest_dir):
+        dest_path = os.path.join(dest_dir, os.path.basename(path))
+        if os.path.abspath(dest_path) == os.path.abspath(path):
+            return
+        if os.path.lexists(dest_path):
+            QMessageBox.warning(self, "错误", "目标目录中已有同名的文件或目录")
+            return
+        self.submit_move(path, dest_path, record_undo=True)
+
+    def submit_move(self, src_path, dest_path, record_undo):
+        self.jobs.submit(FileJob(
+            f"移动 {os.path.basename(src_path)}", partial(move_path, src_path, dest_path),
+            lambda job: self.on_move_finished(job, src_path, dest_path, record_undo)
+        ))
+
+    def on_move_finished(self, job, src_path, dest_path, record_undo):
+        self.watch_service.notify([src_path, dest_path])
+        name = os.path.basename(src_path)
+        if job.error is not None:
+            QMessageBox.critical(self, "错误", f"移动失败: {job.error}")
+        elif job.result:
+            self.workspace.rename_path(src_path, dest_path)
+            if record_undo:
+                self.push_file_undo(('move', src_path, dest_path))
+            self.statusBar().showMessage(f'已移动 "{name}"', 5000)
+        else:
+            self.statusBar().showMessage(f'已取消移动 "{name}"', 5000)
+
+    def push_file_undo(self, record):
+        self.file_undo.append(record)
+        del self.file_undo[:-MAX_FILE_UNDO]
+        self.update_undo_action()
+
+    def update_undo_action(self):
+        if not self.file_undo:
+            self.undo_file_action.setText("撤销删除/移动")
+            self.undo_file_action.setEnabled(False)
+            return
+        record = self.file_undo[-1]
+        if record[0] == 'delete':
+            text = f'撤销删除 "{record[1].name}"'
+        else:
+            text = f'撤销移动 "{os.path.basename(record[1])}"'
+        self.undo_file_action.setText(text)
+        self.undo_file_action.setEnabled(True)
+
+    def undo_file_operation(self):
+        if not self.file_undo:
+            return
+        record = self.file_undo.pop()
+        self.update_undo_action()
+        if record[0] == 'delete':
+            try:
+                path = self.trash().restore(record[1])
+            except OSError as e:
+                QMessageBox.critical(self, "错误", f"撤销失败: {str(e)}")
+                return
+            self.watch_service.notify([path])
+            self.statusBar().showMessage(f'已还原 "{record[1].name}"', 5000)
+        else:
+            _, src_path, dest_path = record
+            if os.path.lexists(src_path):
+                QMessageBox.critical(self, "错误", f"撤销失败: {src_path} 已存在")
+                return
+            self.submit_move(dest_path, src_path, record_undo=False)
+
+    def empty_trash(self):
+        trash = self.trash()
+        entries = trash.entries()
+        if not entries:
+            QMessageBox.information(self, "回收区", "回收区是空的")
+            return
+        reply = QMessageBox.question(
+            self, "清空回收区", f"要永久删除回收区中的 {len(entries)} 项吗? 删除后无法撤销。",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.No
+        )
+        if reply != QMessageBox.Yes:
+            return
+        self.file_undo = [record for record in self.file_undo if record[0] != 'delete']
+        self.update_undo_action()
+        self.submit_purge(trash, entries)
+
+    def purge_expired_trash(self):
+        entries = self.trash().expired()
+        if entries:
+            self.submit_purge(self.trash(), entries)
+
+    def submit_purge(self, trash, entries):
+        self.jobs.submit(FileJob(f"清除回收区 ({len(entries)} 项)", partial(trash.purge, entries),
+                                 self.on_purge_finished))
+
+    def on_purge_finished(self, job):
+        if job.error is not None:
+            print(f"Error purging trash: {job.error}")
+            self.statusBar().showMessage(f"清除回收区失败: {job.error}", 10000)
+        elif job.result:
+            self.statusBar().showMessage(f"已从回收区清除 {job.result} 项", 5000)
+
+    def on_job_started(self, job):
+        label = job.label
+        if self.jobs.pending:
+            label += f" (另有 {len(self.jobs.pending)} 个任务排队)"
+        self.job_label.setText(label)
+        # 总数未知之前显示为忙碌
+        self.job_progress.setRange(0, 0)
+        for widget in (self.job_label, self.job_progress, self.job_cancel):
+            widget.show()
+
+    def on_job_progress(self, job, done, total):
+        self.job_progress.setRange(0, max(total, 1))
+        self.job_progress.setValue(done)
+
+    def on_job_finished(self, job):
+        if not self.jobs.pending:
+            for widget in (self.job_label, self.job_progress, self.job_cancel):
+                widget.hide()
+
+    def import_into_directory(self, dest_dir, is_folder):
+        if self.import_worker is not None:
+            QMessageBox.warning(self, "警告", "已有导入任务正在进行")
+            return
+
+        if is_folder:
+            folder = QFileDialog.getExistingDirectory(self, "导入文件夹")
+            sources = [folder] if folder else []
+        else:
+            sources, _ = QFileDialog.getOpenFileNames(self, "导入文件")
+        if not sources:
+            return
+
+        self.import_progress = QProgressDialog("正在准备导入...", "取消", 0, 0, self)
+        self.import_progress.setWindowTitle("导入")
+        self.import_progress.setMinimumDuration(500)
+
+        self.import_worker = ImportWorker(sources, dest_dir, self.tree_view.model.rootPath(), self)
+        self.import_worker.progress.connect(self.on_import_progress)
+        self.import_worker.finished_import.connect(self.on_import_finished)
+        self.import_progress.canceled.connect(self.import_worker.cancel)
+        self.import_worker.start()
+
+    def on_import_progress(self, progress):
+        self.import_progress.setMaximum(max(progress.files_total, 1))
+        self.import_progress.setValue(progress.files_done)
+        self.import_progress.setLabelText(
+            f"已导入 {progress.files_done}/{progress.files_total} 个文件 "
+            f"({progress.throughput / 1024 / 1024:.1f} MB/s)"
+        )
+
+    def on_import_finished(self, result):
+        dest_dir = self.import_worker.dest_dir
+        self.import_worker.wait()
+        self.import_worker.deleteLater()
+        self.import_worker = None
+        self.import_progress.close()
+        self.import_progress = None
+
+        # 只需报告目标目录下的顶层条目，搜索索引会递归同步新建的目录
+        top_level = {
+            os.path.join(dest_dir, os.path.relpath(dest, dest_dir).split(os.sep)[0])
+            for _, dest in result.imported
+        }
+        self.watch_service.notify(top_level)
+
+        message = (f"导入完成: {len(result.imported)} 个文件, "
+                   f"{result.bytes_copied / 1024 / 1024:.1f} MB, 用时 {result.elapsed:.1f} 秒")
+        if result.skipped:
+            message += f", 跳过 {len(result.skipped)} 个内容已存在的文件"
+        self.statusBar().showMessage(message, 10000)
+        if result.failed:
+            details = "\n".join(f"{src}: {error}" for src, error in result.failed[:10])
+            QMessageBox.warning(self, "导入失败", f"{len(result.failed)} 个文件导入失败:\n{details}")
+
+    def find_duplicates(self):
+        if self.duplicate_worker is not None:
+            return
+        self.statusBar().showMessage("正在查找重复文件...")
+        self.duplicate_worker = DuplicateWorker(self.tree_view.model.rootPath(), self)
+        self.duplicate_worker.finished_report.connect(self.on_duplicates_found)
+        self.duplicate_worker.start()
+
+    def on_duplicates_found(self, groups):
+        root_path = self.duplicate_worker.root_path
+        self.duplicate_worker.wait()
+        self.duplicate_worker.deleteLater()
+        self.duplicate_worker = None
+        self.statusBar().clearMessage()
+
+        if not groups:
+            QMessageBox.information(self, "重复文件", "没有找到重复文件")
+            return
+        dialog = DuplicatesDialog(root_path, groups, self)
+        dialog.document_selected.connect(self.open_document)
+        dialog.exec_()
 
     def save_current_document(self):
-        for editor in self.editors.values():
-            if editor.isVisible():
-                editor.save_file()
-                return True
-        return False
+        editor = self.workspace.current_editor()
+        if editor is None:
+            return False
+        editor.save_file()
+        return True
 
     def save_as_current_document(self):
-        for editor in self.editors.values():
-            if editor.isVisible() and editor.current_file_path:
-                file_path, _ = QFileDialog.getSaveFileName(
-                    self, "另存为", editor.current_file_path,
-                    "All Files (*);;Text Files (*.txt);;Markdown Files (*.md)"
-                )
-                if file_path:
-                    editor.save_file(file_path)
-                    # 刷新目录树
-                    dir_name = os.path.dirname(file_path)
-                    index = self.tree_view.model.index(dir_name)
-                    self.tree_view.model.refresh(index)
-                return
+        editor = self.workspace.current_editor()
+        if editor is not None and editor.current_file_path:
+            old_path = editor.current_file_path
+            file_path, _ = QFileDialog.getSaveFileName(
+                self, "另存为", old_path,
+                "All Files (*);;Text Files (*.txt);;Markdown Files (*.md)"
+            )
+            if file_path and os.path.abspath(file_path) != old_path:
+                # 目标文件已在其他标签中打开时，以另存为的内容为准
+                self.workspace.close_document(os.path.abspath(file_path), ask=False)
+            if file_path and editor.save_file(file_path):
+                self.workspace.rename_path(old_path, file_path)
+                self.discard_journal(old_path)
+            return
 
         QMessageBox.warning(self, "警告", "没有打开的文档可以另存为")
 
+    def on_file_saved(self, path):
+        self.watch_service.notify([path])
+        self.discard_journal(path)
+
+    def on_save_failed(self, path, error):
+        QMessageBox.critical(self, "错误", f"保存失败: {path}\n{error}")
+
+    def autosave(self):
+        """把修改过的文档写入恢复日志；内容没有变化的文档跳过"""
+        for path, revision, editor, document in self.workspace.modified_documents():
+            if self.journaled_revisions.get(path) != revision:
+                self.journals.write(path, editor.document_text(document))
+                self.journaled_revisions[path] = revision
+
+    def discard_journal(self, path):
+        self.journaled_revisions.pop(path, None)
+        self.journals.discard(path)
+
+    def recover_unsaved_documents(self):
+        entries = self.journals.load_all()
+        if not entries:
+            return
+        names = "\n".join(entry.path for entry in entries[:10])
+        reply = QMessageBox.question(
+            self, "恢复文档", f"上次退出时有 {len(entries)} 个文档未保存:\n{names}\n\n是否恢复?",
+            QMessageBox.Yes | QMessageBox.No, QMessageBox.Yes
+        )
+        for entry in entries:
+            if reply == QMessageBox.Yes and os.path.exists(entry.path) \
+                    and self.workspace.open_document(entry.path):
+                editor = self.workspace.current_editor()
+                editor.set_content(entry.content)
+                editor.set_modified(True)
+            else:
+                self.journals.discard(entry.path)
+
+    def apply_file_changes(self, batch):
+        """把一批合并后的文件变化同步到扫描缓存、目录树和搜索索引"""
+        if batch.overflow:
+            # 事件丢失，重新核对所有已加载的目录
+            directories = self.tree_view.model.loaded_directories()
+            scan_cache.invalidate()
+        else:
+            directories = sorted(batch.directories)
+            for dir_path in directories:
+                scan_cache.invalidate(dir_path)
+
+        if self.catalog is not None:
+            if batch.overflow:
+                self.start_catalog_sync(self.tree_view.model.rootPath())
+            else:
+                # 重新读取变化的文档可能较慢，放到后台线程中
+                self.start_catalog_sync(self.tree_view.model.rootPath(), batch.paths)
+
+        for dir_path in directories:
+            self.tree_view.model.refresh_directory(dir_path)
+        self.watch_service.unwatch_missing()
+
+        if batch.overflow:
+            self.search_panel.reindex()
+            self.quick_open.rebuild()
+            self.stats_service.rebuild()
+        else:
+            self.search_panel.update_paths(batch.paths)
+            self.quick_open.update_paths(batch.paths)
+            self.stats_service.update_paths(batch.paths)
+
     def closeEvent(self, event):
+        if not self.workspace.close_all():
+            event.ignore()
+            return
+        self.workspace.shutdown()
+        self.autosave_timer.stop()
+        self.rescan_timer.stop()
+        # 等待后台写入完成再退出
+        background_writer().stop()
         self.save_settings()
+        self.search_panel.stop_indexing()
+        self.quick_open.stop_indexing()
+        self.stats_service.stop()
+        # 被取消的移动会删掉已复制的部分，清除到一半的回收区条目下次启动时继续
+        self.jobs.shutdown()
+        self.watch_service.stop()
+        self.stop_catalog_sync()
+        if self.catalog is not None:
+            self.catalog.close()
+        if self.duplicate_worker is not None:
+            self.duplicate_worker.wait()
+        self.set_tracing_enabled(False)
+        trace_path = tracing.export_path_from_env()
+        if trace_path:
+            try:
+                tracing.export_chrome_trace(trace_path)
+            except OSError as e:
+                print(f"Error exporting trace: {e}")
         super().closeEvent(event)
\ No newline at end of file
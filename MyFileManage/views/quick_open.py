@@ -0,0 +1,211 @@
+import os
+import time
+
+from PyQt5.QtWidgets import QDialog, QVBoxLayout, QLineEdit, QListWidget, QListWidgetItem, QLabel
+from PyQt5.QtCore import Qt, QEvent, QThread, QTimer, pyqtSignal
+
+from search.path_index import PathIndex
+
+# 从输入框转发给结果列表的按键
+_NAVIGATION_KEYS = (Qt.Key_Up, Qt.Key_Down, Qt.Key_PageUp, Qt.Key_PageDown)
+
+
+class PathIndexWorker(QThread):
+    """在后台线程遍历根目录，建立路径索引"""
+    finished_index = pyqtSignal(object)  # PathIndex，取消时为 None
+
+    def __init__(self, root_path, parent=None):
+        super().__init__(parent)
+        self.root_path = root_path
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        index = None
+        try:
+            index = PathIndex.build(self.root_path, is_cancelled=lambda: self._cancelled)
+        except Exception as e:
+            print(f"Error building path index: {e}")
+        self.finished_index.emit(index)
+
+
+class QuickOpenDialog(QDialog):
+    """按文件名模糊查找并打开文档(Ctrl+P)
+
+    索引建好之前的文件变化先排队，建好后按文件系统的当前状态补上。
+    只有目录树中已加载的目录被监视，其他目录中的变化要由 refresh 定期在后台重建索引才能发现。
+    """
+    document_selected = pyqtSignal(str)  # 文档路径
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.root_path = None
+        self.index = None
+        self.worker = None
+        self.pending_paths = set()
+        self.recent = {}  # 索引建好之前记录的 {路径: 打开时间}
+        self.setWindowTitle("快速打开")
+        self.resize(600, 400)
+        self.setup_ui()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+
+        self.query_edit = QLineEdit()
+        self.query_edit.setPlaceholderText("输入文件名，可用 / 限定目录...")
+        self.query_edit.installEventFilter(self)
+        layout.addWidget(self.query_edit)
+
+        self.status_label = QLabel()
+        self.status_label.hide()
+        layout.addWidget(self.status_label)
+
+        self.results = QListWidget()
+        layout.addWidget(self.results)
+
+        # 查询在每次按键时同步执行，不需要延迟；没有检查完的文档在空闲时接着检查
+        self.query_edit.textChanged.connect(self.run_query)
+        self.scan_timer = QTimer(self)
+        self.scan_timer.setSingleShot(True)
+        self.scan_timer.setInterval(0)
+        self.scan_timer.timeout.connect(self.continue_query)
+        self.query_edit.returnPressed.connect(self.open_current)
+        self.results.itemActivated.connect(self.on_result_activated)
+
+    def eventFilter(self, obj, event):
+        if obj is self.query_edit and event.type() == QEvent.KeyPress and event.key() in _NAVIGATION_KEYS:
+            self.results.keyPressEvent(event)
+            return True
+        return super().eventFilter(obj, event)
+
+    # ---- 索引 ----
+
+    def set_root_path(self, path, recent=None):
+        """切换根目录并在后台重建索引；recent 为 {路径: 最后打开时间}"""
+        self.stop_indexing()
+        self.root_path = os.path.abspath(path)
+        self.index = None
+        self.pending_paths.clear()
+        self.recent = dict(recent or {})
+        self.rebuild()
+
+    def rebuild(self):
+        if not self.root_path:
+            return
+        self.stop_indexing()
+        self.worker = PathIndexWorker(self.root_path, self)
+        self.worker.finished_index.connect(self.on_index_built)
+        self.worker.start()
+        self.show_status()
+
+    def refresh(self):
+        """在后台重建索引，完成前继续使用现有的索引"""
+        if self.worker is None and self.index is not None:
+            self.rebuild()
+
+    def stop_indexing(self):
+        if self.worker is not None:
+            self.worker.finished_index.disconnect(self.on_index_built)
+            self.worker.cancel()
+            self.worker.wait()
+            self.worker.deleteLater()
+            self.worker = None
+
+    def on_index_built(self, index):
+        self.worker.wait()
+        self.worker.deleteLater()
+        self.worker = None
+        if index is None:
+            return
+        if self.index is not None:
+            # 重建期间的打开记录保存在旧索引中
+            self.recent.update((os.path.join(self.index.root_path, relative), opened)
+                               for relative, opened in self.index.recent.items())
+        index.set_recent(self.recent)
+        self.recent = {}
+        self.index = index
+        if self.pending_paths:
+            paths, self.pending_paths = list(self.pending_paths), set()
+            self.index.update_paths(paths)
+        self.show_status()
+        self.run_query()
+
+    def update_paths(self, paths):
+        """文件变化后增量更新索引"""
+        if self.worker is not None:
+            self.pending_paths.update(paths)
+        if self.index is not None:
+            self.index.update_paths(paths)
+            if self.isVisible():
+                self.run_query()
+
+    def touch(self, path):
+        if self.index is not None:
+            self.index.touch(path)
+        else:
+            self.recent[os.path.abspath(path)] = time.time()
+
+    def show_status(self):
+        if self.index is None:
+            self.status_label.setText("正在建立文件索引...")
+            self.status_label.show()
+        else:
+            self.status_label.hide()
+
+    # ---- 查询 ----
+
+    def popup(self):
+        self.query_edit.selectAll()
+        self.query_edit.setFocus()
+        self.run_query()
+        self.show()
+        self.raise_()
+        self.activateWindow()
+
+    def run_query(self):
+        self.scan_timer.stop()
+        self.results.clear()
+        if self.index is None:
+            return
+        self.show_matches(self.index.query(self.query_edit.text()))
+        if self.results.count():
+            self.results.setCurrentRow(0)
+        if self.index.has_more:
+            self.scan_timer.start()
+
+    def continue_query(self):
+        """接着检查上次查询没有检查完的文档，结果有变化时更新列表并保留选中的结果"""
+        if self.index is None or not self.isVisible():
+            return
+        matches = self.index.query(self.query_edit.text())
+        paths = [match.path for match in matches]
+        if paths != [self.results.item(row).data(Qt.UserRole) for row in range(self.results.count())]:
+            current = self.results.currentItem()
+            selected = current.data(Qt.UserRole) if current is not None else None
+            self.results.clear()
+            self.show_matches(matches)
+            if paths:
+                self.results.setCurrentRow(paths.index(selected) if selected in paths else 0)
+        if self.index.has_more:
+            self.scan_timer.start()
+
+    def show_matches(self, matches):
+        for match in matches:
+            relative = os.path.relpath(match.path, self.index.root_path)
+            directory = os.path.dirname(relative)
+            item = QListWidgetItem(f"{os.path.basename(relative)}    {directory}" if directory
+                                   else relative)
+            item.setToolTip(match.path)
+            item.setData(Qt.UserRole, match.path)
+            self.results.addItem(item)
+
+    def open_current(self):
+        item = self.results.currentItem()
+        if item is not None:
+            self.on_result_activated(item)
+
+    def on_result_activated(self, item):
+        self.document_selected.emit(item.data(Qt.UserRole))
+        self.accept()
@@ -0,0 +1,159 @@
+import os
+
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLineEdit, QListWidget, QListWidgetItem, QLabel
+from PyQt5.QtCore import Qt, QThread, QTimer, pyqtSignal
+
+from search.index import SearchIndex
+from utils.app_paths import data_dir_for_root
+
+
+def index_db_path(root_path):
+    return os.path.join(data_dir_for_root(root_path), "search.db")
+
+
+class IndexWorker(QThread):
+    """后台增量更新搜索索引；给定 paths 时只同步这些路径"""
+    progress = pyqtSignal(int, int)  # 已扫描文件数, 已重新索引数
+    finished_indexing = pyqtSignal(int, int)  # 重新索引数, 删除数
+
+    def __init__(self, root_path, paths=None, parent=None):
+        super().__init__(parent)
+        self.root_path = root_path
+        self.paths = paths
+        self._cancelled = False
+
+    def cancel(self):
+        self._cancelled = True
+
+    def run(self):
+        indexed, removed = 0, 0
+        index = SearchIndex(index_db_path(self.root_path))
+        try:
+            if self.paths is not None:
+                indexed, removed = index.update_paths(self.paths), 0
+            else:
+                indexed, removed = index.update(
+                    self.root_path,
+                    progress=self.progress.emit,
+                    is_cancelled=lambda: self._cancelled
+                )
+        except Exception as e:
+            print(f"Error updating search index: {e}")
+        finally:
+            index.close()
+        self.finished_indexing.emit(indexed, removed)
+
+
+class SearchPanel(QWidget):
+    document_selected = pyqtSignal(str)  # 文档路径
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.root_path = None
+        self.index = None
+        self.worker = None
+        self.pending_paths = set()
+        self.setup_ui()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+
+        self.search_edit = QLineEdit()
+        self.search_edit.setPlaceholderText("搜索文档...")
+        self.search_edit.setClearButtonEnabled(True)
+        layout.addWidget(self.search_edit)
+
+        self.status_label = QLabel()
+        self.status_label.hide()
+        layout.addWidget(self.status_label)
+
+        self.results = QListWidget()
+        self.results.hide()
+        layout.addWidget(self.results)
+
+        # 输入停顿后再查询，避免每个按键都访问数据库
+        self.query_timer = QTimer(self)
+        self.query_timer.setSingleShot(True)
+        self.query_timer.setInterval(150)
+        self.query_timer.timeout.connect(self.run_query)
+
+        self.search_edit.textChanged.connect(self.query_timer.start)
+        self.search_edit.returnPressed.connect(self.open_first_result)
+        self.results.itemActivated.connect(self.on_result_activated)
+
+    def set_root_path(self, path):
+        if path == self.root_path:
+            return
+        self.stop_indexing()
+        if self.index:
+            self.index.close()
+        self.root_path = path
+        self.pending_paths.clear()
+        self.index = SearchIndex(index_db_path(path))
+        self.reindex()
+
+    def reindex(self, paths=None):
+        """在后台增量同步索引"""
+        if not self.root_path or self.worker is not None:
+            return
+        self.worker = IndexWorker(self.root_path, paths, self)
+        self.worker.progress.connect(self.on_index_progress)
+        self.worker.finished_indexing.connect(self.on_index_finished)
+        self.worker.finished.connect(self.on_worker_finished)
+        self.worker.start()
+
+    def update_paths(self, paths):
+        """文件变化后只同步受影响的路径，正在索引时排队等待"""
+        self.pending_paths.update(paths)
+        self.flush_pending_paths()
+
+    def flush_pending_paths(self):
+        if self.pending_paths and self.worker is None:
+            paths, self.pending_paths = list(self.pending_paths), set()
+            self.reindex(paths)
+
+    def on_worker_finished(self):
+        self.worker.deleteLater()
+        self.worker = None
+        self.flush_pending_paths()
+
+    def stop_indexing(self):
+        if self.worker is not None:
+            self.worker.finished.disconnect(self.on_worker_finished)
+            self.worker.cancel()
+            self.worker.wait()
+            self.worker.deleteLater()
+            self.worker = None
+
+    def on_index_progress(self, scanned, indexed):
+        self.status_label.setText(f"正在建立索引: 已扫描 {scanned} 个文件")
+        self.status_label.show()
+
+    def on_index_finished(self, indexed, removed):
+        self.status_label.hide()
+        if self.search_edit.text():
+            self.run_query()
+
+    def run_query(self):
+        query = self.search_edit.text().strip()
+        self.results.clear()
+        if not query or not self.index:
+            self.results.hide()
+            return
+
+        for hit in self.index.search(query):
+            item = QListWidgetItem(hit.title)
+            item.setToolTip(hit.path)
+            item.setData(Qt.UserRole, hit.path)
+            self.results.addItem(item)
+        self.results.setVisible(self.results.count() > 0)
+
+    def open_first_result(self):
+        self.query_timer.stop()
+        self.run_query()
+        if self.results.count():
+            self.on_result_activated(self.results.item(0))
+
+    def on_result_activated(self, item):
+        self.document_selected.emit(item.data(Qt.UserRole))
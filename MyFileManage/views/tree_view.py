@@ -1,9 +1,14 @@
 import os
+import time
 from PyQt5.QtWidgets import (
-    QTreeView, QFileSystemModel, QMenu, QInputDialog, QMessageBox
+    QTreeView, QMenu, QInputDialog, QMessageBox, QFileDialog, QHeaderView
 )
-from PyQt5.QtCore import QDir, Qt, pyqtSignal
+from PyQt5.QtCore import Qt, QTimer, pyqtSignal
 from models.document import DocumentType
+from views.file_tree_model import COLUMN_TITLES, DocumentTreeModel
+
+# 目录折叠多久(毫秒)后释放子节点和监视，期间重新展开不必重新扫描
+UNLOAD_DELAY_MS = 10_000
 
 
 class DocumentTreeView(QTreeView):
@@ -13,37 +18,73 @@ class DocumentTreeView(QTreeView):
     new_directory_requested = pyqtSignal(str, str)  # 父目录路径, 目录名
     rename_requested = pyqtSignal(str, str)  # 旧路径, 新名称
     delete_requested = pyqtSignal(str, bool)  # 路径, 是否是目录
+    move_requested = pyqtSignal(str, str)  # 路径, 目标目录
+    import_requested = pyqtSignal(str, bool)  # 目标目录, 是否导入文件夹
+    find_duplicates_requested = pyqtSignal()
 
     def __init__(self, parent=None):
         super().__init__(parent)
+        self.collapsed_at = {}  # 目录路径 -> 折叠时间
         self.setup_ui()
 
     def setup_ui(self):
-        self.model = QFileSystemModel()
-        self.model.setRootPath(QDir.rootPath())
-        self.model.setFilter(QDir.AllDirs | QDir.Files | QDir.NoDotAndDotDot)
-
-        name_filters = [f"*.{ext.value}" for ext in DocumentType]
-        self.model.setNameFilters(name_filters)
-        self.model.setNameFilterDisables(False)
+        # 只显示目录和受支持的文档，目录展开时才扫描
+        self.model = DocumentTreeModel()
 
         self.setModel(self.model)
-        self.setHeaderHidden(True)
-        self.hideColumn(1)  # 隐藏大小列
-        self.hideColumn(2)  # 隐藏类型列
-        self.hideColumn(3)  # 隐藏修改日期列
+        self.set_stats_visible(False)
 
         self.doubleClicked.connect(self.on_item_double_clicked)
+        self.collapsed.connect(self.on_collapsed)
+        self.expanded.connect(self.on_expanded)
+
+        self.unload_timer = QTimer(self)
+        self.unload_timer.setSingleShot(True)
+        self.unload_timer.timeout.connect(self.unload_collapsed)
         self.setContextMenuPolicy(Qt.CustomContextMenu)
         self.customContextMenuRequested.connect(self.show_context_menu)
 
+    def set_stats_visible(self, visible):
+        """显示或隐藏大小、文档数和修改时间列"""
+        self.setHeaderHidden(not visible)
+        for column in range(1, len(COLUMN_TITLES)):
+            self.setColumnHidden(column, not visible)
+        if visible:
+            self.header().setStretchLastSection(False)
+            self.header().setSectionResizeMode(0, QHeaderView.Stretch)
+            for column in range(1, len(COLUMN_TITLES)):
+                self.header().setSectionResizeMode(column, QHeaderView.ResizeToContents)
+
     def set_root_path(self, path):
-        root_index = self.model.index(path)
-        self.setRootIndex(root_index)
+        self.collapsed_at.clear()
+        self.model.setRootPath(path)
+
+    def on_collapsed(self, index):
+        self.collapsed_at[self.model.filePath(index)] = time.monotonic()
+        if not self.unload_timer.isActive():
+            self.unload_timer.start(UNLOAD_DELAY_MS)
+
+    def on_expanded(self, index):
+        self.collapsed_at.pop(self.model.filePath(index), None)
+
+    def unload_collapsed(self, force=False):
+        """释放折叠时间已足够长的目录；force 为 True 时释放所有折叠的目录"""
+        deadline = time.monotonic() - UNLOAD_DELAY_MS / 1000
+        for path, collapsed_at in list(self.collapsed_at.items()):
+            if not force and collapsed_at > deadline:
+                continue
+            del self.collapsed_at[path]
+            index = self.model.index(path)
+            # 祖先目录已被释放时 index 无效
+            if index.isValid() and not self.isExpanded(index):
+                self.model.unload_directory(path)
+        if self.collapsed_at:
+            wait = min(self.collapsed_at.values()) - deadline
+            self.unload_timer.start(max(int(wait * 1000), 0))
 
     def on_item_double_clicked(self, index):
         path = self.model.filePath(index)
-        if os.path.isfile(path):
+        if not self.model.isDir(index):
             self.document_selected.emit(path)
         else:
             self.directory_selected.emit(path)
@@ -56,10 +97,11 @@ class DocumentTreeView(QTreeView):
         path = self.model.filePath(index)
         menu = QMenu()
 
-        if os.path.isfile(path):
+        if not self.model.isDir(index):
             # 文件右键菜单
             rename_action = menu.addAction("重命名")
             delete_action = menu.addAction("删除")
+            move_action = menu.addAction("移动到...")
             save_as_action = menu.addAction("另存为")
 
             action = menu.exec_(self.viewport().mapToGlobal(position))
@@ -79,6 +121,8 @@ class DocumentTreeView(QTreeView):
                 )
                 if reply == QMessageBox.Yes:
                     self.delete_requested.emit(path, False)
+            elif action == move_action:
+                self.show_move_dialog(path)
             elif action == save_as_action:
                 # 另存为功能在主控制器中实现
                 pass
@@ -88,7 +132,10 @@ class DocumentTreeView(QTreeView):
             new_dir_action = menu.addAction("新建目录")
             rename_action = menu.addAction("重命名")
             delete_action = menu.addAction("删除")
+            move_action = menu.addAction("移动到...")
             import_action = menu.addAction("导入文件")
+            import_folder_action = menu.addAction("导入文件夹")
+            duplicates_action = menu.addAction("查找重复文件")
 
             action = menu.exec_(self.viewport().mapToGlobal(position))
 
@@ -115,9 +162,21 @@ class DocumentTreeView(QTreeView):
                 )
                 if reply == QMessageBox.Yes:
                     self.delete_requested.emit(path, True)
+            elif action == move_action:
+                self.show_move_dialog(path)
             elif action == import_action:
-                # 导入功能在主控制器中实现
-                pass
+                self.import_requested.emit(path, False)
+            elif action == import_folder_action:
+                self.import_requested.emit(path, True)
+            elif action == duplicates_action:
+                self.find_duplicates_requested.emit()
+
+    def show_move_dialog(self, path):
+        dest_dir = QFileDialog.getExistingDirectory(
+            self, f'移动 "{os.path.basename(path)}" 到', os.path.dirname(path)
+        )
+        if dest_dir:
+            self.move_requested.emit(path, dest_dir)
 
     def show_new_document_dialog(self, dir_path):
         doc_types = [ext.value.upper() for ext in DocumentType]
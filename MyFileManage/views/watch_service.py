@@ -0,0 +1,32 @@
+from PyQt5.QtCore import QObject, pyqtSignal
+
+from utils.fs_watcher import FileSystemWatcher
+
+
+class WatchService(QObject):
+    """把监视线程中合并好的文件变化转发到界面线程"""
+    changes_ready = pyqtSignal(object)  # ChangeBatch
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        # 信号从监视线程发出，会以队列方式投递到界面线程
+        self.watcher = FileSystemWatcher(self.changes_ready.emit)
+        self.watcher.start()
+
+    def watch(self, path):
+        self.watcher.watch(path)
+
+    def unwatch(self, path):
+        self.watcher.unwatch(path)
+
+    def unwatch_missing(self):
+        self.watcher.unwatch_missing()
+
+    def unwatch_all(self):
+        self.watcher.unwatch_all()
+
+    def notify(self, paths):
+        self.watcher.notify(paths)
+
+    def stop(self):
+        self.watcher.stop()
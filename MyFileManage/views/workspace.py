@@ -0,0 +1,249 @@
+import os
+
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QHBoxLayout, QTabBar, QMessageBox
+from PyQt5.QtCore import pyqtSignal
+
+from utils.file_utils import get_document_type
+from views.document_cache import DocumentCache, OpenDocument
+from views.editor.registry import EditorRegistry
+
+
+class DocumentWorkspace(QWidget):
+    """多文档标签页
+
+    每种编辑器只有一个实例，切换标签时把缓存的 QTextDocument 和预览结果挂回编辑器，
+    不再重新读取和解析文件；超出内存预算的文档由 DocumentCache 换出到磁盘。
+    """
+    current_changed = pyqtSignal(str)  # 当前文档路径，没有文档时为空
+    document_closed = pyqtSignal(str)  # 已关闭且没有待写入内容的文档路径
+
+    def __init__(self, budget_bytes, parent=None):
+        super().__init__(parent)
+        self.cache = DocumentCache(budget_bytes)
+        self.active = None
+        self.setup_ui()
+
+    def setup_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        layout.setSpacing(0)
+
+        self.tab_bar = QTabBar()
+        self.tab_bar.setTabsClosable(True)
+        self.tab_bar.setMovable(True)
+        self.tab_bar.setDocumentMode(True)
+        self.tab_bar.setExpanding(False)
+        self.tab_bar.currentChanged.connect(self.on_tab_changed)
+        self.tab_bar.tabCloseRequested.connect(self.on_tab_close_requested)
+        layout.addWidget(self.tab_bar)
+
+        self.editor_stack = QWidget()
+        self.editor_stack.setLayout(QHBoxLayout())
+        self.editor_stack.layout().setContentsMargins(0, 0, 0, 0)
+        layout.addWidget(self.editor_stack)
+
+        # 编辑器在第一次打开对应类型的文档时才创建
+        self.editor_registry = EditorRegistry(self.editor_stack, self)
+
+    # ---- 打开与切换 ----
+
+    def open_document(self, file_path):
+        """打开文档或切换到已打开的标签；不支持的类型返回 False"""
+        file_path = os.path.abspath(file_path)
+        if file_path in self.cache:
+            self.tab_bar.setCurrentIndex(self.tab_index(file_path))
+            return True
+
+        editor = self.editor_registry.editor_for(get_document_type(file_path))
+        if editor is None:
+            return False
+
+        self.deactivate()
+        entry = OpenDocument(file_path, editor, editor.create_document())
+        self.show_editor(editor)
+        editor.attach_document(entry.document)
+        editor.load_file(file_path)
+        entry.document.setModified(False)
+        entry.large_file = self.showing_large_file(editor)
+        self.bind_document(entry)
+        self.cache.add(entry)
+        self.active = entry
+
+        self.tab_bar.blockSignals(True)
+        index = self.tab_bar.addTab(os.path.basename(file_path))
+        self.tab_bar.setTabData(index, file_path)
+        self.tab_bar.setTabToolTip(index, file_path)
+        self.tab_bar.setCurrentIndex(index)
+        self.tab_bar.blockSignals(False)
+
+        self.cache.enforce_budget()
+        self.current_changed.emit(file_path)
+        return True
+
+    def activate(self, file_path):
+        """切换到已打开的文档"""
+        entry = self.cache.get(file_path)
+        if entry is None or entry is self.active:
+            return
+        self.deactivate()
+        editor = entry.editor
+        self.show_editor(editor)
+
+        # 换出的文档恢复时会创建新的 QTextDocument，需要重新连接信号
+        was_resident = entry.resident
+        restored = self.cache.restore(entry)
+        if not restored or entry.read_only or entry.large_file:
+            # 大文件或未加载完的文档没有完整内容，重新打开文件；它们不会有未保存的修改
+            editor.attach_document(entry.document)
+            editor.load_file(file_path)
+            entry.document.setModified(False)
+            entry.large_file = self.showing_large_file(editor)
+            entry.preview_state = None
+        else:
+            # 先设置路径，编辑器挂上文档时可以据此决定是否启用语法高亮
+            editor.current_file_path = file_path
+            editor.attach_document(entry.document)
+            cursor = editor.editor.textCursor()
+            cursor.setPosition(min(entry.cursor_position, entry.document.characterCount() - 1))
+            editor.editor.setTextCursor(cursor)
+            editor.restore_preview(entry.preview_state)
+        if was_resident:
+            self.update_tab_title(entry.path)
+        else:
+            self.bind_document(entry)
+        self.active = entry
+        self.cache.touch(file_path)
+        self.cache.enforce_budget()
+        self.current_changed.emit(file_path)
+
+    def deactivate(self):
+        """记录当前文档的光标、预览和加载状态"""
+        entry = self.active
+        if entry is None:
+            return
+        editor = entry.editor
+        editor.finish_streaming_load(False)
+        # 编辑器由同类型的文档共用，未完成的预览不能落到下一个文档上；
+        # 放弃了预览时缓存的结果已经过时，切换回来时重新渲染
+        stale = editor.cancel_preview()
+        entry.read_only = editor.read_only_view and not entry.large_file
+        entry.cursor_position = editor.editor.textCursor().position()
+        entry.preview_state = None if stale else editor.preview_state()
+        self.active = None
+
+    def show_editor(self, editor):
+        for other in self.editor_registry.editors():
+            if other is not editor:
+                other.hide()
+        editor.show()
+
+    @staticmethod
+    def showing_large_file(editor):
+        return editor.large_viewer is not None and editor.large_viewer.isVisible()
+
+    def bind_document(self, entry):
+        """新建的文档对象只连接一次"""
+        # 改名后 entry.path 会变化，因此在调用时再读取路径
+        entry.document.modificationChanged.connect(
+            lambda modified, entry=entry: self.update_tab_title(entry.path))
+        self.update_tab_title(entry.path)
+
+    # ---- 标签 ----
+
+    def tab_index(self, file_path):
+        for index in range(self.tab_bar.count()):
+            if self.tab_bar.tabData(index) == file_path:
+                return index
+        return -1
+
+    def update_tab_title(self, file_path):
+        index = self.tab_index(file_path)
+        entry = self.cache.get(file_path)
+        if index < 0 or entry is None:
+            return
+        modified = entry.document.isModified() if entry.resident else entry.modified
+        self.tab_bar.setTabText(index, os.path.basename(file_path) + (" *" if modified else ""))
+
+    def on_tab_changed(self, index):
+        if index >= 0:
+            self.activate(self.tab_bar.tabData(index))
+
+    def on_tab_close_requested(self, index):
+        self.close_document(self.tab_bar.tabData(index))
+
+    def is_modified(self, entry):
+        return entry.document.isModified() if entry.resident else entry.modified
+
+    def close_document(self, file_path, ask=True):
+        """关闭文档；有未保存的修改时询问，用户取消时返回 False"""
+        entry = self.cache.get(file_path)
+        if entry is None:
+            return True
+        if ask and self.is_modified(entry):
+            self.tab_bar.setCurrentIndex(self.tab_index(file_path))
+            reply = QMessageBox.question(
+                self, "关闭文档", f'"{os.path.basename(file_path)}" 有未保存的修改，是否保存?',
+                QMessageBox.Save | QMessageBox.Discard | QMessageBox.Cancel, QMessageBox.Save
+            )
+            if reply == QMessageBox.Cancel:
+                return False
+            saving = reply == QMessageBox.Save
+            if saving and not entry.editor.save_file():
+                return False
+        else:
+            saving = False
+
+        if entry is self.active:
+            self.active = None
+            entry.editor.hide()
+        self.cache.remove(file_path)
+        # 关闭当前标签时 QTabBar 会切换到相邻标签并发出 currentChanged
+        self.tab_bar.removeTab(self.tab_index(file_path))
+        if not self.tab_bar.count():
+            self.current_changed.emit('')
+        if not saving:
+            self.document_closed.emit(file_path)
+        return True
+
+    def close_all(self):
+        """依次关闭所有文档，用户取消时返回 False"""
+        for file_path in list(self.cache.entries):
+            if not self.close_document(file_path):
+                return False
+        return True
+
+    # ---- 文件变化 ----
+
+    def open_paths_under(self, path):
+        """位于 path 或其子目录中的已打开文档"""
+        prefix = os.path.abspath(path).rstrip(os.sep) + os.sep
+        return [p for p in self.cache.entries if p == os.path.abspath(path) or p.startswith(prefix)]
+
+    def rename_path(self, old_path, new_path):
+        """文件或目录改名后更新已打开文档的路径"""
+        old_path, new_path = os.path.abspath(old_path), os.path.abspath(new_path)
+        for path in self.open_paths_under(old_path):
+            renamed = new_path + path[len(old_path):]
+            index = self.tab_index(path)
+            self.cache.rename(path, renamed)
+            self.tab_bar.setTabData(index, renamed)
+            self.tab_bar.setTabToolTip(index, renamed)
+            self.update_tab_title(renamed)
+            entry = self.cache.get(renamed)
+            if entry is self.active:
+                entry.editor.current_file_path = renamed
+
+    def modified_documents(self):
+        """常驻内存且有未保存修改的文档，返回 [(路径, 修订号, 编辑器, 文档)]"""
+        return [(entry.path, entry.document.revision(), entry.editor, entry.document)
+                for entry in self.cache.entries.values()
+                if entry.resident and entry.document.isModified()]
+
+    def current_editor(self):
+        return self.active.editor if self.active is not None else None
+
+    def shutdown(self):
+        self.active = None
+        self.cache.clear()
+        for editor in self.editor_registry.editors():
+            editor.shutdown()